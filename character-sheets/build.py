@@ -0,0 +1,209 @@
+'''This module contains a script for compiling generated Pathfinder
+character sheets into PDF files with a local TeX engine'''
+
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+from core.sheet_template import MANIFEST_FILE as VALUES_FILE
+
+
+__all__ = []
+
+
+# --- Constants ---
+MAIN_FILE = 'main.tex'
+MANIFEST_FILE = '.build-manifest.json'
+REPORT_FILE = 'build-report.json'
+# number of lines of TeX output kept in the report for failed builds
+LOG_LINES = 20
+
+
+def _build_sheet(task):
+    '''Compiles a single character sheet inside a worker process
+
+    :param task: tuple of TeX engine and path to the sheet directory
+    :returns: dictionary describing the result of the build
+    '''
+    engine, sheet_path = task
+    command = [engine, '-interaction=nonstopmode', '-halt-on-error',
+               MAIN_FILE]
+    start = time.time()
+    try:
+        process = subprocess.Popen(command, cwd=sheet_path,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT)
+        output = process.communicate()[0]
+        returncode = process.returncode
+    except OSError as e:
+        output = str(e).encode('utf-8')
+        returncode = -1
+    result = {
+        'sheet': os.path.basename(sheet_path),
+        'seconds': round(time.time() - start, 3),
+        'returncode': returncode,
+    }
+    if returncode != 0:
+        lines = output.decode('utf-8', 'replace').splitlines()
+        result['log'] = lines[-LOG_LINES:]
+    return result
+
+
+def build_sheets(dest_path, engine='pdflatex', processes=None, force=False):
+    '''Compiles every character sheet in a directory using a pool of
+    worker processes, skipping sheets whose files have not changed since
+    they were last compiled successfully
+
+    A report of build times and failures is written to REPORT_FILE in
+    dest_path.
+
+    :param dest_path: directory containing generated character sheets
+    :param engine: TeX engine used to compile each sheet's main.tex
+    :param processes: number of worker processes, defaults to CPU count
+    :param force: if True, compile every sheet even if it has not changed
+    :returns: dictionary describing the results of the builds
+    '''
+    manifest_path = os.path.join(dest_path, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+
+    # determine which sheets have changed
+    hashes = {}
+    skipped = []
+    tasks = []
+    for sheet_path in find_sheets(dest_path):
+        name = os.path.basename(sheet_path)
+        hashes[name] = hash_sheet(sheet_path)
+        if manifest.get(name) == hashes[name]:
+            skipped.append(name)
+        else:
+            tasks.append((engine, sheet_path))
+
+    # compile changed sheets
+    results = []
+    if tasks:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_build_sheet, tasks, 1)
+        finally:
+            pool.close()
+            pool.join()
+
+    # record sheets that were compiled successfully
+    for result in results:
+        name = result['sheet']
+        if result['returncode'] == 0:
+            manifest[name] = hashes[name]
+        else:
+            manifest.pop(name, None)
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+
+    report = {
+        'engine': engine,
+        'built': sorted(x['sheet'] for x in results if x['returncode'] == 0),
+        'failed': sorted((x for x in results if x['returncode'] != 0),
+                         key=lambda x: x['sheet']),
+        'skipped': sorted(skipped),
+        'times': dict((x['sheet'], x['seconds']) for x in results),
+    }
+    with open(os.path.join(dest_path, REPORT_FILE), 'w') as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+    return report
+
+
+def find_sheets(dest_path):
+    '''Finds every character sheet directory in a directory
+
+    :param dest_path: directory containing generated character sheets
+    :returns: sorted list of paths to sheet directories
+    '''
+    sheets = []
+    for name in sorted(os.listdir(dest_path)):
+        sheet_path = os.path.join(dest_path, name)
+        if os.path.isfile(os.path.join(sheet_path, MAIN_FILE)):
+            sheets.append(sheet_path)
+    return sheets
+
+
+def hash_sheet(sheet_path):
+    '''Computes a hash of the inputs of a character sheet
+
+    The contents of every .tex file are hashed. Other files, such as
+    images, are identified by their size and modification time.
+
+    :param sheet_path: path to a sheet directory
+    :returns: hex digest of the sheet's inputs
+    '''
+    digest = hashlib.sha1()
+    for dir_path, dir_names, file_names in os.walk(sheet_path):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            path = os.path.join(dir_path, file_name)
+            rel_path = os.path.relpath(path, sheet_path)
+            if file_name.endswith('.tex'):
+                digest.update(rel_path.encode('utf-8'))
+                with open(path, 'rb') as tex_file:
+                    digest.update(tex_file.read())
+            elif file_name != VALUES_FILE and \
+                    not file_name.endswith(('.aux', '.log', '.out', '.pdf')):
+                stat = os.stat(path)
+                digest.update(('%s:%d:%d' % (rel_path, stat.st_size,
+                                             stat.st_mtime)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def parse_cmd_args():
+    '''Parses command line arguments
+
+    :returns map data structure containing each argument and associated value
+    '''
+    # create parser for command line arguments
+    help_desc = 'Compiles generated Pathfinder character sheets'
+    parser = argparse.ArgumentParser(description=help_desc)
+
+    # -argument- directory containing generated character sheets
+    parser.add_argument('dest', help='directory of generated sheets')
+
+    # -argument [optional]- TeX engine
+    parser.add_argument('--engine', default='pdflatex',
+                        help='TeX engine used to compile sheets')
+
+    # -argument [optional]- number of worker processes
+    parser.add_argument('--processes', metavar='N', type=int,
+                        help='number of worker processes')
+
+    # -argument [optional]- ignore the build manifest
+    parser.add_argument('--force', action='store_true',
+                        help='compiles every sheet, even if unchanged')
+
+    # parse command line arguments
+    args = vars(parser.parse_args())
+
+    return args
+
+
+# --- Script ---
+if __name__ == '__main__':
+    # parse command line arguments
+    args = parse_cmd_args()
+
+    # compile character sheets
+    report = build_sheets(args['dest'], args['engine'], args['processes'],
+                          args['force'])
+    sys.stdout.write('built %d, skipped %d, failed %d\n' %
+                     (len(report['built']), len(report['skipped']),
+                      len(report['failed'])))
+    for failure in report['failed']:
+        sys.stderr.write('failed to build %s\n%s\n' %
+                         (failure['sheet'], '\n'.join(failure['log'])))
+    if report['failed']:
+        sys.exit(1)
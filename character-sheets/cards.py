@@ -0,0 +1,298 @@
+'''This module contains a script for generating packs of LaTeX stat cards
+for the creatures stored in a CreatureDB created by the bestiary crawler'''
+
+
+import argparse
+import os
+import sqlite3
+import sys
+
+try:
+    from urllib import pathname2url
+except ImportError:
+    from urllib.request import pathname2url
+
+from core.sheet_template import LAYOUT_COPY, LAYOUTS, SheetTemplate
+
+
+__all__ = []
+
+
+# --- Constants ---
+CARD_TEMPLATE_DIR = 'template/Creature Card'
+# file in the card template that is rendered once per creature
+CARD_FILE = '/cards/creature.tex'
+# files in the card template that contain placeholder values
+CARD_TEMPLATE_FILES = ['/main.tex', CARD_FILE]
+CARD_OUTPUT_NAMES = {CARD_FILE: '/cards/${card_id}.tex'}
+
+# Tables or views of a CreatureDB holding the creatures of each type of
+#   content, as in the bestiary's db.creatureDB.CONTENT_VIEWS
+CONTENT_VIEWS = {
+    'standard': 'creatures_standard',
+    '3pp': 'creatures_3pp',
+    'all': 'creatures',
+}
+
+# Integer columns of the "creatures" table shown on each card
+STAT_COLUMNS = [
+    'hp', 'HD',
+    'ac', 'touch_ac', 'flatfooted_ac',
+    'Fort', 'Ref', 'Will',
+    'Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha',
+    'BAB', 'CMB', 'CMD'
+]
+# columns displayed as bonuses, e.g. +4
+BONUS_COLUMNS = frozenset(['Fort', 'Ref', 'Will', 'BAB', 'CMB'])
+# columns where a value of -1 means the creature has no score
+ABILITY_COLUMNS = frozenset(['Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha'])
+
+# names of fractional Challenge Ratings
+FRACTIONAL_CR = [
+    (1.0 / 2, '1/2'), (1.0 / 3, '1/3'), (1.0 / 4, '1/4'),
+    (1.0 / 6, '1/6'), (1.0 / 8, '1/8')
+]
+
+# characters that must be escaped in LaTeX text
+LATEX_ESCAPES = {
+    '\\': r'\textbackslash{}', '&': r'\&', '%': r'\%', '$': r'\$',
+    '#': r'\#', '_': r'\_', '{': r'\{', '}': r'\}',
+    '~': r'\textasciitilde{}', '^': r'\textasciicircum{}',
+}
+
+
+# --- Functions ---
+def _connect(db_path):
+    '''Opens a read-only connection to a CreatureDB, registering the SQL
+    function cr_value(CR), which gets a CR as a number whether it is
+    stored as a number or as a string of the form 'CR X'
+
+    :param db_path: path to the database file
+    :returns: an open sqlite3 Connection
+    '''
+    if not os.path.exists(db_path):
+        raise IOError('no such database: %s' % db_path)
+    uri = 'file:%s?mode=ro' % pathname2url(os.path.abspath(db_path))
+    try:
+        connection = sqlite3.connect(uri, uri=True)
+    # versions of sqlite3 without URI support can still refuse writes
+    except TypeError:
+        connection = sqlite3.connect(db_path)
+        connection.execute('pragma query_only = 1')
+    connection.text_factory = str
+    connection.create_function('cr_value', 1, _parse_cr)
+    return connection
+
+
+def _escape_latex(text):
+    '''Escapes the characters of a string that have special meaning in
+    LaTeX
+
+    :param text: string to escape
+    :returns: escaped string
+    '''
+    return ''.join(LATEX_ESCAPES.get(x, x) for x in text)
+
+
+def _format_cr(cr):
+    '''Formats a Challenge Rating for display, e.g. 0.5 as 1/2
+
+    :param cr: CR as a float
+    :returns: CR as a string
+    '''
+    if 0 < cr < 1:
+        return min(FRACTIONAL_CR, key=lambda x: abs(x[0] - cr))[1]
+    return '%d' % cr
+
+
+def _format_stat(column, value):
+    '''Formats the value of a stat column for display
+
+    :param column: name of a column in STAT_COLUMNS
+    :param value: value of the column
+    :returns: value as a string
+    '''
+    try:
+        value = int(float(value))
+    except (TypeError, ValueError):
+        return '--'
+    if column in ABILITY_COLUMNS and value < 0:
+        return '--'
+    if column in BONUS_COLUMNS:
+        return '%+d' % value
+    return '%d' % value
+
+
+def _parse_cr(value):
+    '''Converts a value from the CR column into a float, handling CR
+    values stored as strings of the form 'CR X'
+
+    :param value: value of the CR column
+    :returns: CR as a float, None if it can not be parsed
+    '''
+    if isinstance(value, (int, float)):
+        return float(value)
+    if value is None:
+        return None
+    cr_text = value.replace('CR', '').strip()
+    try:
+        if '/' in cr_text:
+            numerator, denominator = cr_text.split('/')
+            return float(numerator) / float(denominator)
+        return float(cr_text)
+    except ValueError:
+        return None
+
+
+def generate_cards(dest_path, db_path, min_cr=None, max_cr=None, name=None,
+                   layout=LAYOUT_COPY, batch_size=500, content='standard'):
+    '''Generates a LaTeX project containing a stat card for each creature
+    in a CreatureDB that matches the given filters
+
+    Cards are ordered by CR and then by name. The project's main.tex
+    inputs every card, so that the pack compiles to a single document.
+
+    :param dest_path: destination directory for the card pack, which must
+                      not already exist
+    :param db_path: path to a CreatureDB file
+    :param min_cr: minimum CR of creatures in the pack
+    :param max_cr: maximum CR of creatures in the pack
+    :param name: optional text that creature names must contain
+    :param layout: how static template files are placed in the output
+                   directory, one of 'copy', 'hardlink' or 'symlink'
+    :param batch_size: number of rows fetched from the database at once
+    :param content: type of creatures in the pack, one of the keys of
+                    CONTENT_VIEWS
+    :returns: number of cards generated
+    '''
+    template = SheetTemplate(CARD_TEMPLATE_DIR, CARD_TEMPLATE_FILES,
+                             CARD_OUTPUT_NAMES)
+    os.makedirs(dest_path)
+    template.copy_static_files(dest_path, {}, layout)
+
+    inputs = []
+    for values in iter_card_values(db_path, min_cr, max_cr, name,
+                                   batch_size, content):
+        template.render_file(dest_path, CARD_FILE, values)
+        inputs.append('\\input{cards/%s}' % values['card_id'])
+    template.render_file(dest_path, '/main.tex',
+                         {'cards': '\n'.join(inputs)})
+    return len(inputs)
+
+
+def iter_card_values(db_path, min_cr=None, max_cr=None, name=None,
+                     batch_size=500, content='standard'):
+    '''Streams the template values of the creatures in a CreatureDB that
+    match the given filters
+
+    :param db_path: path to a CreatureDB file
+    :param min_cr: minimum CR of creatures to include
+    :param max_cr: maximum CR of creatures to include
+    :param name: optional text that creature names must contain
+    :param batch_size: number of rows fetched from the database at once
+    :param content: type of creatures to include, one of the keys of
+                    CONTENT_VIEWS
+    :returns: generator of dictionaries for use with string.Template
+    :raises ValueError: if the database has no view of the type of
+                        content, as in databases created before creatures
+                        were tagged by content
+    '''
+    # CR is stored as text when nominal CR values are used, so it is
+    #   filtered and sorted as a number with cr_value(...)
+    query = 'select id, name, cr_value(CR) as cr_number, %s ' \
+            'from %s where cr_number is not null' % \
+            (', '.join(STAT_COLUMNS), CONTENT_VIEWS[content])
+    params = []
+    if min_cr is not None:
+        query = query + ' and cr_number >= ?'
+        params.append(min_cr)
+    if max_cr is not None:
+        query = query + ' and cr_number <= ?'
+        params.append(max_cr)
+    if name is not None:
+        query = query + " and name like ? escape '\\'"
+        escaped = name.replace('\\', '\\\\').replace('%', '\\%')
+        params.append('%' + escaped.replace('_', '\\_') + '%')
+    query = query + ' order by cr_number, name'
+
+    connection = _connect(db_path)
+    try:
+        cursor = connection.execute('select count(*) from sqlite_master '
+                                    'where name = ?',
+                                    (CONTENT_VIEWS[content],))
+        if not cursor.fetchone()[0]:
+            raise ValueError('%s has no %s creatures; it was created by an '
+                             'older version of the bestiary crawler' %
+                             (db_path, content))
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                values = {
+                    'card_id': 'creature-%d' % row[0],
+                    'name': _escape_latex(row[1]),
+                    'cr': _format_cr(row[2]),
+                }
+                for i, column in enumerate(STAT_COLUMNS):
+                    values[column] = _format_stat(column, row[3 + i])
+                yield values
+    finally:
+        connection.close()
+
+
+def parse_cmd_args():
+    '''Parses command line arguments
+
+    :returns map data structure containing each argument and associated value
+    '''
+    # create parser for command line arguments
+    help_desc = 'Generates LaTeX stat cards for creatures in a CreatureDB'
+    parser = argparse.ArgumentParser(description=help_desc)
+
+    # -argument- sets destination directory for output
+    parser.add_argument('dest', help='destination directory for the pack')
+
+    # -argument- database of creatures
+    parser.add_argument('db', help='path to a CreatureDB file')
+
+    # -argument [optional]- range of CR values
+    parser.add_argument('--cr-range', nargs=2, type=float,
+                        metavar=('MIN', 'MAX'),
+                        help='only include creatures with CR in this range')
+
+    # -argument [optional]- filter on creature names
+    parser.add_argument('--name', metavar='TEXT',
+                        help='only include creatures whose names contain '
+                             'this text')
+
+    # -argument [optional]- type of creatures
+    parser.add_argument('--content', choices=sorted(CONTENT_VIEWS.keys()),
+                        default='standard',
+                        help='type of creatures in the pack: standard '
+                             '(default), 3rd party (3pp) or all')
+
+    # -argument [optional]- how static files are placed in the output
+    parser.add_argument('--layout', choices=LAYOUTS, default=LAYOUT_COPY,
+                        help='copy static template files (default) or link '
+                             'them to the template')
+
+    # parse command line arguments
+    args = vars(parser.parse_args())
+
+    return args
+
+
+# --- Script ---
+if __name__ == '__main__':
+    # parse command line arguments
+    args = parse_cmd_args()
+    min_cr, max_cr = args['cr_range'] or (None, None)
+
+    # generate card pack
+    count = generate_cards(args['dest'], args['db'], min_cr, max_cr,
+                           args['name'], args['layout'],
+                           content=args['content'])
+    sys.stdout.write('generated %d cards in %s\n' % (count, args['dest']))
@@ -0,0 +1,218 @@
+'''A module containing a class for representing dice expressions from
+the Pathfinder RPG, such as "2d8+4" or "5d6 x 10 gp", which are parsed
+once and then rolled or analyzed any number of times.
+
+Many values can be rolled at once with NumPy, when it is installed.
+'''
+
+
+import random
+import re
+
+from fractions import Fraction
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+__all__ = ['DiceExpression', 'compile_dice']
+
+
+# --- Constants ---
+# An expression is a sum of dice and integer terms, optionally multiplied
+#   by an integer and followed by a unit, e.g. "5d6 x 10 gp"; a
+#   trailing "x" without a multiplier is not a unit
+TERM = r'(?:\d*[dD]\d+|\d+)'
+EXPRESSION_PATTERN = re.compile(
+    r'^\s*(?P<terms>[-+]?\s*%s(?:\s*[-+]\s*%s)*)'
+    r'(?:\s*[x*\xd7]\s*(?P<multiplier>\d+))?'
+    r'(?:\s+(?!x\s*$)(?P<unit>[A-Za-z]+))?\s*$' % (TERM, TERM))
+TERM_PATTERN = re.compile(r'([-+]?)\s*(?:(\d*)[dD](\d+)|(\d+))')
+
+# Number of values rolled at once by roll_many(...), which limits the
+#   memory used for expressions with many dice
+ROLL_BATCH_SIZE = 65536
+
+
+# DiceExpression objects that have already been compiled, keyed by text
+_DICE_CACHE = {}
+
+
+# --- Functions ---
+def compile_dice(text):
+    '''Gets the DiceExpression object for an expression, parsing the
+    expression only the first time it is requested
+
+    :param text: a dice expression, e.g. "5d6 x 10 gp"
+    :returns: a DiceExpression object
+    :raises ValueError: if the text is not a dice expression
+    '''
+    if text not in _DICE_CACHE:
+        _DICE_CACHE[text] = DiceExpression(text)
+    return _DICE_CACHE[text]
+
+
+# --- Classes ---
+class DiceExpression(object):
+    '''Class representing a parsed dice expression, whose value is the
+    sum of its dice and constant, times its multiplier
+
+    The distribution of an expression's values is computed exactly, the
+    first time it is needed. DiceExpression objects should not be
+    modified, so that they can be shared.'''
+
+    def __init__(self, text):
+        '''Constructs DiceExpression objects
+
+        :param text: a dice expression, e.g. "2d8+4" or "5d6 x 10 gp"
+        :raises ValueError: if the text is not a dice expression
+        '''
+        match = EXPRESSION_PATTERN.match(text)
+        if match is None:
+            raise ValueError('not a dice expression: "%s"' % text)
+        self.text = text
+        # (number of dice, sides, sign) of each group of dice
+        dice = []
+        self.constant = 0
+        for sign, count, sides, number in \
+                TERM_PATTERN.findall(match.group('terms')):
+            sign = -1 if sign == '-' else 1
+            if number:
+                self.constant = self.constant + sign * int(number)
+                continue
+            count = int(count or 1)
+            if int(sides) < 1:
+                raise ValueError('dice must have at least one side: "%s"' %
+                                 text)
+            if count:
+                dice.append((count, int(sides), sign))
+        self.dice = tuple(dice)
+        self.multiplier = int(match.group('multiplier') or 1)
+        self.unit = match.group('unit') or ''
+        self._counts = None
+
+    def __repr__(self):
+        return 'DiceExpression(%r)' % self.text
+
+    def __str__(self):
+        return self.text
+
+    def _get_counts(self):
+        '''Counts the number of ways of rolling each sum of this
+        expression's dice, without its constant and multiplier
+
+        :returns: tuple of the lowest sum and a list with the number of
+                  ways of rolling each sum, starting at the lowest
+        '''
+        if self._counts is None:
+            low = 0
+            counts = [1]
+            for count, sides, sign in self.dice:
+                for _ in range(count):
+                    # add one die to the distribution of sums; every
+                    #   die has the same shape, whatever its sign, but
+                    #   subtracted dice move the lowest sum down
+                    new_counts = [0] * (len(counts) + sides - 1)
+                    for i, ways in enumerate(counts):
+                        for face in range(sides):
+                            new_counts[i + face] += ways
+                    counts = new_counts
+                    if sign < 0:
+                        low = low - sides
+                    else:
+                        low = low + 1
+            self._counts = (low, counts)
+        return self._counts
+
+    def cdf(self, value):
+        '''Gets the probability that a roll of this expression is less
+        than or equal to a value, e.g. for checking whether a hit point
+        total is plausible for a creature's Hit Dice
+
+        :param value: a number
+        :returns: the exact probability as a Fraction
+        '''
+        return sum((p for x, p in self.distribution() if x <= value),
+                   Fraction(0))
+
+    def distribution(self):
+        '''Gets the exact probability of each value of this expression
+
+        :returns: list of (value, probability) tuples in increasing order
+                  of value, where each probability is a Fraction
+        '''
+        low, counts = self._get_counts()
+        total = sum(counts)
+        values = []
+        for i, ways in enumerate(counts):
+            if ways:
+                value = (low + i + self.constant) * self.multiplier
+                values.append((value, Fraction(ways, total)))
+        return values
+
+    @property
+    def max(self):
+        '''Highest value of this expression'''
+        return (self.max_total + self.constant) * self.multiplier
+
+    @property
+    def max_total(self):
+        '''Highest sum of this expression's dice'''
+        return sum(x[0] * (x[1] if x[2] > 0 else -1) for x in self.dice)
+
+    def mean(self):
+        '''Gets the expected value of this expression
+
+        :returns: the exact mean as a Fraction
+        '''
+        total = sum(Fraction(x[0] * x[2] * (x[1] + 1), 2) for x in self.dice)
+        return (total + self.constant) * self.multiplier
+
+    @property
+    def min(self):
+        '''Lowest value of this expression'''
+        return (self.min_total + self.constant) * self.multiplier
+
+    @property
+    def min_total(self):
+        '''Lowest sum of this expression's dice'''
+        return sum(x[0] * (1 if x[2] > 0 else -x[1]) for x in self.dice)
+
+    def roll(self, rng=random):
+        '''Rolls this expression once
+
+        :param rng: a random.Random object, or the random module
+        :returns: the value rolled
+        '''
+        total = self.constant
+        for count, sides, sign in self.dice:
+            for _ in range(count):
+                total = total + sign * rng.randint(1, sides)
+        return total * self.multiplier
+
+    def roll_many(self, size, seed=None):
+        '''Rolls this expression many times
+
+        The dice are rolled with NumPy when it is installed, and one at a
+        time with the random module otherwise.
+
+        :param size: number of values to roll
+        :param seed: optional seed of the random number generator
+        :returns: NumPy array of values, or a list when NumPy is not
+                  installed
+        '''
+        if numpy is None:
+            rng = random.Random(seed)
+            return [self.roll(rng) for _ in range(size)]
+        rng = numpy.random.RandomState(seed)
+        totals = numpy.full(size, self.constant, dtype=numpy.int64)
+        for count, sides, sign in self.dice:
+            # roll a bounded number of dice at once
+            rows = max(1, ROLL_BATCH_SIZE // count)
+            for start in range(0, size, rows):
+                end = min(size, start + rows)
+                rolls = rng.randint(1, sides + 1, size=(end - start, count))
+                totals[start:end] += sign * rolls.sum(axis=1)
+        return totals * self.multiplier
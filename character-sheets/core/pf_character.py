@@ -3,38 +3,61 @@
 
 import json
 
-from pf_class import PFClass
+from collections import OrderedDict
+
 from pf_class_instance import PFClassInstance
+from pf_class_registry import CLASS_DIR, load_registry
 
 
-__all__ = ['PFCharacter']
+__all__ = ['PFCharacter', 'load_character_json']
 
 
-CLASS_DIR = "res/json/class/"
-JSON_EXTENSION = ".json"
+def load_character_json(json_file):
+    '''Reads character data from an open JSON file, keeping the order in
+    which classes are listed
+    
+    :param json_file: open file containing character data
+    :returns: dictionary of character data
+    '''
+    return json.load(json_file, object_pairs_hook=OrderedDict)
 
 
 class PFCharacter(object):
     '''Class representing a character from the Pathfinder RPG'''
     
-    def __init__(self, file_name):
+    def __init__(self, file_name=None, json_dict=None, registry=None):
         '''Constructs PFCharacter objects
         
         :param file_name: path to the JSON file for this character
+        :param json_dict: character data already loaded from JSON, used
+                          instead of reading file_name. Classes are numbered
+                          in the order of json_dict['classes'], so it should
+                          be loaded with load_character_json(...)
+        :param registry: PFClassRegistry used to look up classes, defaults
+                         to the shared registry for CLASS_DIR
         '''
-        json_dict = json.load(open(file_name, 'r'))
+        if json_dict is None:
+            with open(file_name, 'r') as json_file:
+                json_dict = load_character_json(json_file)
+        
+        if registry is None:
+            registry = load_registry(CLASS_DIR)
         
         # -populate class members-
         self.name = json_dict['name']
         
         # This dictionary represents a character's investment in each of its
-        # classes. Each entry is a PFClassInstance object
-        self.classes = {}
+        # classes. Each entry is a PFClassInstance object, in the order the
+        # classes are listed in the character's JSON file
+        self.classes = OrderedDict()
         # add all classes associated with this character
         for x in json_dict['classes'].keys():
-            file_name = CLASS_DIR + x + JSON_EXTENSION
             class_level = json_dict['classes'][x]
-            self.__add_class(file_name, class_level)
+            self.__add_class(registry.get(x), class_level)
+        
+        # derived values, calculated when first requested
+        self._totals = None
+        self._template_vals = None
     
     def __repr__(self):
         values = [self.name, '\n']
@@ -45,29 +68,60 @@ class PFCharacter(object):
         # add class information to string representation
         for x in self.classes.keys():
             item = self.classes[x]
-            values.extend( [item[1].name, str(item[0])] )
+            values.extend( [item.name, str(item.level)] )
         return ' '.join(values)
     
-    def __add_class(self, file_name, level=1):
+    def __add_class(self, new_class, level=1):
         '''Associates this character with a new class
         
-        This method will do nothing if the class associated with the provided
-        file name has already been added to this character.
+        This method will do nothing if the provided class has already been
+        added to this character.
         
-        :param file_name: path to the json file for the desired class
+        :param new_class: PFClass object for the desired class
         :param level: number of levels of this class to associate with character
         '''
-        new_class = PFClass(file_name)
-        
-        # update the self.classes dictionary if character does not have levels 
+        # update the self.classes dictionary if character does not have levels
         # in this class
-        if not any(x.name == new_class.name for x in self.classes.itervalues()):
+        if not any(x.name == new_class.name for x in self.classes.values()):
             new_entry = PFClassInstance(new_class, level)
             self.classes[new_class.name] = new_entry
     
+    def get_totals(self):
+        '''Retrieves values that combine all of this character's classes
+        
+        The values are calculated once and then reused until the level of
+        one of the character's classes changes.
+        
+        :returns: dictionary with keys 'level', 'hit_points', 'bab',
+                  'Fort', 'Ref' and 'Will'
+        '''
+        if self._totals is None:
+            totals = {'level': 0, 'hit_points': 0, 'bab': 0,
+                      'Fort': 0, 'Ref': 0, 'Will': 0}
+            for instance in self.classes.values():
+                totals['level'] += instance.level
+                totals['hit_points'] += instance.hit_points
+                totals['bab'] += instance.bab
+                for key in instance.saves.keys():
+                    totals[key] += instance.saves[key]
+            self._totals = totals
+        return self._totals
+    
     def get_template_values(self):
         '''Retrieves a dictionary of values for use with string.Template
         
+        The values are calculated once and then reused until the level of
+        one of the character's classes changes.
+        
+        :returns: dictionary of values for use with string.Template
+        '''
+        if self._template_vals is None:
+            self._template_vals = self.__calculate_template_values()
+        return dict(self._template_vals)
+    
+    def __calculate_template_values(self):
+        '''Calculates the values returned by get_template_values()
+        
         :returns: dictionary of values for use with string.Template
         '''
         template_vals = {'name' : self.name, 'NAME' : self.name.upper()}
@@ -97,6 +151,15 @@ class PFCharacter(object):
             # collect LaTeX display-related values
             display_classes.append(instance.name + ' ' + str(instance.level))
         
+        # add values that combine all classes
+        totals = self.get_totals()
+        template_vals['level'] = totals['level']
+        template_vals['total_hit_points'] = totals['hit_points']
+        template_vals['total_bab'] = totals['bab']
+        template_vals['total_fort'] = totals['Fort']
+        template_vals['total_ref'] = totals['Ref']
+        template_vals['total_will'] = totals['Will']
+        
         # add LaTeX display-related values to template_vals dictionary
         if len(self.classes.keys()) > 1:
             template_vals['display_classes'] = ", ".join(display_classes)
@@ -104,3 +167,15 @@ class PFCharacter(object):
             template_vals['display_classes'] = display_classes[0]
         
         return template_vals
+    
+    def set_level(self, class_name, level):
+        '''Changes the number of levels this character has in a class
+        
+        :param class_name: name of one of this character's classes
+        :param level: new number of levels in the class
+        '''
+        instance = self.classes[class_name]
+        self.classes[class_name] = PFClassInstance(instance.pf_class, level)
+        # derived values must be recalculated
+        self._totals = None
+        self._template_vals = None
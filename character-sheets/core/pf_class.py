@@ -3,29 +3,195 @@
 
 import json
 
+from collections import namedtuple
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from dice import compile_dice
+
+
+__all__ = ['PFClass', 'PFLevel', 'ReadOnlyDict']
+
+
+try:
+    STRING_TYPES = (basestring,)
+except NameError:
+    STRING_TYPES = (str,)
+NUMBER_TYPES = (int, float)
+
+# keys required in class JSON files and the types of their values
+SCHEMA = {
+    'name': STRING_TYPES,
+    'restrictions': (dict,),
+    'hit-die': (int,),
+    'base-attack': NUMBER_TYPES,
+    'saves': (dict,),
+    'skills': (list,),
+    'skills-per-level': (int,),
+    'starting-wealth': (list,),
+    'advancement': (list,),
+}
+SAVES = ['Fort', 'Ref', 'Will']
+# number of levels in each class's progression table
+MAX_LEVEL = 20
+
+
+# The values of a class at a particular level. "bab" is the base attack
+#   bonus rounded down, "saves" maps each of SAVES to its base save bonus
+#   and "features" holds every class feature gained at or before the level.
+PFLevel = namedtuple('PFLevel',
+                     ['level', 'hit_points', 'bab', 'saves', 'features'])
+
+
+def validate(json_dict, file_name='<class>'):
+    '''Checks that a dictionary of class data matches SCHEMA
+    
+    :param json_dict: class data loaded from JSON
+    :param file_name: name of the file the data was loaded from
+    :raises ValueError: if the class data is not valid
+    '''
+    for key in sorted(SCHEMA.keys()):
+        if key not in json_dict:
+            raise ValueError('%s: missing key "%s"' % (file_name, key))
+        if not isinstance(json_dict[key], SCHEMA[key]):
+            raise ValueError('%s: "%s" has the wrong type' % (file_name, key))
+    if sorted(json_dict['saves'].keys()) != sorted(SAVES):
+        raise ValueError('%s: "saves" must contain %s' %
+                         (file_name, ', '.join(SAVES)))
+    if not all(isinstance(x, list) for x in json_dict['advancement']):
+        raise ValueError('%s: "advancement" must be a list of lists' %
+                         file_name)
+
+
+class ReadOnlyDict(Mapping):
+    '''Class representing a dictionary whose items can not be changed,
+    used for the values of PFClass objects shared between characters'''
+    
+    def __init__(self, *args, **kwargs):
+        '''Constructs ReadOnlyDict objects, with the same arguments as
+        dict(...), storing list values as tuples
+        '''
+        items = dict(*args, **kwargs)
+        for key, value in items.items():
+            if isinstance(value, list):
+                items[key] = tuple(value)
+        self._items = items
+    
+    def __getitem__(self, key):
+        return self._items[key]
+    
+    def __iter__(self):
+        return iter(self._items)
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def __repr__(self):
+        return 'ReadOnlyDict(%r)' % self._items
+
 
 class PFClass(object):
-    '''Class representing a character class from the Pathfinder RPG'''
+    '''Class representing a character class from the Pathfinder RPG
+    
+    PFClass objects are immutable so that a single object can be shared
+    by every character with levels in the class: attributes can not be
+    rebound, and dictionaries such as "saves" and "restrictions", as well
+    as the "saves" of each PFLevel, are ReadOnlyDict objects.'''
     
-    def __init__(self, file_name):
+    def __init__(self, file_name=None, json_dict=None):
         '''Constructs PFClass objects
         
         :param file_name: path to the JSON file for this class
+        :param json_dict: class data already loaded from JSON, used
+                          instead of reading file_name
         '''
-        json_dict = json.load(open(file_name, 'r'))
+        if json_dict is None:
+            with open(file_name, 'r') as json_file:
+                json_dict = json.load(json_file)
+        validate(json_dict, file_name or '<class>')
         # -populate class members-
         self.name = json_dict['name']
-        self.restrictions = json_dict['restrictions']
+        self.restrictions = ReadOnlyDict(json_dict['restrictions'])
         self.hit_die = json_dict['hit-die']
         self.base_attack = json_dict['base-attack']
-        self.saves = json_dict['saves']
-        self.skills = json_dict['skills']
+        self.saves = ReadOnlyDict(json_dict['saves'])
+        self.skills = tuple(json_dict['skills'])
         self.skills_per_level = json_dict['skills-per-level']
-        self.starting_wealth = json_dict['starting-wealth'];
-        self.advancement = json_dict['advancement']
+        self.starting_wealth = tuple(json_dict['starting-wealth'])
+        # the first entry of starting wealth that can be rolled, if any
+        self.starting_wealth_dice = None
+        for x in self.starting_wealth:
+            try:
+                self.starting_wealth_dice = compile_dice(x)
+                break
+            except ValueError:
+                continue
+        self.advancement = tuple(tuple(x) for x in json_dict['advancement'])
+        # precompute the values of this class at levels 1 through MAX_LEVEL
+        self.progression = tuple(self._calculate_level(x)
+                                 for x in range(1, MAX_LEVEL + 1))
+        self._frozen = True
     
     def __repr__(self):
         return self.name
     
+    def _calculate_level(self, level):
+        '''Calculates the values of this class at a particular level
+        
+        :param level: number of levels invested in this class
+        :returns: a PFLevel object
+        '''
+        # calculate hit points
+        if level == 1:
+            hit_points = self.hit_die
+        else:
+            hp_per_level = (self.hit_die // 2) + 1
+            hit_points = self.hit_die + (hp_per_level * (level - 1))
+        # calculate saving throws
+        saves = {}
+        for key in self.saves.keys():
+            if self.saves[key] == 1:
+                saves[key] = 2 + (level // 2)
+            else:
+                saves[key] = level // 3
+        # collect class features from every level up to this one
+        features = []
+        for x in self.advancement[:level]:
+            features.extend(x)
+        # calculate base attack bonus, rounding fractional bonuses down
+        bab = int(self.base_attack * level)
+        return PFLevel(level, hit_points, bab, ReadOnlyDict(saves),
+                       tuple(features))
+    
+    def get_level(self, level):
+        '''Gets the values of this class at a particular level
+        
+        :param level: number of levels invested in this class
+        :returns: a PFLevel object
+        '''
+        if 1 <= level <= len(self.progression):
+            return self.progression[level - 1]
+        return self._calculate_level(level)
+    
+    def get_hit_dice(self, level):
+        '''Gets the dice rolled for the hit points of this class at a 
+        particular level, with maximum hit points at 1st level
+        
+        :param level: number of levels invested in this class
+        :returns: a DiceExpression object, e.g. "10+4d10" at 5th level
+        '''
+        text = str(self.hit_die)
+        if level > 1:
+            text = '%s+%dd%d' % (text, level - 1, self.hit_die)
+        return compile_dice(text)
+    
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError('PFClass objects are immutable')
+        object.__setattr__(self, name, value)
+    
     def __str__(self):
         return self.name
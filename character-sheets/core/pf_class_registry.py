@@ -0,0 +1,118 @@
+'''A module containing a class for loading every Pathfinder RPG class
+definition once and sharing the resulting PFClass objects.'''
+
+
+import glob
+import json
+import os
+
+from pf_class import PFClass
+from profiling import section
+
+
+__all__ = ['PFClassRegistry', 'load_registry']
+
+
+CLASS_DIR = "res/json/class/"
+JSON_EXTENSION = ".json"
+
+
+# PFClassRegistry objects that have already been loaded, keyed by source
+_REGISTRY_CACHE = {}
+
+
+def load_registry(class_dir=CLASS_DIR, bundle=None):
+    '''Gets the PFClassRegistry for a directory of class JSON files or a
+    class bundle, loading it only the first time it is requested
+
+    :param class_dir: directory containing class JSON files
+    :param bundle: optional path to a bundle written by write_bundle(...),
+                   used instead of class_dir
+    :returns: a PFClassRegistry object
+    '''
+    key = bundle or class_dir
+    if key not in _REGISTRY_CACHE:
+        with section('class load'):
+            if bundle is not None:
+                _REGISTRY_CACHE[key] = PFClassRegistry.from_bundle(bundle)
+            else:
+                _REGISTRY_CACHE[key] = PFClassRegistry(class_dir)
+    return _REGISTRY_CACHE[key]
+
+
+class PFClassRegistry(object):
+    '''Class representing every character class available to characters,
+    keyed by the name of each class's JSON file (e.g. "FIGHTER")'''
+
+    def __init__(self, class_dir=CLASS_DIR):
+        '''Constructs PFClassRegistry objects
+
+        :param class_dir: directory containing class JSON files
+        '''
+        self.source = class_dir
+        self._data = {}
+        self._classes = {}
+        pattern = os.path.join(class_dir, '*' + JSON_EXTENSION)
+        for file_name in sorted(glob.glob(pattern)):
+            key = os.path.basename(file_name)[:-len(JSON_EXTENSION)]
+            with open(file_name, 'r') as json_file:
+                self._add(key, json.load(json_file), file_name)
+
+    def __contains__(self, key):
+        return key in self._classes
+
+    def __len__(self):
+        return len(self._classes)
+
+    def _add(self, key, json_dict, file_name):
+        '''Validates class data and creates its PFClass object
+
+        :param key: name used to look up the class
+        :param json_dict: class data loaded from JSON
+        :param file_name: name of the file the data was loaded from
+        '''
+        self._data[key] = json_dict
+        self._classes[key] = PFClass(file_name, json_dict)
+
+    @classmethod
+    def from_bundle(cls, file_name):
+        '''Constructs a PFClassRegistry from a single bundle file
+
+        :param file_name: path to a bundle written by write_bundle(...)
+        :returns: a PFClassRegistry object
+        '''
+        registry = cls.__new__(cls)
+        registry.source = file_name
+        registry._data = {}
+        registry._classes = {}
+        with open(file_name, 'r') as bundle_file:
+            bundle = json.load(bundle_file)
+        for key in sorted(bundle.keys()):
+            registry._add(key, bundle[key], '%s[%s]' % (file_name, key))
+        return registry
+
+    def get(self, key):
+        '''Gets the shared PFClass object for a class
+
+        :param key: name of the class's JSON file, without extension
+        :returns: a PFClass object
+        '''
+        if key not in self._classes:
+            raise KeyError('unknown class "%s" in %s' % (key, self.source))
+        return self._classes[key]
+
+    def keys(self):
+        '''Gets the names of every class in this registry
+
+        :returns: sorted list of class names
+        '''
+        return sorted(self._classes.keys())
+
+    def write_bundle(self, file_name):
+        '''Writes every class in this registry to a single JSON file that
+        can be loaded faster than the individual class files
+
+        :param file_name: the name of the output file
+        '''
+        with open(file_name, 'w') as bundle_file:
+            json.dump(self._data, bundle_file, sort_keys=True)
@@ -0,0 +1,151 @@
+'''A module containing functions for profiling scripts with cProfile and,
+where available, tracemalloc, and for timing labelled sections of code.
+
+Sections are labelled with the section(...) context manager, which does
+nothing unless profiling has been started with enable(...).
+'''
+
+
+import cProfile
+import pstats
+import time
+
+from contextlib import contextmanager
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+__all__ = ['Profiler', 'enable', 'section']
+
+
+# --- Constants ---
+# number of functions and allocation sites listed in a report
+REPORT_LIMIT = 40
+
+
+# Profiler started by enable(...), None when profiling is disabled
+_PROFILER = None
+
+
+# --- Functions ---
+def enable(trace_memory=True):
+    '''Starts profiling the current process
+
+    :param trace_memory: if True, memory allocations are also traced
+                         with tracemalloc, when it is available
+    :returns: the started Profiler object
+    '''
+    global _PROFILER
+    _PROFILER = Profiler(trace_memory)
+    _PROFILER.start()
+    return _PROFILER
+
+
+@contextmanager
+def section(label):
+    '''Times a labelled section of code if profiling is enabled
+
+    :param label: name of the section, e.g. 'fetch'
+    '''
+    if _PROFILER is None:
+        yield
+    else:
+        with _PROFILER.section(label):
+            yield
+
+
+# --- Classes ---
+class Profiler(object):
+    '''Class for collecting cProfile data, memory allocations and the
+    time spent in labelled sections of code'''
+
+    def __init__(self, trace_memory=True):
+        '''Constructs Profiler objects
+
+        :param trace_memory: if True, memory allocations are also traced
+                             with tracemalloc, when it is available
+        '''
+        self.profile = cProfile.Profile()
+        self.trace_memory = trace_memory and tracemalloc is not None
+        # maps labels to [number of entries, seconds, bytes allocated]
+        self.sections = {}
+        self._snapshot = None
+
+    @contextmanager
+    def section(self, label):
+        '''Times a labelled section of code
+
+        Time spent in nested sections is counted in each section. Only 
+        the thread that started the Profiler is profiled, since sheets
+        are generated by a single thread while profiling.
+
+        :param label: name of the section, e.g. 'fetch'
+        '''
+        start_memory = 0
+        if self.trace_memory:
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.time()
+        try:
+            yield
+        finally:
+            seconds = time.time() - start
+            size = 0
+            if self.trace_memory:
+                size = tracemalloc.get_traced_memory()[0] - start_memory
+            stats = self.sections.setdefault(label, [0, 0.0, 0])
+            stats[0] = stats[0] + 1
+            stats[1] = stats[1] + seconds
+            stats[2] = stats[2] + size
+
+    def start(self):
+        '''Starts collecting profiling data'''
+        if self.trace_memory:
+            tracemalloc.start()
+        self.profile.enable()
+
+    def stop(self):
+        '''Stops collecting profiling data'''
+        self.profile.disable()
+        if self.trace_memory:
+            self._snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+    def write_report(self, file_prefix, sort_key='cumulative'):
+        '''Writes the collected profiling data to two files:
+        <file_prefix>.prof, which holds the raw cProfile data and can be
+        loaded by tools such as snakeviz, and <file_prefix>.txt, a report
+        of labelled sections, functions and memory allocations
+
+        :param file_prefix: path of the output files without extensions
+        :param sort_key: pstats key used to sort functions in the report
+        :returns: tuple of the paths of the two files
+        '''
+        prof_path = file_prefix + '.prof'
+        report_path = file_prefix + '.txt'
+        self.profile.dump_stats(prof_path)
+
+        report_file = open(report_path, 'w')
+        # labelled sections, slowest first
+        report_file.write('%-24s %10s %12s %14s\n' %
+                          ('section', 'calls', 'seconds', 'bytes'))
+        labels = sorted(self.sections.keys(),
+                        key=lambda x: self.sections[x][1], reverse=True)
+        for label in labels:
+            calls, seconds, size = self.sections[label]
+            report_file.write('%-24s %10d %12.3f %14d\n' %
+                              (label, calls, seconds, size))
+        report_file.write('\n')
+        # functions
+        stats = pstats.Stats(self.profile, stream=report_file)
+        stats.sort_stats(sort_key).print_stats(REPORT_LIMIT)
+        # memory allocations
+        if self._snapshot is not None:
+            report_file.write('top memory allocations by line:\n')
+            top = self._snapshot.statistics('lineno')[:REPORT_LIMIT]
+            for stat in top:
+                report_file.write('%s\n' % stat)
+        report_file.close()
+        return prof_path, report_path
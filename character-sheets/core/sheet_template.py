@@ -0,0 +1,312 @@
+'''A module containing a class for representing a LaTeX character sheet
+template whose files are loaded and compiled once and then rendered for
+any number of characters.'''
+
+
+import json
+import os
+import shutil
+
+from string import Template
+
+from profiling import section
+
+
+__all__ = ['LAYOUTS', 'SheetTemplate', 'load_template', 'read_manifest']
+
+
+TEMPLATE_DIR = 'template/Character Sheet'
+# files in the template directory that contain placeholder values
+TEMPLATE_FILES = [
+    '/main.tex',
+    '/character.tex',
+    '/res/latex/class/class1.tex',
+    '/res/latex/stats/defense.tex',
+    '/res/latex/stats/offense.tex',
+]
+# files in the template directory that are renamed for each character
+OUTPUT_NAMES = {
+    '/character.tex': '/${name}.tex',
+    '/res/latex/class/class1.tex': '/res/latex/class/${class1}.tex',
+    '/res/latex/class-features/display/class1.tex':
+        '/res/latex/class-features/display/${class1}.tex',
+}
+
+
+# file in each character sheet directory recording the values it was
+#   rendered with, used to update the sheet when those values change
+MANIFEST_FILE = '.sheet-values.json'
+
+
+# Ways of placing static files in a character sheet directory
+LAYOUT_COPY = 'copy'            # copy each file
+LAYOUT_HARDLINK = 'hardlink'    # hard link each file to the template
+LAYOUT_SYMLINK = 'symlink'      # symbolic link each file to the template
+LAYOUTS = [LAYOUT_COPY, LAYOUT_HARDLINK, LAYOUT_SYMLINK]
+
+
+# SheetTemplate objects that have already been loaded, keyed by directory
+_TEMPLATE_CACHE = {}
+
+
+def load_template(template_dir=TEMPLATE_DIR):
+    '''Gets the SheetTemplate object for a template directory, loading
+    the template only the first time it is requested
+
+    :param template_dir: directory containing the character sheet template
+    :returns: a SheetTemplate object
+    '''
+    if template_dir not in _TEMPLATE_CACHE:
+        _TEMPLATE_CACHE[template_dir] = SheetTemplate(template_dir)
+    return _TEMPLATE_CACHE[template_dir]
+
+
+def read_manifest(dest_path):
+    '''Reads the values a character sheet directory was rendered with
+
+    :param dest_path: directory of the character sheet
+    :returns: dictionary of values, None if the directory has no manifest
+    '''
+    manifest_path = os.path.join(dest_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, 'r') as manifest_file:
+        return json.load(manifest_file)
+
+
+def _write_manifest(dest_path, values):
+    '''Records the values a character sheet directory was rendered with
+
+    :param dest_path: directory of the character sheet
+    :param values: dictionary structured according to string.Template
+    '''
+    manifest_path = os.path.join(dest_path, MANIFEST_FILE)
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(values, manifest_file, indent=2, sort_keys=True)
+
+
+def _place_file(src_path, dest_path, layout=LAYOUT_COPY):
+    '''Places a static file in a character sheet directory, falling back
+    to copying the file if it can not be linked (e.g. when the template
+    and destination are on different file systems)
+    
+    :param src_path: path of the file in the template directory
+    :param dest_path: path of the file in the character sheet directory
+    :param layout: one of LAYOUTS
+    '''
+    try:
+        if layout == LAYOUT_HARDLINK:
+            os.link(src_path, dest_path)
+            return
+        if layout == LAYOUT_SYMLINK:
+            os.symlink(os.path.abspath(src_path), dest_path)
+            return
+    except (AttributeError, OSError):
+        pass
+    shutil.copy2(src_path, dest_path)
+
+
+def _find_placeholders(template, file_name):
+    '''Finds the names of all placeholders in a string.Template
+
+    :param template: a string.Template object
+    :param file_name: name of the file the template was read from
+    :returns: frozenset of placeholder names
+    '''
+    names = set()
+    for match in template.pattern.finditer(template.template):
+        if match.group('invalid') is not None:
+            line = template.template.count('\n', 0, match.start()) + 1
+            raise ValueError('invalid placeholder in %s, line %d' %
+                             (file_name, line))
+        name = match.group('named') or match.group('braced')
+        if name is not None:
+            names.add(name)
+    return frozenset(names)
+
+
+class SheetTemplate(object):
+    '''Class representing the files of a LaTeX character sheet template'''
+
+    def __init__(self, template_dir=TEMPLATE_DIR,
+                 template_files=TEMPLATE_FILES, output_names=OUTPUT_NAMES):
+        '''Constructs SheetTemplate objects
+
+        :param template_dir: directory containing the template
+        :param template_files: paths, relative to template_dir, of the
+                               files that contain placeholder values
+        :param output_names: dictionary mapping paths of files that are
+                             renamed for each character to templates of
+                             their new paths
+        '''
+        self.template_dir = template_dir
+        # compiled templates and their placeholders, keyed by file
+        self.templates = {}
+        self.placeholders = {}
+        for x in template_files:
+            with open(template_dir + x, 'r') as template_file:
+                template = Template(template_file.read())
+            self.templates[x] = template
+            self.placeholders[x] = _find_placeholders(template, x)
+        # templates of output file names, keyed by file
+        self.output_names = {}
+        required = set()
+        for x in output_names.keys():
+            template = Template(output_names[x])
+            self.output_names[x] = template
+            required.update(_find_placeholders(template, x))
+        # names of every value needed to render the template
+        for x in self.placeholders.values():
+            required.update(x)
+        self.required_values = frozenset(required)
+        # files that are copied without changes
+        self.static_files = []
+        for dir_path, _, file_names in os.walk(template_dir):
+            rel_dir = dir_path[len(template_dir):].replace(os.sep, '/')
+            for file_name in sorted(file_names):
+                rel_path = rel_dir + '/' + file_name
+                if rel_path not in self.templates:
+                    self.static_files.append(rel_path)
+        self.static_files.sort()
+
+    def copy_static_files(self, dest_path, values, layout=LAYOUT_COPY):
+        '''Copies or links every file without placeholder values to a
+        character sheet directory
+
+        Linked files are shared with the template directory, so editing
+        them in place changes the template and every other sheet.
+
+        :param dest_path: directory of the character sheet
+        :param values: dictionary structured according to string.Template
+        :param layout: one of LAYOUTS
+        '''
+        if layout not in LAYOUTS:
+            raise ValueError('unknown output layout: %s' % layout)
+        with section('copy'):
+            for x in self.static_files:
+                out_path = self.output_path(dest_path, x, values)
+                out_dir = os.path.dirname(out_path)
+                if not os.path.isdir(out_dir):
+                    os.makedirs(out_dir)
+                _place_file(self.template_dir + x, out_path, layout)
+
+    def output_path(self, dest_path, file_name, values):
+        '''Determines where a template file is written for a character
+
+        :param dest_path: directory of the character sheet
+        :param file_name: path of a file relative to the template directory
+        :param values: dictionary structured according to string.Template
+        :returns: path of the output file
+        '''
+        if file_name in self.output_names:
+            file_name = self.output_names[file_name].substitute(values)
+        return dest_path + file_name
+
+    def render(self, dest_path, values, layout=LAYOUT_COPY):
+        '''Creates a complete character sheet directory
+
+        :param dest_path: directory of the character sheet, which must
+                          not already exist
+        :param values: dictionary structured according to string.Template
+        :param layout: how static files are placed, one of LAYOUTS
+        '''
+        self.validate(values)
+        os.makedirs(dest_path)
+        self.copy_static_files(dest_path, values, layout)
+        self.render_files(dest_path, values)
+        _write_manifest(dest_path, values)
+
+    def render_files(self, dest_path, values):
+        '''Writes every file with placeholder values to a character sheet
+        directory
+
+        :param dest_path: directory of the character sheet
+        :param values: dictionary structured according to string.Template
+        '''
+        for x in self.templates.keys():
+            self.render_file(dest_path, x, values)
+
+    def render_file(self, dest_path, file_name, values):
+        '''Writes a single file with placeholder values to a character
+        sheet directory
+
+        :param dest_path: directory of the character sheet
+        :param file_name: path of a file relative to the template directory
+        :param values: dictionary structured according to string.Template
+        :returns: path of the output file
+        '''
+        with section('template render'):
+            out_path = self.output_path(dest_path, file_name, values)
+            out_dir = os.path.dirname(out_path)
+            if not os.path.isdir(out_dir):
+                os.makedirs(out_dir)
+            with open(out_path, 'w') as out_file:
+                out_file.write(self.templates[file_name].substitute(values))
+        return out_path
+
+    def update(self, dest_path, values, layout=LAYOUT_COPY):
+        '''Brings an existing character sheet directory up to date with
+        new values, rewriting only the files whose placeholders changed
+
+        Files whose output names depend on a changed value (e.g. <name>.tex)
+        are moved to their new names. A directory that does not exist yet
+        is created with render(...), and one without a manifest has all of
+        its files rewritten.
+
+        :param dest_path: directory of the character sheet
+        :param values: dictionary structured according to string.Template
+        :param layout: how missing static files are placed, one of LAYOUTS
+        :returns: list of paths of the files that were written
+        '''
+        if not os.path.isdir(dest_path):
+            self.render(dest_path, values, layout)
+            return sorted(self.output_path(dest_path, x, values)
+                          for x in self.templates.keys())
+        self.validate(values)
+        old_values = read_manifest(dest_path)
+        if old_values is None:
+            changed = self.required_values
+            old_values = values
+        else:
+            changed = set(x for x in self.required_values
+                          if old_values.get(x) != values[x])
+
+        # move static files whose names changed, placing any that are missing
+        for x in self.static_files:
+            out_path = self.output_path(dest_path, x, values)
+            old_path = self.output_path(dest_path, x, old_values)
+            if os.path.lexists(out_path):
+                continue
+            out_dir = os.path.dirname(out_path)
+            if not os.path.isdir(out_dir):
+                os.makedirs(out_dir)
+            if os.path.lexists(old_path):
+                os.rename(old_path, out_path)
+            else:
+                _place_file(self.template_dir + x, out_path, layout)
+
+        # rewrite files that use changed values or whose names changed
+        written = []
+        for x in self.templates.keys():
+            out_path = self.output_path(dest_path, x, values)
+            old_path = self.output_path(dest_path, x, old_values)
+            if old_path != out_path and os.path.exists(old_path):
+                os.remove(old_path)
+            elif changed.isdisjoint(self.placeholders[x]) and \
+                    os.path.exists(out_path):
+                continue
+            written.append(self.render_file(dest_path, x, values))
+
+        _write_manifest(dest_path, values)
+        return sorted(written)
+
+    def validate(self, values):
+        '''Checks that values exist for every placeholder in the template
+
+        :param values: dictionary structured according to string.Template
+        :raises KeyError: if any placeholder values are missing
+        '''
+        missing = self.required_values.difference(values)
+        if missing:
+            raise KeyError('missing template values: ' +
+                           ', '.join(sorted(missing)))
@@ -4,40 +4,161 @@ sheets in LaTeX'''
 
 import argparse
 import fileinput
+import glob
+import json
+import multiprocessing
 import os
-import shutil
+import sys
+import time
+import traceback
 
-from string import Template
+from collections import OrderedDict
 
-from core.pf_character import PFCharacter
+from core.pf_character import PFCharacter, load_character_json
+from core.pf_class_registry import CLASS_DIR, load_registry
+from core.profiling import enable as enable_profiling
+from core.sheet_template import LAYOUT_COPY, LAYOUTS, TEMPLATE_DIR
+from core.sheet_template import load_template
 
 
 __all__ = []
 
 
-# --- Constants ---
-TEMPLATE_FILES = [
-    '/main.tex', 
-    '/character.tex',
-    '/res/latex/class/class1.tex',
-    '/res/latex/stats/defense.tex',
-    '/res/latex/stats/offense.tex',
-]
+# Template shared by every character generated in a batch worker process
+_WORKER_TEMPLATE = None
 
 
-def generate_character(dest_path, char_path="default.json"):
+def _generate_worker(task):
+    '''Generates a single character sheet inside a batch worker process
+    
+    :param task: tuple of destination directory, output layout, update 
+                 flag, label and character data
+    :returns: tuple of label and error message, which is None on success
+    '''
+    dest_path, layout, update, label, char_dict = task
+    try:
+        generate_character(dest_path, char_dict=char_dict,
+                           template=_WORKER_TEMPLATE, layout=layout,
+                           update=update)
+    except Exception:
+        return label, traceback.format_exc()
+    return label, None
+
+
+def _init_worker(template):
+    '''Initializes a batch worker process
+    
+    :param template: a SheetTemplate object
+    '''
+    global _WORKER_TEMPLATE
+    _WORKER_TEMPLATE = template
+
+
+def generate_character(dest_path, char_path="default.json", char_dict=None,
+                       template=None, layout=LAYOUT_COPY, update=False):
     '''Generates a LaTeX project for a Pathfinder character sheet
     
     :param dest_path: destination directory for character sheet
     :param char_path: path to JSON file with Pathfinder character data
+    :param char_dict: character data already loaded from JSON, used 
+                      instead of reading char_path
+    :param template: SheetTemplate object, defaults to the loaded 
+                     template for TEMPLATE_DIR
+    :param layout: how static template files are placed in the output 
+                   directory, one of 'copy', 'hardlink' or 'symlink'
+    :param update: if True, an existing character sheet is updated in 
+                   place, rewriting only the files affected by changed 
+                   values, instead of being created from scratch
+    :returns: path to the generated character sheet
     '''
-    character = PFCharacter(char_path)
+    character = PFCharacter(char_path, char_dict)
+    if template is None:
+        template = load_template(TEMPLATE_DIR)
     
     # update the destination path string to reflect imported character vals
     dest_path = "%s/%s" % (dest_path, character.name)
     
-    shutil.copytree('template/Character Sheet', dest_path)
-    set_char_vals(dest_path, character.get_template_values())
+    if update:
+        template.update(dest_path, character.get_template_values(), layout)
+    else:
+        template.render(dest_path, character.get_template_values(), layout)
+    return dest_path
+
+
+def generate_characters(dest_path, source, processes=None, 
+                        layout=LAYOUT_COPY, update=False):
+    '''Generates LaTeX projects for many Pathfinder character sheets 
+    using a pool of worker processes
+    
+    The template and class data are loaded once, before the workers 
+    start, rather than once per character.
+    
+    :param dest_path: destination directory for character sheets
+    :param source: directory of JSON files or a JSONL file, with one
+                   character per file or line
+    :param processes: number of worker processes, defaults to CPU count;
+                      0 generates every character in the current process
+    :param layout: how static template files are placed in each output 
+                   directory, one of 'copy', 'hardlink' or 'symlink'
+    :param update: if True, existing character sheets are updated in place
+    :returns: list of (label, error message) tuples for failed characters
+    :raises ValueError: if characters share a name, since each sheet is
+                        written to a directory named after its character
+    '''
+    characters = list(load_characters(source))
+    # sheets of characters with the same name would be written to the same
+    #   directory by different workers at once
+    labels = {}
+    for label, char_dict in characters:
+        if 'name' in char_dict:
+            labels.setdefault(char_dict['name'], []).append(label)
+    duplicates = sorted(x for x in labels.keys() if len(labels[x]) > 1)
+    if duplicates:
+        raise ValueError('characters share a name: ' + '; '.join(
+            '%s (%s)' % (x, ', '.join(labels[x])) for x in duplicates))
+    
+    template = load_template(TEMPLATE_DIR)
+    # load class data before the worker processes are forked
+    load_registry(CLASS_DIR)
+    
+    tasks = ((dest_path, layout, update, label, char_dict) 
+             for label, char_dict in characters)
+    failures = []
+    if processes == 0:
+        _init_worker(template)
+        for label, error in (_generate_worker(x) for x in tasks):
+            if error is not None:
+                failures.append((label, error))
+        return failures
+    pool = multiprocessing.Pool(processes, _init_worker, (template,))
+    try:
+        for label, error in pool.imap_unordered(_generate_worker, tasks, 8):
+            if error is not None:
+                failures.append((label, error))
+    finally:
+        pool.close()
+        pool.join()
+    return failures
+
+
+def load_characters(source):
+    '''Reads character data from a directory of JSON files or from a 
+    JSONL file
+    
+    :param source: directory of JSON files or a JSONL file
+    :returns: generator of (label, dictionary of character data) tuples,
+              where label identifies the file or line the data came from
+    '''
+    if os.path.isdir(source):
+        for file_name in sorted(glob.glob(os.path.join(source, '*.json'))):
+            with open(file_name, 'r') as json_file:
+                yield file_name, load_character_json(json_file)
+    else:
+        with open(source, 'r') as jsonl_file:
+            for i, line in enumerate(jsonl_file):
+                if line.strip():
+                    yield '%s:%d' % (source, i + 1), json.loads(
+                        line, object_pairs_hook=OrderedDict)
 
 
 def parse_cmd_args():
@@ -56,41 +177,92 @@ def parse_cmd_args():
     parser.add_argument('--import', metavar='PATH',
                         help='imports character data from JSON file')
 
+    # -argument [optional]- generate many characters at once
+    parser.add_argument('--batch', metavar='PATH',
+                        help='generates a sheet for every character in a '
+                             'directory of JSON files or a JSONL file')
+
+    # -argument [optional]- number of processes used in batch mode
+    parser.add_argument('--processes', metavar='N', type=int,
+                        help='number of worker processes used by --batch')
+
+    # -argument [optional]- how static files are placed in the output
+    parser.add_argument('--layout', choices=LAYOUTS, default=LAYOUT_COPY,
+                        help='copy static template files (default) or link '
+                             'them to the template to save disk space and '
+                             'I/O; linked files must not be edited')
+
+    # -argument [optional]- update existing sheets in place
+    parser.add_argument('--update', action='store_true',
+                        help='updates existing sheets, rewriting only the '
+                             'files affected by changed character data')
+
+    # -argument [optional]- re-render a sheet whenever its JSON changes
+    parser.add_argument('--watch', action='store_true',
+                        help='updates the sheet each time the imported '
+                             'JSON file is saved; implies --update')
+
+    # -argument [optional]- profiling output
+    parser.add_argument('--profile', metavar='PREFIX',
+                        help='profiles generation, writing PREFIX.prof and '
+                             'a sorted report to PREFIX.txt; --batch runs '
+                             'in a single process while profiling')
+
     # parse command line arguments
     args = vars(parser.parse_args())
     
     return args
 
 
-def set_char_vals(char_path, char_vals):
-    '''Replaces placeholder values in character sheet template with those that
-    describe a particular character
+def watch_character(dest_path, char_path, layout=LAYOUT_COPY, interval=0.5):
+    '''Updates a character sheet each time its JSON file is modified, 
+    until interrupted
+    
+    Errors in the JSON file are reported and the sheet is left as it was,
+    so that the file can be fixed and saved again.
+    
+    :param dest_path: destination directory for character sheet
+    :param char_path: path to JSON file with Pathfinder character data
+    :param layout: how static template files are placed in the output 
+                   directory, one of 'copy', 'hardlink' or 'symlink'
+    :param interval: seconds between checks of the JSON file
+    '''
+    template = load_template(TEMPLATE_DIR)
+    last_mtime = None
+    try:
+        while True:
+            mtime = os.stat(char_path).st_mtime
+            if mtime != last_mtime:
+                last_mtime = mtime
+                try:
+                    sheet_path = generate_character(dest_path, char_path, 
+                                                    template=template,
+                                                    layout=layout, 
+                                                    update=True)
+                    sys.stdout.write('updated %s\n' % sheet_path)
+                except Exception:
+                    sys.stderr.write(traceback.format_exc())
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def set_char_vals(char_path, char_vals, template=None):
+    '''Writes the files of a character sheet template that contain 
+    placeholder values, replacing those values with ones that describe a 
+    particular character
+    
+    Each file is written directly to its final name, e.g. character.tex
+    is written as <name>.tex.
     
     :param char_path directory containing the character sheet
     :param char_vals dictionary structured according to string.Template 
+    :param template SheetTemplate object, defaults to the loaded template 
+                    for TEMPLATE_DIR
     '''
-    # replace placeholder values in character sheet template
-    for x in TEMPLATE_FILES:
-        # read file data
-        template_file = open(char_path + x, 'r')
-        template_data = template_file.read()
-        template_file.close()
-        # apply values to template
-        replace_text = Template(template_data).substitute(char_vals)
-        # write data to file
-        template_file = open(char_path + x, 'w')
-        template_file.write(replace_text)
-        template_file.close()
-    
-    # rename the character.tex to reflect the change in character name
-    os.rename('%s/character.tex' % char_path,
-              '%s/%s.tex' % (char_path, char_vals['name']))
-    # rename the class1.tex to reflect the change in character name
-    new_path_tuple = (char_path, char_vals['class1'])
-    os.rename('%s/res/latex/class/class1.tex' % char_path,
-              '%s/res/latex/class/%s.tex' % new_path_tuple)
-    os.rename('%s/res/latex/class-features/display/class1.tex' % char_path,
-              '%s/res/latex/class-features/display/%s.tex' % new_path_tuple)
+    if template is None:
+        template = load_template(TEMPLATE_DIR)
+    template.render_files(char_path, char_vals)
 
 
 # --- Script ---
@@ -98,8 +270,36 @@ if __name__ == '__main__':
     # parse command line arguments
     args = parse_cmd_args()
     
+    # start profiling, if requested
+    profiler = None
+    if args['profile'] is not None:
+        profiler = enable_profiling()
+        # worker processes are not profiled
+        args['processes'] = 0
+    
     # generate character
-    if args['import'] is not None:
-        generate_character(args['dest'], args['import'])
+    if args['batch'] is not None:
+        try:
+            failures = generate_characters(args['dest'], args['batch'],
+                                           args['processes'], args['layout'],
+                                           args['update'])
+        except ValueError as e:
+            sys.exit(str(e))
+        for label, error in failures:
+            sys.stderr.write('failed to generate %s\n%s\n' % (label, error))
+    elif args['watch']:
+        watch_character(args['dest'], args['import'] or 'default.json',
+                        args['layout'])
+    elif args['import'] is not None:
+        generate_character(args['dest'], args['import'], 
+                           layout=args['layout'], update=args['update'])
     else:
-        generate_character(args['dest'])
+        generate_character(args['dest'], layout=args['layout'],
+                           update=args['update'])
+    
+    # write profiling data
+    if profiler is not None:
+        profiler.stop()
+        profiler.write_report(args['profile'])
+    if args['batch'] is not None and failures:
+        sys.exit(1)
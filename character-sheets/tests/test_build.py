@@ -0,0 +1,92 @@
+'''A module that tests the incremental compilation of character sheets by
+the build module.'''
+
+
+import sys
+sys.path.append('..')
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import build
+
+
+# commands used in place of a TeX engine, which ignore their arguments
+ENGINE_OK = 'true'
+ENGINE_FAIL = 'false'
+
+
+class TestBuild(unittest.TestCase):
+    '''This class tests the validity of build.build_sheets(...) and
+    build.hash_sheet(...)'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name in ['Harsk', 'Kyra']:
+            self._write(name, build.MAIN_FILE, '\\input{%s}\n' % name)
+            self._write(name, name + '.tex', name + '\n')
+        # directories without a main.tex are not sheets
+        os.mkdir(os.path.join(self.directory, 'notes'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _build(self, engine=ENGINE_OK, force=False):
+        return build.build_sheets(self.directory, engine, 2, force)
+
+    def _write(self, sheet, file_name, text):
+        sheet_path = os.path.join(self.directory, sheet)
+        if not os.path.isdir(sheet_path):
+            os.mkdir(sheet_path)
+        with open(os.path.join(sheet_path, file_name), 'w') as out_file:
+            out_file.write(text)
+
+    def test_incremental(self):
+        '''Checks that only sheets that changed since their last
+        successful build are compiled'''
+        report = self._build()
+        self.assertEqual(report['built'], ['Harsk', 'Kyra'])
+        self.assertEqual(report['skipped'], [])
+        self.assertEqual(sorted(report['times'].keys()), ['Harsk', 'Kyra'])
+        self.assertEqual(self._build()['skipped'], ['Harsk', 'Kyra'])
+        self._write('Kyra', 'Kyra.tex', 'Kyra, again\n')
+        report = self._build()
+        self.assertEqual(report['built'], ['Kyra'])
+        self.assertEqual(report['skipped'], ['Harsk'])
+        self.assertEqual(self._build(force=True)['built'], ['Harsk', 'Kyra'])
+        # the report is also written next to the sheets
+        report_path = os.path.join(self.directory, build.REPORT_FILE)
+        with open(report_path, 'r') as report_file:
+            self.assertEqual(json.load(report_file)['built'],
+                             ['Harsk', 'Kyra'])
+
+    def test_failures(self):
+        '''Checks that failed sheets are reported and compiled again'''
+        report = self._build(ENGINE_FAIL)
+        self.assertEqual(report['built'], [])
+        self.assertEqual([x['sheet'] for x in report['failed']],
+                         ['Harsk', 'Kyra'])
+        self.assertEqual(self._build()['built'], ['Harsk', 'Kyra'])
+        # a missing engine is reported as a failure of each sheet
+        report = self._build('no-such-tex-engine', force=True)
+        self.assertEqual([x['returncode'] for x in report['failed']],
+                         [-1, -1])
+
+    def test_hash_sheet(self):
+        '''Checks that build outputs and the values manifest do not change
+        the hash of a sheet'''
+        sheet_path = os.path.join(self.directory, 'Kyra')
+        digest = build.hash_sheet(sheet_path)
+        self._write('Kyra', 'main.pdf', 'output')
+        self._write('Kyra', 'main.log', 'output')
+        self._write('Kyra', build.VALUES_FILE, '{}')
+        self.assertEqual(build.hash_sheet(sheet_path), digest)
+        self._write('Kyra', 'Kyra.tex', 'Kyra, again\n')
+        self.assertNotEqual(build.hash_sheet(sheet_path), digest)
+
+
+if __name__ == '__main__':
+    unittest.main()
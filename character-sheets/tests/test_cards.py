@@ -0,0 +1,117 @@
+'''A module that tests the generation of creature stat cards by the
+cards module.'''
+
+
+import sys
+sys.path.append('..')
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import cards
+
+
+COLUMNS = ['id', 'name', 'CR', 'is_3pp'] + cards.STAT_COLUMNS
+# name, CR, hp; CR values may be numbers or strings of the form 'CR X'
+CREATURES = [
+    ('Troll', 'CR 10', 63),
+    ('Ogre', 3, 30),
+    ('Lemure', 'CR 0.5', 13),
+    ('Akata', 1, 19),
+    ('Dretch', 'CR 1', 18),
+    ('Broken', 'CR ?', 1),
+]
+# 3rd party creatures, in the same form
+CREATURES_3PP = [
+    ('Biba Lurker', 2, 22),
+]
+
+
+class TestCards(unittest.TestCase):
+    '''This class tests the validity of cards.iter_card_values(...) and
+    cards.generate_cards(...)'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = os.path.join(self.directory, 'creature.db')
+        connection = sqlite3.connect(self.db)
+        connection.execute('create table creatures (id integer primary key, '
+                           'name varchar(45), CR, is_3pp integer, %s)' %
+                           ', '.join(x + ' integer'
+                                     for x in cards.STAT_COLUMNS))
+        query = 'insert into creatures (%s) values (%s)' % \
+            (', '.join(COLUMNS), ', '.join('?' for _ in COLUMNS))
+        for i, (name, cr, hp) in enumerate(CREATURES + CREATURES_3PP):
+            stats = [hp] + [10] * (len(cards.STAT_COLUMNS) - 1)
+            is_3pp = int(i >= len(CREATURES))
+            connection.execute(query, [i + 1, name, cr, is_3pp] + stats)
+        for content, is_3pp in [('standard', 0), ('3pp', 1)]:
+            connection.execute('create view %s as select * from creatures '
+                               'where is_3pp = %d' %
+                               (cards.CONTENT_VIEWS[content], is_3pp))
+        connection.commit()
+        connection.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _names(self, *args, **kwargs):
+        values = cards.iter_card_values(self.db, *args, **kwargs)
+        return [x['name'] for x in values]
+
+    def test_order(self):
+        '''Checks that cards are ordered by numeric CR, then by name'''
+        self.assertEqual(self._names(batch_size=2),
+                         ['Lemure', 'Akata', 'Dretch', 'Ogre', 'Troll'])
+
+    def test_filters(self):
+        '''Checks that CR ranges and names are filtered by the query'''
+        self.assertEqual(self._names(1, 3), ['Akata', 'Dretch', 'Ogre'])
+        self.assertEqual(self._names(min_cr=3), ['Ogre', 'Troll'])
+        self.assertEqual(self._names(max_cr=0.5), ['Lemure'])
+        self.assertEqual(self._names(name='re'), ['Lemure', 'Dretch', 'Ogre'])
+        self.assertEqual(self._names(name='%'), [])
+
+    def test_content(self):
+        '''Checks that packs only contain standard creatures unless 3rd
+        party content is requested'''
+        self.assertEqual(self._names(2, 2, content='3pp'), ['Biba Lurker'])
+        self.assertEqual(self._names(1, 2, content='all'),
+                         ['Akata', 'Dretch', 'Biba Lurker'])
+        # databases created before creatures were tagged have no views
+        connection = sqlite3.connect(self.db)
+        connection.execute('drop view creatures_3pp')
+        connection.close()
+        with self.assertRaises(ValueError):
+            self._names(content='3pp')
+
+    def test_values(self):
+        '''Checks the template values of a card'''
+        values = next(cards.iter_card_values(self.db, max_cr=0.5))
+        self.assertEqual(values['card_id'], 'creature-3')
+        self.assertEqual(values['cr'], '1/2')
+        self.assertEqual(values['hp'], '13')
+        self.assertEqual(values['Fort'], '+10')
+
+    def test_generate_cards(self):
+        '''Checks that a pack contains one card for each creature'''
+        cwd = os.getcwd()
+        os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              '..'))
+        try:
+            dest = os.path.join(self.directory, 'pack')
+            count = cards.generate_cards(dest, self.db, min_cr=1)
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(count, 4)
+        self.assertEqual(len(os.listdir(os.path.join(dest, 'cards'))), 4)
+        with open(os.path.join(dest, 'main.tex'), 'r') as main_file:
+            main = main_file.read()
+        self.assertTrue(main.index('creature-4') < main.index('creature-1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+'''A module that tests the batch generation of character sheets by the
+creator module.'''
+
+
+import sys
+sys.path.append('..')
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import creator
+
+
+# directory containing creator.py, whose templates and class files are
+#   found relative to the working directory
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+CHARACTERS = [
+    {'name': 'Valeros', 'classes': {'FIGHTER': 3}},
+    {'name': 'Harsk', 'classes': {'RANGER': 2}},
+    {'name': 'Kyra', 'classes': {'FIGHTER': 1, 'RANGER': 1}},
+]
+
+
+class TestCreator(unittest.TestCase):
+    '''This class tests the validity of creator.load_characters(...) and
+    creator.generate_characters(...)'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.dest = os.path.join(self.directory, 'sheets')
+        self.cwd = os.getcwd()
+        os.chdir(SCRIPT_DIR)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def _write_jsonl(self, characters):
+        path = os.path.join(self.directory, 'party.jsonl')
+        with open(path, 'w') as jsonl_file:
+            for character in characters:
+                jsonl_file.write(json.dumps(character) + '\n')
+            # blank lines are skipped
+            jsonl_file.write('\n')
+        return path
+
+    def test_load_characters(self):
+        '''Checks that characters are read from JSON files and JSONL lines
+        with labels naming their source'''
+        json_dir = os.path.join(self.directory, 'json')
+        os.mkdir(json_dir)
+        for character in CHARACTERS:
+            path = os.path.join(json_dir, character['name'] + '.json')
+            with open(path, 'w') as json_file:
+                json.dump(character, json_file)
+        labels = [os.path.basename(x[0])
+                  for x in creator.load_characters(json_dir)]
+        self.assertEqual(labels, ['Harsk.json', 'Kyra.json', 'Valeros.json'])
+
+        jsonl_path = self._write_jsonl(CHARACTERS)
+        characters = list(creator.load_characters(jsonl_path))
+        self.assertEqual([x[0] for x in characters],
+                         [jsonl_path + ':%d' % (i + 1) for i in range(3)])
+        self.assertEqual([x[1]['name'] for x in characters],
+                         ['Valeros', 'Harsk', 'Kyra'])
+
+    def test_generate_characters(self):
+        '''Checks that every character in a batch gets a sheet, with and
+        without worker processes'''
+        jsonl_path = self._write_jsonl(CHARACTERS)
+        for processes in [0, 2]:
+            dest = os.path.join(self.dest, str(processes))
+            failures = creator.generate_characters(dest, jsonl_path,
+                                                   processes)
+            self.assertEqual(failures, [])
+            self.assertEqual(sorted(os.listdir(dest)),
+                             ['Harsk', 'Kyra', 'Valeros'])
+            for character in CHARACTERS:
+                name = character['name']
+                self.assertTrue(os.path.exists(
+                    os.path.join(dest, name, name + '.tex')))
+
+    def test_failures(self):
+        '''Checks that characters that can not be generated are reported
+        without stopping the rest of the batch'''
+        characters = CHARACTERS + [{'name': 'Ezren',
+                                    'classes': {'WIZARD': 1}}]
+        jsonl_path = self._write_jsonl(characters)
+        failures = creator.generate_characters(self.dest, jsonl_path, 2)
+        self.assertEqual([x[0] for x in failures], [jsonl_path + ':4'])
+        self.assertTrue('WIZARD' in failures[0][1])
+        self.assertEqual(sorted(os.listdir(self.dest)),
+                         ['Harsk', 'Kyra', 'Valeros'])
+
+    def test_duplicate_names(self):
+        '''Checks that a batch with characters that share a name is
+        rejected before any sheet is written'''
+        characters = CHARACTERS + [{'name': 'Harsk',
+                                    'classes': {'FIGHTER': 1}}]
+        jsonl_path = self._write_jsonl(characters)
+        with self.assertRaises(ValueError) as context:
+            creator.generate_characters(self.dest, jsonl_path, 2)
+        self.assertTrue(jsonl_path + ':2' in str(context.exception))
+        self.assertTrue(jsonl_path + ':4' in str(context.exception))
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_update(self):
+        '''Checks that a batch can update the sheets it generated'''
+        jsonl_path = self._write_jsonl(CHARACTERS)
+        creator.generate_characters(self.dest, jsonl_path, 0)
+        characters = [dict(x) for x in CHARACTERS]
+        characters[0]['classes'] = {'FIGHTER': 4}
+        jsonl_path = self._write_jsonl(characters)
+        failures = creator.generate_characters(self.dest, jsonl_path, 2,
+                                               update=True)
+        self.assertEqual(failures, [])
+        tex_path = os.path.join(self.dest, 'Valeros', 'Valeros.tex')
+        with open(tex_path, 'r') as tex_file:
+            self.assertTrue('\\characterlevel{4}' in tex_file.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+'''A module that tests the parsing, analysis and rolling of dice
+expressions by the core.dice module.'''
+
+
+import sys
+sys.path.append('..')
+
+import unittest
+
+from fractions import Fraction
+
+from core.dice import DiceExpression, compile_dice
+
+
+class TestDice(unittest.TestCase):
+    '''This class tests the validity of core.dice.DiceExpression and
+    core.dice.compile_dice(...)'''
+
+    def test_parse(self):
+        '''Checks that dice, constants, multipliers and units are parsed'''
+        dice = DiceExpression('5d6 x 10 gp')
+        self.assertEqual(dice.dice, ((5, 6, 1),))
+        self.assertEqual(dice.multiplier, 10)
+        self.assertEqual(dice.unit, 'gp')
+        dice = DiceExpression('2d8+4')
+        self.assertEqual((dice.dice, dice.constant), (((2, 8, 1),), 4))
+        dice = DiceExpression('1d6 - 1d4')
+        self.assertEqual(dice.dice, ((1, 6, 1), (1, 4, -1)))
+
+    def test_parse_errors(self):
+        '''Checks that malformed expressions raise ValueError'''
+        for text in ['', 'outfit worth 10 gp or less', 'd0', '2d', '5d6 x',
+                     '2d8++4', '1d6 gp sp']:
+            with self.assertRaises(ValueError):
+                DiceExpression(text)
+
+    def test_min_max_mean(self):
+        '''Checks the lowest, highest and expected values of expressions'''
+        for text, low, high, mean in [('5d6 x 10 gp', 50, 300, 175),
+                                      ('2d8+4', 6, 20, 13),
+                                      ('1d6-1d4', -3, 5, 1),
+                                      ('3', 3, 3, 3),
+                                      ('1d2+1d3', 2, 5, Fraction(7, 2))]:
+            dice = DiceExpression(text)
+            self.assertEqual((dice.min, dice.max), (low, high), text)
+            self.assertEqual(dice.mean(), mean, text)
+
+    def test_distribution(self):
+        '''Checks that distributions are exact and sum to 1'''
+        for text in ['5d6 x 10 gp', '2d8+4', '1d6-1d4', '3', '1d20']:
+            dice = DiceExpression(text)
+            distribution = dice.distribution()
+            self.assertEqual(sum(x[1] for x in distribution), 1, text)
+            values = [x[0] for x in distribution]
+            self.assertEqual(values, sorted(values), text)
+            self.assertEqual((values[0], values[-1]), (dice.min, dice.max))
+            self.assertEqual(sum(x * p for x, p in distribution),
+                             dice.mean(), text)
+        dice = DiceExpression('2d6')
+        self.assertEqual(dict(dice.distribution())[7], Fraction(1, 6))
+        self.assertEqual(dice.cdf(3), Fraction(1, 12))
+        self.assertEqual(dice.cdf(1), 0)
+        self.assertEqual(dice.cdf(12), 1)
+
+    def test_roll_many(self):
+        '''Checks that seeded rolls have the requested size, stay within
+        the expression's range and are repeatable'''
+        dice = DiceExpression('1d6-1d4')
+        values = dice.roll_many(1000, seed=1)
+        self.assertEqual(len(values), 1000)
+        if hasattr(values, 'shape'):
+            self.assertEqual(values.shape, (1000,))
+        self.assertTrue(dice.min <= min(values))
+        self.assertTrue(max(values) <= dice.max)
+        self.assertEqual(list(dice.roll_many(1000, seed=1)), list(values))
+        values = DiceExpression('5d6 x 10 gp').roll_many(1000, seed=2)
+        self.assertEqual(set(x % 10 for x in values), set([0]))
+        self.assertTrue(50 <= min(values) and max(values) <= 300)
+
+    def test_compile_dice(self):
+        '''Checks that expressions are only parsed once'''
+        dice = compile_dice('2d8+4')
+        self.assertTrue(compile_dice('2d8+4') is dice)
+        self.assertEqual(str(dice), '2d8+4')
+        with self.assertRaises(ValueError):
+            compile_dice('2d8 +')
+
+
+if __name__ == '__main__':
+    unittest.main()
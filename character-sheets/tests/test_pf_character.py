@@ -0,0 +1,64 @@
+'''A module that tests the stats of multiclass characters calculated by
+the core.pf_character module.'''
+
+
+import sys
+sys.path.append('..')
+
+import unittest
+
+from collections import OrderedDict
+
+from core.pf_character import PFCharacter
+from core.pf_class_registry import PFClassRegistry
+
+
+REGISTRY = PFClassRegistry('../res/json/class/')
+
+
+def _make_character(*classes):
+    '''Creates a PFCharacter with levels in the given (class, level)
+    pairs, in order'''
+    json_dict = OrderedDict([('name', 'Kyra'),
+                             ('classes', OrderedDict(classes))])
+    return PFCharacter(json_dict=json_dict, registry=REGISTRY)
+
+
+class TestPFCharacter(unittest.TestCase):
+    '''This class tests the validity of core.pf_character.PFCharacter'''
+
+    def test_totals(self):
+        '''Checks that stats are added up across every class'''
+        character = _make_character(('RANGER', 2), ('FIGHTER', 3))
+        self.assertEqual(character.get_totals(),
+                         {'level': 5, 'hit_points': 38, 'bab': 5,
+                          'Fort': 6, 'Ref': 4, 'Will': 1})
+        values = character.get_template_values()
+        self.assertEqual(values['level'], 5)
+        self.assertEqual(values['total_hit_points'],
+                         values['class1_hit_points'] +
+                         values['class2_hit_points'])
+        self.assertEqual(values['total_fort'], 6)
+
+    def test_class_order(self):
+        '''Checks that classes are numbered in the order they are listed'''
+        values = _make_character(('RANGER', 2),
+                                 ('FIGHTER', 3)).get_template_values()
+        self.assertEqual(values['class1'], 'ranger')
+        self.assertEqual(values['class2'], 'fighter')
+        self.assertEqual(values['display_classes'], 'ranger 2, fighter 3')
+        values = _make_character(('FIGHTER', 3)).get_template_values()
+        self.assertEqual(values['display_classes'], 'fighter 3')
+
+    def test_set_level(self):
+        '''Checks that totals are recalculated when a level changes'''
+        character = _make_character(('RANGER', 2), ('FIGHTER', 3))
+        character.get_template_values()
+        character.set_level('fighter', 5)
+        self.assertEqual(character.get_totals()['level'], 7)
+        self.assertEqual(character.get_totals()['bab'], 7)
+        self.assertEqual(character.get_template_values()['class2_level'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
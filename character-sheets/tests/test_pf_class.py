@@ -0,0 +1,62 @@
+'''A module that tests the progression tables of the core.pf_class
+module.'''
+
+
+import sys
+sys.path.append('..')
+
+import json
+import unittest
+
+from core.pf_class import PFClass
+
+
+def _make_class(**values):
+    '''Creates a PFClass from the fighter's JSON file, replacing some of
+    its values'''
+    with open('../res/json/class/FIGHTER.json', 'r') as json_file:
+        json_dict = json.load(json_file)
+    json_dict.update(values)
+    return PFClass(json_dict=json_dict)
+
+
+class TestPFClass(unittest.TestCase):
+    '''This class tests the validity of core.pf_class.PFClass'''
+
+    def test_bab(self):
+        '''Checks that fractional base attack bonuses are rounded down'''
+        rogue = _make_class(**{'base-attack': 0.75})
+        self.assertEqual([rogue.get_level(x).bab for x in range(1, 9)],
+                         [0, 1, 2, 3, 3, 4, 5, 6])
+        wizard = _make_class(**{'base-attack': 0.5})
+        self.assertEqual([wizard.get_level(x).bab for x in range(1, 5)],
+                         [0, 1, 1, 2])
+        # levels outside of the precomputed table are rounded too
+        self.assertEqual(rogue.get_level(25).bab, 18)
+        self.assertTrue(isinstance(rogue.get_level(25).bab, int))
+
+    def test_saves(self):
+        '''Checks base save bonuses at several levels'''
+        fighter = _make_class()
+        self.assertEqual(dict(fighter.get_level(1).saves),
+                         {'Fort': 2, 'Ref': 0, 'Will': 0})
+        self.assertEqual(dict(fighter.get_level(6).saves),
+                         {'Fort': 5, 'Ref': 2, 'Will': 2})
+
+    def test_immutable(self):
+        '''Checks that neither a class nor its dictionaries can be changed'''
+        fighter = _make_class(restrictions={'alignment': ['lawful']})
+        with self.assertRaises(AttributeError):
+            fighter.hit_die = 12
+        with self.assertRaises(TypeError):
+            fighter.saves['Fort'] = 0
+        with self.assertRaises(TypeError):
+            fighter.restrictions['alignment'] = []
+        self.assertEqual(fighter.restrictions['alignment'], ('lawful',))
+        with self.assertRaises(TypeError):
+            fighter.get_level(3).saves['Will'] = 10
+        self.assertEqual(fighter.get_level(3).saves['Will'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+'''A module that tests the loading of class definitions by the
+core.pf_class_registry module.'''
+
+
+import sys
+sys.path.append('..')
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.pf_class_registry import PFClassRegistry, load_registry
+
+
+CLASS_DIR = '../res/json/class/'
+
+
+class TestPFClassRegistry(unittest.TestCase):
+    '''This class tests the validity of
+    core.pf_class_registry.PFClassRegistry'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get(self):
+        '''Checks that classes are keyed by file name and shared'''
+        registry = PFClassRegistry(CLASS_DIR)
+        self.assertEqual(registry.keys(), ['FIGHTER', 'RANGER'])
+        self.assertEqual(len(registry), 2)
+        self.assertTrue('FIGHTER' in registry)
+        self.assertEqual(registry.get('RANGER').name, 'ranger')
+        self.assertTrue(registry.get('FIGHTER') is registry.get('FIGHTER'))
+        with self.assertRaises(KeyError):
+            registry.get('WIZARD')
+
+    def test_load_registry(self):
+        '''Checks that a registry is loaded once per directory'''
+        self.assertTrue(load_registry(CLASS_DIR) is load_registry(CLASS_DIR))
+
+    def test_bundle(self):
+        '''Checks that a bundle holds the same classes as the directory it
+        was written from'''
+        registry = PFClassRegistry(CLASS_DIR)
+        bundle_path = os.path.join(self.directory, 'classes.json')
+        registry.write_bundle(bundle_path)
+        bundled = load_registry(bundle=bundle_path)
+        self.assertEqual(bundled.keys(), registry.keys())
+        for key in registry.keys():
+            expected = registry.get(key)
+            actual = bundled.get(key)
+            self.assertEqual(actual.name, expected.name)
+            self.assertEqual(actual.get_level(5), expected.get_level(5))
+
+    def test_validate(self):
+        '''Checks that invalid class files are rejected when loaded'''
+        with open(os.path.join(CLASS_DIR, 'FIGHTER.json'), 'r') as json_file:
+            json_dict = json.load(json_file)
+        del json_dict['hit-die']
+        with open(os.path.join(self.directory, 'BROKEN.json'), 'w') as \
+                json_file:
+            json.dump(json_dict, json_file)
+        with self.assertRaises(ValueError):
+            PFClassRegistry(self.directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
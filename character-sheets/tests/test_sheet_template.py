@@ -0,0 +1,135 @@
+'''A module that tests the rendering of character sheet templates by the
+core.sheet_template module.'''
+
+
+import sys
+sys.path.append('..')
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from core import sheet_template
+from core.sheet_template import SheetTemplate
+
+
+# files of a small template, keyed by path relative to the template
+TEMPLATE = {
+    '/main.tex': '\\input{${name}}\n',
+    '/character.tex': '\\def \\charactername{${name}}\n',
+    '/stats.tex': '\\def \\hitpoints{${hp}}\n',
+    '/res/paper.jpg': 'not really a jpeg',
+}
+TEMPLATE_FILES = ['/main.tex', '/character.tex', '/stats.tex']
+OUTPUT_NAMES = {'/character.tex': '/${name}.tex'}
+
+
+class TestSheetTemplate(unittest.TestCase):
+    '''This class tests the validity of core.sheet_template.SheetTemplate'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.template_dir = os.path.join(self.directory, 'template')
+        self._write_template(TEMPLATE)
+        self.dest = os.path.join(self.directory, 'sheet')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _load(self):
+        return SheetTemplate(self.template_dir, TEMPLATE_FILES, OUTPUT_NAMES)
+
+    def _read(self, file_name):
+        with open(self.dest + file_name, 'r') as out_file:
+            return out_file.read()
+
+    def _write_template(self, files):
+        for file_name in files.keys():
+            path = self.template_dir + file_name
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as template_file:
+                template_file.write(files[file_name])
+
+    def test_load(self):
+        '''Checks the placeholders and static files found in a template'''
+        template = self._load()
+        self.assertEqual(template.required_values, frozenset(['name', 'hp']))
+        self.assertEqual(template.placeholders['/stats.tex'],
+                         frozenset(['hp']))
+        self.assertEqual(template.static_files, ['/res/paper.jpg'])
+        # invalid placeholders are found when the template is loaded
+        self._write_template({'/stats.tex': '$ 5\n'})
+        with self.assertRaises(ValueError):
+            self._load()
+
+    def test_load_template(self):
+        '''Checks that the character sheet template is loaded once'''
+        template_dir = '../' + sheet_template.TEMPLATE_DIR
+        template = sheet_template.load_template(template_dir)
+        self.assertTrue(sheet_template.load_template(template_dir) is
+                        template)
+        self.assertTrue('/character.tex' in template.templates)
+
+    def test_render(self):
+        '''Checks that rendered files are written to their final names'''
+        self._load().render(self.dest, {'name': 'Kyra', 'hp': 12})
+        self.assertEqual(self._read('/main.tex'), '\\input{Kyra}\n')
+        self.assertEqual(self._read('/Kyra.tex'),
+                         '\\def \\charactername{Kyra}\n')
+        self.assertEqual(self._read('/stats.tex'), '\\def \\hitpoints{12}\n')
+        self.assertEqual(self._read('/res/paper.jpg'), 'not really a jpeg')
+        self.assertFalse(os.path.exists(self.dest + '/character.tex'))
+        self.assertEqual(sheet_template.read_manifest(self.dest),
+                         {'name': 'Kyra', 'hp': 12})
+
+    def test_layouts(self):
+        '''Checks that static files are copied or linked to the template,
+        while rendered files are always written'''
+        template = self._load()
+        values = {'name': 'Kyra', 'hp': 12}
+        paper_path = self.template_dir + '/res/paper.jpg'
+        for layout in sheet_template.LAYOUTS:
+            dest = os.path.join(self.directory, layout)
+            template.render(dest, values, layout)
+            out_path = dest + '/res/paper.jpg'
+            self.assertEqual(os.path.islink(out_path),
+                             layout == sheet_template.LAYOUT_SYMLINK)
+            self.assertEqual(os.path.samefile(out_path, paper_path),
+                             layout != sheet_template.LAYOUT_COPY)
+            self.assertFalse(os.path.islink(dest + '/Kyra.tex'))
+        with self.assertRaises(ValueError):
+            template.render(self.dest, values, 'move')
+
+    def test_update(self):
+        '''Checks that only files using changed values are rewritten, and
+        that files are moved when their names change'''
+        template = self._load()
+        # sheets that do not exist yet are rendered
+        written = template.update(self.dest, {'name': 'Kyra', 'hp': 12})
+        self.assertEqual(len(written), 3)
+        written = template.update(self.dest, {'name': 'Kyra', 'hp': 14})
+        self.assertEqual(written, [self.dest + '/stats.tex'])
+        self.assertEqual(self._read('/stats.tex'), '\\def \\hitpoints{14}\n')
+        written = template.update(self.dest, {'name': 'Ezren', 'hp': 14})
+        self.assertEqual(written, [self.dest + '/Ezren.tex',
+                                   self.dest + '/main.tex'])
+        self.assertFalse(os.path.exists(self.dest + '/Kyra.tex'))
+        self.assertEqual(sheet_template.read_manifest(self.dest),
+                         {'name': 'Ezren', 'hp': 14})
+        # sheets without a manifest have every file rewritten
+        os.remove(os.path.join(self.dest, sheet_template.MANIFEST_FILE))
+        written = template.update(self.dest, {'name': 'Ezren', 'hp': 14})
+        self.assertEqual(len(written), 3)
+
+    def test_missing_values(self):
+        '''Checks that missing values are reported before anything is
+        written'''
+        with self.assertRaises(KeyError):
+            self._load().render(self.dest, {'name': 'Kyra'})
+        self.assertFalse(os.path.exists(self.dest))
+
+
+if __name__ == '__main__':
+    unittest.main()
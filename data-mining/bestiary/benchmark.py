@@ -0,0 +1,234 @@
+'''This module contains a script for benchmarking the crawler, the
+d20pfsrd builder, CreatureDB and its exports offline, using a synthetic
+Bestiary generated by the synthetic module'''
+
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from lxml.html import parse
+
+import crawler
+import synthetic
+from core.builders.creature.d20pfsrd import build as d20_build
+from core.profiling import enable as enable_profiling
+from db.creatureDB import CreatureDB
+
+
+__all__ = []
+
+
+# --- Constants ---
+# Stages of the benchmark, in the order they are run
+STAGES = ['generate', 'parse', 'crawl', 'load', 'export']
+
+
+# --- Functions ---
+def _timed(results, label, count, function, *args):
+    '''Calls a function, recording how long it takes
+
+    :param results: list of (label, count, seconds) tuples to add to
+    :param label: name of the benchmark
+    :param count: number of items processed by the function
+    :param function: the function to call
+    :returns: the value returned by the function
+    '''
+    start = time.time()
+    value = function(*args)
+    results.append((label, count, time.time() - start))
+    return value
+
+
+def _parse_pages(links):
+    '''Builds a Creature object from each page in a list, in the
+    current thread
+
+    :param links: paths of creature pages
+    '''
+    for link in links:
+        d20_build(parse(link).getroot())
+
+
+def _read_links(file_name):
+    '''Gets the links listed in a file written by
+    synthetic.write_site(...)
+
+    :param file_name: path of INDEX.txt or INDEX_SPECIAL.txt
+    :returns: list of links
+    '''
+    with open(file_name, 'r') as list_file:
+        return [x for x in list_file.read().split('\n') if x]
+
+
+def parse_cmd_args():
+    '''Parses command line arguments
+
+    :returns map data structure containing each argument and associated value
+    '''
+    # create parser for command line arguments
+    help_desc = 'Benchmarks the crawler and database with synthetic data'
+    parser = argparse.ArgumentParser(description=help_desc)
+    # -argument- number of creatures
+    parser.add_argument('--count', metavar='N', type=int, default=10000,
+                        help='number of creature pages and .csv rows '
+                             '(default: 10000)')
+    # -argument- seed of the random number generator
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the random number generator')
+    # -argument- fraction of duplicate creatures
+    parser.add_argument('--duplicate-rate', type=float, default=0.01,
+                        help='fraction of creatures that copy another')
+    # -argument- stages to run
+    parser.add_argument('--stages', nargs='+', choices=STAGES,
+                        default=STAGES, metavar='STAGE',
+                        help='stages to run, from: ' + ', '.join(STAGES))
+    # -argument- number of crawler threads
+    parser.add_argument('--workers', metavar='N', type=int,
+                        default=crawler.FETCH_WORKERS,
+                        help='number of threads that read pages in a crawl')
+    # -argument- working directory
+    parser.add_argument('--dir',
+                        help='directory for generated files, which is kept; '
+                             'a temporary directory is used by default')
+    # -argument- profiling output
+    parser.add_argument('--profile', metavar='PREFIX',
+                        help='profiles the benchmark, writing PREFIX.prof '
+                             'and a sorted report to PREFIX.txt')
+    # parse command line arguments
+    args = vars(parser.parse_args())
+
+    return args
+
+
+def run(directory, count, seed=0, duplicate_rate=0.01, stages=STAGES,
+        workers=crawler.FETCH_WORKERS):
+    '''Runs the stages of the benchmark
+
+    The generate stage writes count creature pages and a .csv file of
+    count other creatures. The parse stage builds a Creature from every
+    page in a single thread, the crawl stage adds every page to a
+    CreatureDB with crawler.crawl(...), the load stage adds every row of
+    the .csv file to a CreatureDB and the export stage exports the
+    CreatureDB of the load stage, or of the crawl stage if the load
+    stage is not run.
+
+    :param directory: directory for generated files
+    :param count: number of creature pages and of .csv rows
+    :param seed: seed of the random number generator
+    :param duplicate_rate: fraction of creatures that copy another
+    :param stages: names of the stages to run, from STAGES
+    :param workers: number of threads that read pages in a crawl
+    :returns: list of (label, count, seconds) tuples
+    '''
+    results = []
+    site_dir = os.path.join(directory, 'site')
+    csv_file = os.path.join(directory, 'CREATURES_SPECIAL.csv')
+    db_file = None
+
+    # generated files are always needed by the other stages, but are
+    #   only written once for a directory passed with --dir
+    if 'generate' in stages or not os.path.isdir(site_dir):
+        if os.path.isdir(site_dir):
+            shutil.rmtree(site_dir)
+        os.makedirs(site_dir)
+        creatures = synthetic.iter_creatures(count, seed, 0,
+                                             duplicate_rate=duplicate_rate)
+        _timed(results, 'generate pages', count, synthetic.write_site,
+               site_dir, creatures)
+        creatures = synthetic.iter_creatures(count, seed + 1, count,
+                                             duplicate_rate=duplicate_rate)
+        _timed(results, 'generate csv', count, synthetic.write_csv,
+               csv_file, creatures)
+    indeces = _read_links(os.path.join(site_dir, 'INDEX.txt'))
+    special_links = _read_links(os.path.join(site_dir, 'INDEX_SPECIAL.txt'))
+
+    if 'parse' in stages:
+        links = list(crawler.iter_crawl_links(indeces, special_links,
+                                              crawler.MODE_ALL))
+        _timed(results, 'parse pages', len(links), _parse_pages, links)
+
+    if 'crawl' in stages:
+        db_file = os.path.join(directory, 'crawl.db')
+        if os.path.exists(db_file):
+            os.remove(db_file)
+        db_conn = CreatureDB(db_file)
+        crawler.THIRD_PARTY_PUBLISHERS = synthetic.THIRD_PARTY_PUBLISHERS
+        links = crawler.iter_crawl_links(indeces, special_links,
+                                         crawler.MODE_ALL)
+        failures = _timed(results, 'crawl', count, crawler.crawl, db_conn,
+                          links, crawler.MODE_ALL, workers)
+        for link, error in failures:
+            sys.stderr.write('failed to add %s\n%s\n' % (link, error))
+        db_conn.commit_and_close()
+
+    if 'load' in stages:
+        db_file = os.path.join(directory, 'load.db')
+        if os.path.exists(db_file):
+            os.remove(db_file)
+        db_conn = CreatureDB(db_file)
+        _timed(results, 'load csv', count,
+               crawler.create_db_entries_from_csv, db_conn, csv_file)
+        db_conn.commit_and_close()
+
+    if 'export' in stages and db_file is not None:
+        db_conn = CreatureDB(db_file)
+        rows = db_conn.connection.execute(
+            'select count(*) from creatures').fetchone()[0]
+        _timed(results, 'export csv', rows, db_conn.export_as_csv,
+               os.path.join(directory, 'creature.csv'))
+        _timed(results, 'export snapshot', rows, db_conn.export_as_snapshot,
+               os.path.join(directory, 'creature.snap'))
+        _timed(results, 'export columnar', rows, db_conn.export_as_columnar,
+               os.path.join(directory, 'creature.parquet'))
+        _timed(results, 'iter rows', rows,
+               lambda: sum(1 for _ in db_conn.iter_creatures()))
+        db_conn.commit_and_close()
+    return results
+
+
+def write_results(results, out_file=sys.stdout):
+    '''Writes a table of benchmark results
+
+    :param results: list of (label, count, seconds) tuples
+    :param out_file: file-like object to write the table to
+    '''
+    out_file.write('%-16s %10s %10s %12s\n' %
+                   ('stage', 'items', 'seconds', 'items/s'))
+    for label, count, seconds in results:
+        rate = count / seconds if seconds > 0 else float('inf')
+        out_file.write('%-16s %10d %10.3f %12.1f\n' %
+                       (label, count, seconds, rate))
+
+
+# --- Script ---
+if __name__ == '__main__':
+    # parse command line arguments
+    args = parse_cmd_args()
+
+    # start profiling, if requested
+    profiler = None
+    if args['profile']:
+        profiler = enable_profiling()
+
+    directory = args['dir']
+    if directory is None:
+        directory = tempfile.mkdtemp()
+    elif not os.path.isdir(directory):
+        os.makedirs(directory)
+    try:
+        results = run(directory, args['count'], args['seed'],
+                      args['duplicate_rate'], args['stages'],
+                      args['workers'])
+    finally:
+        if args['dir'] is None:
+            shutil.rmtree(directory)
+    write_results(results)
+
+    # write profiling data
+    if profiler is not None:
+        profiler.stop()
+        profiler.write_report(args['profile'])
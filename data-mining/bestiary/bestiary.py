@@ -0,0 +1,278 @@
+'''This module contains a command line interface for building, loading
+and inspecting a database of Pathfinder creatures
+
+Each subcommand imports the modules it needs when it is run, so that
+commands that do not crawl d20pfsrd.com do not load lxml or the lists
+used to filter crawled content, and start quickly:
+
+    bestiary.py index        write INDEX.txt and INDEX_SPECIAL.txt
+    bestiary.py crawl        build creature.db from d20pfsrd.com
+    bestiary.py ingest-csv   add the creatures in .csv files to a db
+    bestiary.py export       export a db as .csv, columnar or snapshot
+    bestiary.py stats        summarize the creatures in a db
+'''
+
+
+import argparse
+import os
+import sys
+
+
+__all__ = ['main']
+
+
+# --- Constants ---
+DB_NAME = 'creature.db'
+# Types of content, as in db.creatureDB.CONTENT_VIEWS
+CONTENT_TYPES = ['standard', '3pp', 'all']
+# Formats of exported files, and the default name of each file
+EXPORT_FILES = {
+    'columnar': 'creature.parquet',
+    'csv': 'creature.csv',
+    'snapshot': 'creature.snap',
+}
+
+
+# --- Functions ---
+def _open_db(args):
+    '''Opens the existing database named by the --db argument for 
+    reading, without creating or altering its tables
+
+    :param args: map of command line arguments
+    :returns: a read-only CreatureDB object
+    '''
+    if not os.path.exists(args['db']):
+        sys.exit('no such database: %s' % args['db'])
+    from db.creatureDB import CONTENT_VIEWS, CreatureDB
+    db_conn = CreatureDB(args['db'], read_only=True)
+    # databases created before creatures were tagged by content have no
+    #   views, which are only added when a database is written to
+    query = 'select count(*) from sqlite_master where name = ?'
+    cursor = db_conn.connection.execute(query, (CONTENT_VIEWS['3pp'],))
+    if not cursor.fetchone()[0]:
+        db_conn.connection.close()
+        sys.exit('%s was created by an older version; add creatures to it '
+                 'with ingest-csv or crawl to upgrade it' % args['db'])
+    return db_conn
+
+
+def crawl_command(args):
+    '''Builds a database by crawling d20pfsrd.com
+
+    :param args: map of command line arguments
+    :returns: exit status
+    '''
+    import crawler
+    crawler.load_filter_lists()
+    if args['base_url']:
+        crawler.BASE_URL = args['base_url'].rstrip('/')
+    cr_range = args['cr_range'] or (0.0, float('inf'))
+    failures = crawler.build_db(args['db'], cr_range, args['C'],
+                                args['content'], args['csv'],
+                                args['columnar'], args['workers'])
+    for link, error in failures:
+        sys.stderr.write('failed to add %s\n%s\n' % (link, error))
+    return 0
+
+
+def export_command(args):
+    '''Exports the creatures in a database
+
+    :param args: map of command line arguments
+    :returns: exit status
+    '''
+    file_name = args['output'] or EXPORT_FILES[args['format']]
+    db_conn = _open_db(args)
+    if args['format'] == 'csv':
+        db_conn.export_as_csv(file_name, args['content'])
+    elif args['format'] == 'columnar':
+        file_name = db_conn.export_as_columnar(file_name, args['content'])
+    else:
+        if args['content'] != 'all':
+            sys.exit('snapshots always contain all content')
+        db_conn.export_as_snapshot(file_name)
+    db_conn.connection.close()
+    sys.stdout.write('wrote %s\n' % file_name)
+    return 0
+
+
+def index_command(args):
+    '''Writes the lists of index pages and special creature pages
+
+    :param args: map of command line arguments
+    :returns: exit status
+    '''
+    import indexer
+    indexer.create_index_file(args['index'])
+    indexer.create_special_index_file(args['special'])
+    return 0
+
+
+def ingest_csv_command(args):
+    '''Adds the creatures in .csv files to a database, creating the
+    database if it does not exist
+
+    :param args: map of command line arguments
+    :returns: exit status
+    '''
+    from db.creatureDB import CreatureDB
+    from db.ingest import create_db_entries_from_csv
+    db_conn = CreatureDB(args['db'], args['C'])
+    if args['cr_range']:
+        db_conn.min_cr, db_conn.max_cr = args['cr_range']
+    count_query = 'select count(*) from creatures'
+    before = db_conn.connection.execute(count_query).fetchone()[0]
+    for file_name in args['files']:
+        create_db_entries_from_csv(db_conn, file_name, args['3pp'])
+    after = db_conn.connection.execute(count_query).fetchone()[0]
+    db_conn.commit_and_close()
+    sys.stdout.write('added %d creatures\n' % (after - before))
+    return 0
+
+
+def main(argv=None):
+    '''Runs a subcommand
+
+    :param argv: list of command line arguments, defaults to sys.argv
+    :returns: exit status
+    '''
+    args = parse_cmd_args(argv)
+
+    # start profiling, if requested
+    profiler = None
+    if args['profile']:
+        from core.profiling import enable as enable_profiling
+        profiler = enable_profiling()
+
+    status = args['command'](args)
+
+    # write profiling data
+    if profiler is not None:
+        profiler.stop()
+        profiler.write_report(args['profile'])
+    return status
+
+
+def parse_cmd_args(argv=None):
+    '''Parses command line arguments
+
+    :param argv: list of command line arguments, defaults to sys.argv
+    :returns map data structure containing each argument and associated value
+    '''
+    # arguments shared by every subcommand
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', default=DB_NAME,
+                        help='SQLite database file (default: %s)' % DB_NAME)
+    common.add_argument('--profile', metavar='PREFIX',
+                        help='profiles the command, writing PREFIX.prof and '
+                             'a sorted report to PREFIX.txt')
+
+    # create parser for command line arguments
+    help_desc = 'Builds and maintains a database of Pathfinder creatures'
+    parser = argparse.ArgumentParser(description=help_desc)
+    subparsers = parser.add_subparsers(title='commands')
+
+    # -command- index
+    index = subparsers.add_parser('index', parents=[common],
+                                  help='writes the lists of pages to crawl')
+    index.add_argument('--index', default='INDEX.txt',
+                       help='list of index pages (default: INDEX.txt)')
+    index.add_argument('--special', default='INDEX_SPECIAL.txt',
+                       help='list of special creature pages '
+                            '(default: INDEX_SPECIAL.txt)')
+    index.set_defaults(command=index_command)
+
+    # -command- crawl
+    crawl = subparsers.add_parser('crawl', parents=[common],
+                                  help='builds a database from d20pfsrd.com')
+    crawl.add_argument('-C', action='store_true',
+                       help='store CR values as strings, not integers')
+    crawl.add_argument('--cr-range', nargs=2, metavar=('MIN', 'MAX'),
+                       type=float, help='sets valid range of CR values')
+    crawl.add_argument('--content', choices=CONTENT_TYPES,
+                       default='standard',
+                       help='sets type of creatures exported to .csv; '
+                            'the db contains all types, see its views')
+    crawl.add_argument('--csv', default=EXPORT_FILES['csv'],
+                       help='name of the exported .csv file')
+    crawl.add_argument('--columnar', metavar='FILE',
+                       help='also exports creatures to a .parquet, .arrow '
+                            'or .npz file, as chosen by its extension')
+    crawl.add_argument('--workers', metavar='N', type=int, default=8,
+                       help='number of threads that download pages')
+    crawl.add_argument('--base-url', metavar='URL',
+                       help='downloads pages from URL instead of '
+                            'd20pfsrd.com, e.g. from mock_server.py')
+    crawl.set_defaults(command=crawl_command)
+
+    # -command- ingest-csv
+    ingest = subparsers.add_parser('ingest-csv', parents=[common],
+                                   help='adds the creatures in .csv files '
+                                        'to a database')
+    ingest.add_argument('files', nargs='+', metavar='FILE',
+                        help='.csv files in the format of '
+                             'CREATURES_SPECIAL.csv')
+    ingest.add_argument('--3pp', action='store_true',
+                        help='marks the creatures as 3rd party content')
+    ingest.add_argument('-C', action='store_true',
+                        help='store CR values as strings, not integers')
+    ingest.add_argument('--cr-range', nargs=2, metavar=('MIN', 'MAX'),
+                        type=float, help='sets valid range of CR values')
+    ingest.set_defaults(command=ingest_csv_command)
+
+    # -command- export
+    export = subparsers.add_parser('export', parents=[common],
+                                   help='exports the creatures in a database')
+    export.add_argument('--format', choices=sorted(EXPORT_FILES.keys()),
+                        default='csv', help='format of the exported file')
+    export.add_argument('--content', choices=CONTENT_TYPES, default='all',
+                        help='type of creatures to export')
+    export.add_argument('-o', '--output', metavar='FILE',
+                        help='name of the exported file')
+    export.set_defaults(command=export_command)
+
+    # -command- stats
+    stats = subparsers.add_parser('stats', parents=[common],
+                                  help='summarizes the creatures in a '
+                                       'database')
+    stats.set_defaults(command=stats_command)
+
+    # parse command line arguments
+    args = vars(parser.parse_args(argv))
+    if 'command' not in args:
+        parser.error('a command is required')
+
+    return args
+
+
+def stats_command(args):
+    '''Writes the number of creatures in a database by type of content
+    and by Challenge Rating (CR)
+
+    :param args: map of command line arguments
+    :returns: exit status
+    '''
+    from db.creatureDB import CONTENT_VIEWS
+    from db.values import to_cr
+    db_conn = _open_db(args)
+    connection = db_conn.connection
+    for content in CONTENT_TYPES:
+        query = 'select count(*) from ' + CONTENT_VIEWS[content]
+        count = connection.execute(query).fetchone()[0]
+        sys.stdout.write('%-10s %8d\n' % (content, count))
+    counts = {}
+    for cr, count in connection.execute(
+            'select CR, count(*) from creatures group by CR'):
+        cr = to_cr(cr)
+        counts[cr] = counts.get(cr, 0) + count
+    if counts:
+        sys.stdout.write('\n%-10s %8s\n' % ('CR', 'creatures'))
+    for cr in sorted(counts.keys()):
+        sys.stdout.write('%-10g %8d\n' % (cr, counts[cr]))
+    connection.close()
+    return 0
+
+
+# --- Script ---
+if __name__ == '__main__':
+    sys.exit(main())
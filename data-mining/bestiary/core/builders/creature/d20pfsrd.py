@@ -5,7 +5,9 @@ root HtmlElement objects related to d20pfsrd.com Bestiary pages'''
 import re
 import string
 
+from lxml.cssselect import CSSSelector
 from core.creature import Creature
+from core.profiling import section
 
 
 __all__ = ['build']
@@ -19,6 +21,14 @@ ATTRIBUTES = [
     'STATISTICS', 'Base', 'Atk', 'CMB', 'CMD', 'Feats', 'Skills'
 ]
 
+# Selectors compiled once, rather than each time a page is parsed
+CONTENT_SELECTOR = CSSSelector('.sites-canvas-main')
+HEADER_SELECTOR = CSSSelector('td.sites-layout-tile tr')
+
+# Headings that follow the STATISTICS section of a stat block, marking
+#   the end of the text needed to build a Creature
+STAT_BLOCK_END = ['SPECIAL ABILITIES', 'ECOLOGY']
+
 
 def _check_text_for_spaces(text, keywords, start=0):
     '''Checks text for spaces before and after certain keywords. If a 
@@ -52,7 +62,7 @@ def _format_creature_entry(entry):
     '''
     # handle unicode characters
     _entry = entry.replace(u'\xe2', u'-')
-    _entry = _entry.encode('ascii', 'ignore')
+    _entry = _remove_unicode(_entry)
     # massage text in some necessary ways
     _entry = _entry.replace('*', '')
     _entry = _entry.replace('flatfooted', 'flat-footed')
@@ -74,7 +84,7 @@ def _format_creature_name(name):
     :param name: a string containing an unformatted Creature name
     :returns: a formatted Creature name
     '''
-    new_name = name.encode('ascii', 'ignore')   # remove unicode chars
+    new_name = _remove_unicode(name)
     new_name = new_name.lower()
     # capitalize space-separated words
     new_name = string.capwords(new_name, ' ')
@@ -87,6 +97,38 @@ def _format_creature_name(name):
     return new_name
 
 
+def _get_stat_block_text(element):
+    '''Gets the text of the stat block of a Creature entry, from the
+    DEFENSE heading to the end of the STATISTICS section, without
+    reading the rest of the entry
+    
+    If the headings can not be found, all of the element's text is 
+    returned.
+    
+    :param element: HtmlElement containing a Creature entry
+    :returns: text of the stat block
+    '''
+    pieces = []
+    in_statistics = False
+    for text in element.itertext():
+        pieces.append(text)
+        if not in_statistics:
+            in_statistics = 'STATISTICS' in text
+        elif any(x in text for x in STAT_BLOCK_END):
+            break
+    text = ''.join(pieces)
+    # trim text before the DEFENSE section and after the STATISTICS section
+    start = max(text.find('DEFENSE'), 0)
+    statistics = text.find('STATISTICS', start)
+    if statistics < 0:
+        return text[start:]
+    ends = [text.find(x, statistics) for x in STAT_BLOCK_END]
+    ends = [x for x in ends if x >= 0]
+    if ends:
+        return text[start:min(ends)]
+    return text[start:]
+
+
 def _insert_text_into_text(orig_text, index, insert_text):
     '''Creates a new string by inserting one string into another at
     some specified index
@@ -99,6 +141,21 @@ def _insert_text_into_text(orig_text, index, insert_text):
     return "%s%s%s" % (orig_text[:index], insert_text, orig_text[index:])
 
 
+def _is_cr_in_range(creature, cr_range):
+    '''Determines whether or not a Creature's Challenge Rating (CR) is 
+    within a range, treating CR values that are not numbers as in range
+    
+    :param creature: Creature object with a CR value
+    :param cr_range: (min, max) tuple
+    :returns: True if the CR is within the range
+    '''
+    try:
+        creature_cr = float(creature.cr)
+    except ValueError:
+        return True
+    return cr_range[0] <= creature_cr <= cr_range[1]
+
+
 def _populate_ability_scores(words, creature):
     '''Populates a Creature object's ability score values using 
     the Creature's entry on d20pfsrd.com split into individual 
@@ -238,7 +295,7 @@ def _populate_from_header_values(root, creature):
     :param creature: Creature object to be populated
     '''
     # get html element with Creature's name and CR
-    info_element = root.cssselect('td.sites-layout-tile tr')
+    info_element = HEADER_SELECTOR(root)
     # get separate strings for the Creature's name and CR
     info_text = info_element[0].text_content()
     info_text = info_text.strip()
@@ -261,11 +318,12 @@ def _populate_from_entry_values(root, creature):
     :param creature: Creature object to be populated
     '''
     # get the page's Creature text
-    content = root.cssselect('.sites-canvas-main')
+    content = CONTENT_SELECTOR(root)
     content_element = content[0]
-    content_text = content_element.text_content()
+    content_text = _get_stat_block_text(content_element)
     # format Creature text such that it is easily parsable
-    content_text = _format_creature_entry(content_text)
+    with section('_format_creature_entry'):
+        content_text = _format_creature_entry(content_text)
     content_words = content_text.split(' ')
     # update all Creature values
     _populate_hp_and_hd(content_words, creature)
@@ -326,15 +384,33 @@ def _populate_saves(words, creature):
         creature.saves[key] = parsed_save
 
 
-def build(root):
+def _remove_unicode(text):
+    '''Returns copy of text without its non-ASCII characters, as a str on
+    both Python 2 and Python 3
+    
+    :param text: a unicode string
+    :returns: an ASCII str
+    '''
+    ascii_text = text.encode('ascii', 'ignore')
+    if not isinstance(ascii_text, str):
+        ascii_text = ascii_text.decode('ascii')
+    return ascii_text
+
+
+def build(root, cr_range=None):
     '''Creates a Creature object using data in root HtmlElement 
     of a Bestiary page from d20pfsrd.com
     
     :param root: root HtmlElement of d20pfsrd.com Bestiary page
-    :returns: a Creature object
+    :param cr_range: optional (min, max) tuple; if the Creature's CR is
+                     outside of this range, the rest of the page is not
+                     parsed
+    :returns: a Creature object, None if its CR is outside of cr_range
     '''
     creature = Creature()
     # populate Creature object with values
     _populate_from_header_values(root, creature)
+    if cr_range is not None and not _is_cr_in_range(creature, cr_range):
+        return None
     _populate_from_entry_values(root, creature)
     return creature
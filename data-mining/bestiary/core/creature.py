@@ -37,6 +37,9 @@ class Creature(object):
         self.bab = '0'
         self.cmb = '0'
         self.cmd = '0'
+        # content source
+        self.source = ''
+        self.is_3pp = False
         
     def __repr__(self):
         values = [
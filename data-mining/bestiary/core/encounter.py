@@ -0,0 +1,250 @@
+'''A module containing classes and functions for generating encounters
+from the creatures stored in a CreatureDB using the experience point
+(XP) budget rules of the Pathfinder RPG'''
+
+
+import random
+
+from collections import namedtuple
+
+from db.creatureDB import CONTENT_VIEWS
+from db.values import to_cr
+
+
+__all__ = [
+    'Encounter', 'EncounterGenerator', 'EncounterIndex',
+    'cr_to_xp', 'party_xp_budget'
+]
+
+
+# --- Constants ---
+# Offsets applied to a party's Average Party Level (APL) in order to
+#   obtain the CR of an encounter of the given difficulty
+DIFFICULTY_OFFSETS = {
+    'easy': -1, 'average': 0, 'challenging': 1, 'hard': 2, 'epic': 3
+}
+
+# XP awards for creatures with fractional Challenge Ratings, ordered
+#   from highest to lowest CR
+FRACTIONAL_XP = [
+    (1.0 / 2, 200), (1.0 / 3, 135), (1.0 / 4, 100),
+    (1.0 / 6, 65), (1.0 / 8, 50)
+]
+
+# Columns of the "creatures" table that encounters may be filtered on
+FILTER_COLUMNS = [
+    'hp', 'HD', 'ac', 'touch_ac', 'flatfooted_ac',
+    'Fort', 'Ref', 'Will',
+    'Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha',
+    'BAB', 'CMB', 'CMD'
+]
+
+
+# An encounter is a tuple of (id, name, CR) tuples and its total XP
+Encounter = namedtuple('Encounter', ['creatures', 'xp'])
+
+
+# --- Functions ---
+def cr_to_xp(cr):
+    '''Converts a Challenge Rating (CR) into the number of experience
+    points (XP) awarded for defeating a creature of that CR
+
+    :param cr: CR as a number or as a string such as '1/2', '0.16' or
+               'CR 3' (the form used when storing nominal CR values)
+    :returns: XP value for the given CR, 0 if the CR is not positive
+    :raises ValueError: if the value is not a CR (see db.values.to_cr)
+    '''
+    cr_value = to_cr(cr)
+    if cr_value <= 0:
+        return 0
+    # handle fractional CR values by choosing the nearest listed value
+    if cr_value < 1:
+        nearest = min(FRACTIONAL_XP, key=lambda x: abs(x[0] - cr_value))
+        return nearest[1]
+    # XP doubles every two Challenge Ratings: 400, 600, 800, 1200, ...
+    cr_int = int(round(cr_value))
+    base_xp = 400 if cr_int % 2 == 1 else 600
+    return base_xp * 2 ** ((cr_int - 1) // 2)
+
+
+def party_xp_budget(party_size, party_level, difficulty='average'):
+    '''Computes the XP budget of an encounter for a party
+
+    :param party_size: number of characters in the party
+    :param party_level: average level of the characters in the party
+    :param difficulty: one of the keys of DIFFICULTY_OFFSETS
+    :returns: total XP that the encounter's creatures should be worth
+    '''
+    if difficulty not in DIFFICULTY_OFFSETS:
+        raise ValueError('unknown encounter difficulty: %s' % difficulty)
+    # adjust Average Party Level (APL) for small and large parties
+    apl = int(round(party_level))
+    if party_size <= 3:
+        apl = apl - 1
+    elif party_size >= 6:
+        apl = apl + 1
+    encounter_cr = apl + DIFFICULTY_OFFSETS[difficulty]
+    # encounters below CR 1 use the fractional CR values: 1/2, 1/3, ...
+    if encounter_cr < 1:
+        index = min(-encounter_cr, len(FRACTIONAL_XP) - 1)
+        return FRACTIONAL_XP[index][1]
+    return cr_to_xp(encounter_cr)
+
+
+# --- Classes ---
+class EncounterIndex(object):
+    '''Class representing a precomputed mapping from XP values to the
+    creatures of a CreatureDB that are worth that many XP'''
+
+    def __init__(self, db_conn, filters=None, content='standard'):
+        '''Constructs EncounterIndex objects
+
+        :param db_conn: an open CreatureDB
+        :param filters: optional dictionary mapping names of columns in
+                        FILTER_COLUMNS to (min, max) tuples, where
+                        either bound may be None
+        :param content: type of creatures to include, one of the keys of
+                        db.creatureDB.CONTENT_VIEWS
+        '''
+        # maps XP values to lists of creature ids
+        self.buckets = {}
+        # maps creature ids to (id, name, CR) tuples
+        self.creatures = {}
+
+        where_clause, values = self._construct_where_clause(filters)
+        query = 'select id, name, CR from %s%s' % (CONTENT_VIEWS[content],
+                                                   where_clause)
+        cursor = db_conn.connection.cursor()
+        for row in cursor.execute(query, values):
+            xp = cr_to_xp(row[2])
+            # creatures without a CR can not be part of an encounter
+            if xp == 0:
+                continue
+            self.creatures[row[0]] = tuple(row)
+            self.buckets.setdefault(xp, []).append(row[0])
+
+        # distinct XP values, ordered from highest to lowest
+        self.xp_values = sorted(self.buckets.keys(), reverse=True)
+
+    def __len__(self):
+        return len(self.creatures)
+
+    @staticmethod
+    def _construct_where_clause(filters):
+        '''Constructs a SQL "where" clause from a dictionary of filters
+
+        :param filters: dictionary mapping column names to (min, max)
+        :returns: tuple of the clause and its parameter values
+        '''
+        if not filters:
+            return '', ()
+        conditions = []
+        values = []
+        for column in sorted(filters.keys()):
+            if column not in FILTER_COLUMNS:
+                raise ValueError('cannot filter on column: %s' % column)
+            min_value, max_value = filters[column]
+            if min_value is not None:
+                conditions.append('%s >= ?' % column)
+                values.append(min_value)
+            if max_value is not None:
+                conditions.append('%s <= ?' % column)
+                values.append(max_value)
+        if not conditions:
+            return '', ()
+        return ' where ' + ' and '.join(conditions), tuple(values)
+
+
+class EncounterGenerator(object):
+    '''Class for generating random encounters whose total XP falls
+    within some budget'''
+
+    def __init__(self, index, seed=None):
+        '''Constructs EncounterGenerator objects
+
+        :param index: an EncounterIndex object
+        :param seed: optional seed for the random number generator
+        '''
+        self.index = index
+        self.random = random.Random(seed)
+        # memoized results of _search, keyed by search state
+        self._memo = {}
+
+    def _search(self, start, low, high, slots):
+        '''Finds every combination of XP values, taken from
+        index.xp_values[start:] with repetition, whose sum lies in the
+        interval [low, high] and which has at most "slots" members
+
+        :returns: list of tuples of XP values in non-increasing order
+        '''
+        key = (start, low, high, slots)
+        if key in self._memo:
+            return self._memo[key]
+
+        results = []
+        # the budget has been met, so the empty combination is valid
+        if low <= 0:
+            results.append(())
+        xp_values = self.index.xp_values
+        if slots > 0:
+            for i in range(start, len(xp_values)):
+                value = xp_values[i]
+                # skip creatures that are worth too much
+                if value > high:
+                    continue
+                # prune: all remaining values are smaller than this one,
+                #   so none of them can fill the budget either
+                if value * slots < low:
+                    break
+                for rest in self._search(i, low - value, high - value,
+                                         slots - 1):
+                    results.append((value,) + rest)
+
+        self._memo[key] = results
+        return results
+
+    def compositions(self, budget, tolerance=0.1, max_creatures=6):
+        '''Finds every combination of XP values that fills a budget
+
+        :param budget: total XP of the desired encounter
+        :param tolerance: fraction of the budget that may be left unused
+        :param max_creatures: maximum number of creatures per encounter
+        :returns: list of tuples of XP values
+        '''
+        low = int(budget * (1.0 - tolerance))
+        results = self._search(0, max(low, 1), budget, max_creatures)
+        return [x for x in results if x]
+
+    def generate(self, budget, count=1, tolerance=0.1, max_creatures=6):
+        '''Generates random encounters that fill an XP budget
+
+        :param budget: total XP of the desired encounters
+        :param count: number of encounters to generate
+        :param tolerance: fraction of the budget that may be left unused
+        :param max_creatures: maximum number of creatures per encounter
+        :returns: generator of Encounter objects
+        '''
+        compositions = self.compositions(budget, tolerance, max_creatures)
+        if not compositions:
+            return
+        buckets = self.index.buckets
+        creatures = self.index.creatures
+        choice = self.random.choice
+        for _ in range(count):
+            composition = choice(compositions)
+            members = tuple(creatures[choice(buckets[xp])]
+                            for xp in composition)
+            yield Encounter(members, sum(composition))
+
+    def generate_for_party(self, party_size, party_level,
+                           difficulty='average', count=1, **kwargs):
+        '''Generates random encounters for a party of adventurers
+
+        :param party_size: number of characters in the party
+        :param party_level: average level of the characters in the party
+        :param difficulty: one of the keys of DIFFICULTY_OFFSETS
+        :param count: number of encounters to generate
+        :returns: generator of Encounter objects
+        '''
+        budget = party_xp_budget(party_size, party_level, difficulty)
+        return self.generate(budget, count, **kwargs)
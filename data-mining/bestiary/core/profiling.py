@@ -0,0 +1,214 @@
+'''A module containing functions for profiling scripts with cProfile and,
+where available, tracemalloc, and for timing labelled sections of code.
+
+Sections are labelled with the section(...) context manager, which does
+nothing unless profiling has been started with enable(...).
+
+Threads started while profiling, such as the crawler's download threads,
+are profiled separately and their data is merged into the report. From
+Python 3.12, a single cProfile.Profile already profiles every thread.
+'''
+
+
+import cProfile
+import pstats
+import sys
+import threading
+import time
+
+from contextlib import contextmanager
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+__all__ = ['Profiler', 'enable', 'section']
+
+
+# --- Constants ---
+# number of functions and allocation sites listed in a report
+REPORT_LIMIT = 40
+
+# whether cProfile profiles every thread, rather than only the thread
+#   that enabled it; only one profiler can be active at once since
+#   Python 3.12, so threads can not be profiled separately there
+PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+# Profiler started by enable(...), None when profiling is disabled
+_PROFILER = None
+
+
+# --- Functions ---
+def enable(trace_memory=True):
+    '''Starts profiling the current process
+
+    :param trace_memory: if True, memory allocations are also traced
+                         with tracemalloc, when it is available
+    :returns: the started Profiler object
+    '''
+    global _PROFILER
+    _PROFILER = Profiler(trace_memory)
+    _PROFILER.start()
+    return _PROFILER
+
+
+@contextmanager
+def section(label):
+    '''Times a labelled section of code if profiling is enabled
+
+    :param label: name of the section, e.g. 'fetch'
+    '''
+    if _PROFILER is None:
+        yield
+    else:
+        with _PROFILER.section(label):
+            yield
+
+
+# --- Classes ---
+class Profiler(object):
+    '''Class for collecting cProfile data, memory allocations and the
+    time spent in labelled sections of code'''
+
+    def __init__(self, trace_memory=True):
+        '''Constructs Profiler objects
+
+        :param trace_memory: if True, memory allocations are also traced
+                             with tracemalloc, when it is available
+        '''
+        self.profile = cProfile.Profile()
+        # profiles of the threads started while profiling
+        self.thread_profiles = []
+        self.trace_memory = trace_memory and tracemalloc is not None
+        # maps labels to [number of entries, seconds, bytes allocated, 
+        #   whether other threads were running during any entry]
+        self.sections = {}
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def _profile_thread(self, frame, event, arg):
+        '''Starts profiling a thread started while profiling, replacing
+        itself with a cProfile.Profile for the thread
+
+        This is set with threading.setprofile(...), so it is called by
+        each new thread before the thread runs its target.
+        '''
+        profile = cProfile.Profile()
+        with self._lock:
+            self.thread_profiles.append(profile)
+        profile.enable()
+
+    def get_stats(self, stream=None):
+        '''Gets the cProfile data of every profiled thread
+
+        :param stream: file-like object that reports are printed to
+        :returns: a pstats.Stats object
+        '''
+        stats = pstats.Stats(self.profile, stream=stream)
+        with self._lock:
+            for profile in self.thread_profiles:
+                stats.add(profile)
+        return stats
+
+    @contextmanager
+    def section(self, label):
+        '''Times a labelled section of code
+
+        Time spent in nested sections is counted in each section, and
+        time spent by threads in the same section at once is added up.
+        Sections may be entered from any thread, but tracemalloc counts
+        the memory allocated by every thread, so the bytes counted for
+        a section also include allocations by other threads that were
+        running during it.
+
+        :param label: name of the section, e.g. 'fetch'
+        '''
+        start_memory = 0
+        if self.trace_memory:
+            start_memory = tracemalloc.get_traced_memory()[0]
+        shared = threading.active_count() > 1
+        start = time.time()
+        try:
+            yield
+        finally:
+            seconds = time.time() - start
+            size = 0
+            if self.trace_memory:
+                size = tracemalloc.get_traced_memory()[0] - start_memory
+            shared = shared or threading.active_count() > 1
+            with self._lock:
+                stats = self.sections.setdefault(label, [0, 0.0, 0, False])
+                stats[0] = stats[0] + 1
+                stats[1] = stats[1] + seconds
+                stats[2] = stats[2] + size
+                stats[3] = stats[3] or shared
+
+    def start(self):
+        '''Starts collecting profiling data from the current thread and
+        from threads started after it'''
+        if self.trace_memory:
+            tracemalloc.start()
+        if not PROFILES_ALL_THREADS:
+            threading.setprofile(self._profile_thread)
+        self.profile.enable()
+
+    def stop(self):
+        '''Stops collecting profiling data
+
+        Threads that are still running are not stopped, but data that
+        they collect after this is called is not reported.
+        '''
+        self.profile.disable()
+        if not PROFILES_ALL_THREADS:
+            threading.setprofile(None)
+        if self.trace_memory:
+            self._snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+    def write_report(self, file_prefix, sort_key='cumulative'):
+        '''Writes the collected profiling data to two files:
+        <file_prefix>.prof, which holds the raw cProfile data and can be
+        loaded by tools such as snakeviz, and <file_prefix>.txt, a report
+        of labelled sections, functions and memory allocations
+
+        :param file_prefix: path of the output files without extensions
+        :param sort_key: pstats key used to sort functions in the report
+        :returns: tuple of the paths of the two files
+        '''
+        prof_path = file_prefix + '.prof'
+        report_path = file_prefix + '.txt'
+        stats = self.get_stats()
+        stats.dump_stats(prof_path)
+
+        report_file = open(report_path, 'w')
+        # labelled sections, slowest first
+        report_file.write('%-24s %10s %12s %14s\n' %
+                          ('section', 'calls', 'seconds', 'bytes'))
+        labels = sorted(self.sections.keys(),
+                        key=lambda x: self.sections[x][1], reverse=True)
+        shared = False
+        for label in labels:
+            calls, seconds, size, section_shared = self.sections[label]
+            section_shared = section_shared and self.trace_memory
+            report_file.write('%-24s %10d %12.3f %14d%s\n' %
+                              (label, calls, seconds, size,
+                               '*' if section_shared else ''))
+            shared = shared or section_shared
+        if shared:
+            report_file.write('* bytes include allocations by other '
+                              'threads\n')
+        report_file.write('\n')
+        # functions of every thread
+        stats.stream = report_file
+        stats.sort_stats(sort_key).print_stats(REPORT_LIMIT)
+        # memory allocations
+        if self._snapshot is not None:
+            report_file.write('top memory allocations by line:\n')
+            top = self._snapshot.statistics('lineno')[:REPORT_LIMIT]
+            for stat in top:
+                report_file.write('%s\n' % stat)
+        report_file.close()
+        return prof_path, report_path
@@ -0,0 +1,256 @@
+'''A module containing classes for running Monte Carlo simulations of
+combat between a party of adventurers and creatures from the
+Pathfinder RPG'''
+
+
+import timeit
+
+import numpy
+
+from db.creatureDB import CONTENT_VIEWS
+from db.values import to_int
+
+
+__all__ = ['CombatSimulator', 'PartyProfile', 'benchmark']
+
+
+# --- Constants ---
+# Columns of the "creatures" table used to build a simulation
+STAT_COLUMNS = ['name', 'ac', 'hp', 'Fort', 'Ref', 'Will', 'BAB', 'Str']
+# Values used for stats that do not start with a number, instead of
+#   db.values.MISSING_VALUE, e.g. a dash for a creature without a
+#   Strength score, which is treated as a score of -1
+STAT_DEFAULTS = {
+    'ac': 10, 'hp': 1, 'Fort': 0, 'Ref': 0, 'Will': 0, 'BAB': 0, 'Str': -1
+}
+
+# Upper bound on the number of array elements rolled at once, used to
+#   keep memory usage bounded when simulating many rounds
+MAX_BATCH_ELEMENTS = 4000000
+
+SAVES = ['Fort', 'Ref', 'Will']
+
+
+# --- Functions ---
+def _ability_modifier(score):
+    '''Computes the modifier of an ability score, treating scores of -1
+    (creatures without a score) as having no modifier
+
+    :param score: ability score as an integer
+    :returns: ability modifier
+    '''
+    if score < 0:
+        return 0
+    return (score - 10) // 2
+
+
+def benchmark(simulator, repeat=3):
+    '''Measures the throughput of a CombatSimulator
+
+    :param simulator: a CombatSimulator object
+    :param repeat: number of times each measurement is repeated
+    :returns: number of d20 and damage rolls made per second
+    '''
+    start_rolls = simulator.rolls
+    seconds = min(timeit.repeat(simulator.report, number=1, repeat=repeat))
+    rolls_per_report = (simulator.rolls - start_rolls) // repeat
+    return rolls_per_report / seconds
+
+
+# --- Classes ---
+class PartyProfile(object):
+    '''Class representing the typical combat statistics of a party of
+    adventurers'''
+
+    def __init__(self, ac=15, attack_bonus=5, attacks=1,
+                 damage=(1, 8, 3), save_dc=15):
+        '''Constructs PartyProfile objects
+
+        :param ac: armor class of a typical party member
+        :param attack_bonus: attack bonus of the party's attacks
+        :param attacks: number of attacks the party makes each round
+        :param damage: damage of each attack as a (number of dice,
+                       die size, bonus) tuple, e.g. (1, 8, 3) for 1d8+3
+        :param save_dc: DC of the party's spells and special abilities
+        '''
+        self.ac = ac
+        self.attack_bonus = attack_bonus
+        self.attacks = attacks
+        self.damage = damage
+        self.save_dc = save_dc
+
+
+class CombatSimulator(object):
+    '''Class for simulating d20 rolls made by and against creatures in
+    batches of NumPy arrays'''
+
+    def __init__(self, creatures, party, seed=None, trials=10000,
+                 max_rounds=20):
+        '''Constructs CombatSimulator objects
+
+        :param creatures: list of Creature objects
+        :param party: a PartyProfile object
+        :param seed: optional seed for the random number generator
+        :param trials: number of simulated combats per creature
+        :param max_rounds: rounds simulated before a combat is abandoned
+        '''
+        rows = [(x.name, x.ac['AC'], x.hp,
+                 x.saves['Fort'], x.saves['Ref'], x.saves['Will'],
+                 x.bab, x.ability_scores['Str']) for x in creatures]
+        self._load_rows(rows)
+        self.party = party
+        self.random = numpy.random.RandomState(seed)
+        self.trials = trials
+        self.max_rounds = max_rounds
+        # total number of dice rolled by this simulator
+        self.rolls = 0
+
+    @classmethod
+    def from_db(cls, db_conn, party, content='standard', **kwargs):
+        '''Constructs a CombatSimulator for every creature in a CreatureDB
+
+        :param db_conn: an open CreatureDB
+        :param party: a PartyProfile object
+        :param content: type of creatures to simulate, one of the keys of
+                        db.creatureDB.CONTENT_VIEWS
+        :returns: a CombatSimulator object
+        '''
+        simulator = cls([], party, **kwargs)
+        query = 'select %s from %s' % (', '.join(STAT_COLUMNS),
+                                       CONTENT_VIEWS[content])
+        cursor = db_conn.connection.cursor()
+        simulator._load_rows(cursor.execute(query).fetchall())
+        return simulator
+
+    def _load_rows(self, rows):
+        '''Stores creature statistics as NumPy arrays
+
+        :param rows: list of tuples ordered as in STAT_COLUMNS
+        '''
+        self.names = [x[0] for x in rows]
+        columns = [[to_int(x[i], STAT_DEFAULTS[STAT_COLUMNS[i]])
+                    for x in rows] for i in range(1, 8)]
+        self.ac = numpy.array(columns[0], dtype=numpy.int32)
+        self.hp = numpy.array(columns[1], dtype=numpy.int32)
+        self.saves = {}
+        for i, key in enumerate(SAVES):
+            self.saves[key] = numpy.array(columns[2 + i], dtype=numpy.int32)
+        strength = [_ability_modifier(x) for x in columns[6]]
+        self.attack_bonus = numpy.array(columns[5], dtype=numpy.int32) + \
+            numpy.array(strength, dtype=numpy.int32)
+
+    def _roll(self, sides, shape):
+        '''Rolls a batch of dice
+
+        :param sides: number of sides on each die
+        :param shape: shape of the resulting array
+        :returns: array of results
+        '''
+        result = self.random.randint(1, sides + 1, size=shape)
+        self.rolls += result.size
+        return result
+
+    def _success_rates(self, bonus, target):
+        '''Computes the rate at which d20 rolls plus a bonus meet a
+        target, where a natural 20 always succeeds and a natural 1
+        always fails
+
+        :param bonus: array or scalar bonus added to each roll
+        :param target: array or scalar number to meet or beat
+        :returns: array of success rates, one for each creature
+        '''
+        bonus = numpy.broadcast_to(numpy.asarray(bonus), (len(self.names),))
+        target = numpy.broadcast_to(numpy.asarray(target), (len(self.names),))
+        # split creatures into batches that fit in MAX_BATCH_ELEMENTS
+        batch_size = max(1, MAX_BATCH_ELEMENTS // max(self.trials, 1))
+
+        rates = numpy.empty(len(self.names))
+        for start in range(0, len(self.names), batch_size):
+            stop = min(start + batch_size, len(self.names))
+            d20 = self._roll(20, (stop - start, self.trials))
+            success = d20 + bonus[start:stop, None] >= target[start:stop, None]
+            success = (success | (d20 == 20)) & (d20 != 1)
+            rates[start:stop] = success.mean(axis=1)
+        return rates
+
+    def creature_hit_rates(self):
+        '''Simulates attacks made by each creature against the party
+
+        :returns: array of hit rates, one for each creature
+        '''
+        return self._success_rates(self.attack_bonus, self.party.ac)
+
+    def party_hit_rates(self):
+        '''Simulates attacks made by the party against each creature
+
+        :returns: array of hit rates, one for each creature
+        '''
+        return self._success_rates(self.party.attack_bonus, self.ac)
+
+    def save_failure_rates(self, save='Will'):
+        '''Simulates saving throws made by each creature against the
+        party's save DC
+
+        :param save: one of 'Fort', 'Ref' or 'Will'
+        :returns: array of failure rates, one for each creature
+        '''
+        return 1.0 - self._success_rates(self.saves[save],
+                                         self.party.save_dc)
+
+    def rounds_to_kill(self):
+        '''Simulates the party attacking each creature until it dies
+
+        Combats lasting longer than max_rounds are counted as lasting
+        max_rounds + 1 rounds.
+
+        :returns: array of the expected number of rounds, one for each
+                  creature
+        '''
+        num_dice, die_size, bonus = self.party.damage
+        attacks = self.party.attacks * self.max_rounds
+        # split creatures into batches that fit in MAX_BATCH_ELEMENTS
+        per_creature = self.trials * attacks * max(num_dice, 1)
+        batch_size = max(1, MAX_BATCH_ELEMENTS // per_creature)
+
+        expected = numpy.empty(len(self.names))
+        for start in range(0, len(self.names), batch_size):
+            stop = min(start + batch_size, len(self.names))
+            shape = (stop - start, self.trials, attacks)
+            # determine which attacks hit
+            d20 = self._roll(20, shape)
+            target = self.ac[start:stop, None, None]
+            hits = d20 + self.party.attack_bonus >= target
+            hits = (hits | (d20 == 20)) & (d20 != 1)
+            # roll damage for every attack, hit or not
+            damage = self._roll(die_size, shape + (num_dice,)).sum(axis=3)
+            damage = numpy.maximum(damage + bonus, 1) * hits
+            # total damage at the end of each round
+            damage = damage.reshape(shape[:2] + (self.max_rounds, -1))
+            totals = damage.sum(axis=3).cumsum(axis=2)
+            # find the first round in which the creature died
+            dead = totals >= self.hp[start:stop, None, None]
+            rounds = numpy.where(dead.any(axis=2), dead.argmax(axis=2) + 1,
+                                 self.max_rounds + 1)
+            expected[start:stop] = rounds.mean(axis=1)
+        return expected
+
+    def report(self):
+        '''Runs every simulation for every creature
+
+        :returns: list of dictionaries of results, one for each creature
+        '''
+        columns = {
+            'creature_hit_rate': self.creature_hit_rates(),
+            'party_hit_rate': self.party_hit_rates(),
+            'rounds_to_kill': self.rounds_to_kill(),
+        }
+        for key in SAVES:
+            columns[key + '_failure_rate'] = self.save_failure_rates(key)
+
+        results = []
+        for i, name in enumerate(self.names):
+            result = {'name': name}
+            for key in columns:
+                result[key] = float(columns[key][i])
+            results.append(result)
+        return results
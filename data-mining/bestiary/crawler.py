@@ -2,22 +2,72 @@
 the Bestiary pages of d20pfsrd.com and place it in a database'''
 
 
-import argparse
+import os
+import re
+import sys
+import threading
+import time
 import traceback
 
+from io import BytesIO
+
+try:
+    from httplib import IncompleteRead
+except ImportError:
+    from http.client import IncompleteRead
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+try:
+    from urllib2 import HTTPError, urlopen
+except ImportError:
+    from urllib.error import HTTPError
+    from urllib.request import urlopen
+
+from lxml.cssselect import CSSSelector
+from lxml.etree import ParserError, XMLSyntaxError, iterparse
 from lxml.html import parse
 from core.builders.creature.d20pfsrd import build as d20_build
-from core.builders.creature.dict import build as dict_build
+from core.profiling import section
 from db.creatureDB import CreatureDB
+from db.ingest import create_db_entries_from_csv
 
 
-__all__ = []
+__all__ = ['DownloadError']
 
 
 # --- Constants ---
 # The maximum number of retries allowed when attempting to download
 #   a web page
 MAX_ATTEMPTS = 3
+# The number of seconds to wait before retrying a download, which is 
+#   doubled after each failed attempt, and the most seconds to wait when
+#   d20pfsrd.com asks for a longer wait with a Retry-After header
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 60
+# Errors after which a download is retried: I/O and HTTP errors, pages
+#   cut off part way through and pages that cannot be parsed
+RETRY_ERRORS = (IOError, IncompleteRead, ParserError, XMLSyntaxError)
+# The number of seconds to wait for a response from d20pfsrd.com
+TIMEOUT = 30
+
+# Links to d20pfsrd.com are downloaded from BASE_URL instead, so that a
+#   copy of the site, such as the one served by mock_server.py, can be
+#   crawled using the links in INDEX.txt
+SITE_URL = 'http://www.d20pfsrd.com'
+BASE_URL = SITE_URL
+
+# The number of threads used to download creature pages, and the
+#   maximum number of links and downloaded creatures buffered between
+#   the stages of a crawl
+FETCH_WORKERS = 8
+QUEUE_SIZE = 64
+
+# Matches the CR band encoded in the link to a Bestiary index page, e.g.
+#   '-bestiary-cr-11-12', '-bestiary-cr-20' or, for the second page of a
+#   band, '-bestiary-cr-1-2-1'
+INDEX_CR_PATTERN = re.compile(r'-bestiary-cr-(\d+)(?:-(\d+))?(?:-\d+)?/?$')
 
 # TODO: Content Collection Modes
 MODE_3PP = 1        # collect 3rd party content only
@@ -32,33 +82,144 @@ PROBLEM_SUFFIXES = []
 THIRD_PARTY_PUBLISHERS = []
 THIRD_PARTY_SUFFIXES = []
 
+# Selectors compiled once, rather than each time a page is checked
+FOOTER_SELECTOR = CSSSelector('.sites-tile-name-footer')
+LINK_SELECTOR = CSSSelector('div a')
+TITLE_SELECTOR = CSSSelector('title')
+
 
 # --- Functions ---
-def create_db_entries_from_csv(db_conn, file_name='CREATURES_SPECIAL.csv'):
-    '''Creates a row in a CreatureDB object using a .csv file
-    containing creature attributes as described in the documentation
-    for this project
+def build_db(db_name='creature.db', cr_range=(0.0, float('inf')),
+             cr_flag=False, content='standard', csv_name='creature.csv',
+             columnar=None, workers=FETCH_WORKERS):
+    '''Builds a database of Pathfinder creatures by scraping creature 
+    data from d20pfsrd.com and reading CREATURES_SPECIAL.csv and 
+    3PP_CREATURES_SPECIAL.csv
+    
+    Every creature is collected in a single crawl and tagged as standard
+    or 3rd party content. The resulting database will be exported in 
+    both .db (SQLite 3) and .csv formats, where the .csv file only 
+    contains the type of content chosen with content. The lists used to
+    filter content should be loaded first with load_filter_lists(...).
+    
+    :param db_name: the name of the SQLite database file
+    :param cr_range: (min, max) tuple of accepted CR values
+    :param cr_flag: if True, CR values are stored as strings
+    :param content: type of creatures exported to the .csv file, one of
+                    'standard', '3pp' or 'all'
+    :param csv_name: the name of the exported .csv file
+    :param columnar: optional name of a .parquet, .arrow or .npz file to
+                     also export creatures to
+    :param workers: the number of threads that download pages
+    :returns: list of (link, error message) tuples for failed links
+    '''
+    # create sqlite3 database
+    db_connection = CreatureDB(db_name, cr_flag)
+    db_connection.min_cr = cr_range[0]
+    db_connection.max_cr = cr_range[1]
+    
+    # add entries to creature db via links to pages on d20pfsrd.com
+    failures = []
+    try:
+        # create creature db entry for each reachable link of each index,
+        #   followed by each link in special index
+        indeces = [x for x in get_html_indeces() 
+                   if is_index_in_cr_range(x, cr_range[0], cr_range[1])]
+        special_links = load_list('INDEX_SPECIAL.txt')
+        links = iter_crawl_links(indeces, special_links, MODE_ALL, 
+                                 failures)
+        failures.extend(crawl(db_connection, links, MODE_ALL, workers,
+                              cr_range=cr_range))
+    except Exception:
+        traceback.print_exc()
+    
+    # add entries to creature database via .csv file
+    create_db_entries_from_csv(db_connection, 'CREATURES_SPECIAL.csv')
+    create_db_entries_from_csv(db_connection, '3PP_CREATURES_SPECIAL.csv', 
+                               True)
+    
+    # clean up
+    db_connection.export_as_csv(csv_name, content)
+    if columnar:
+        db_connection.export_as_columnar(columnar, content)
+    db_connection.commit_and_close()
+    return failures
+
+
+def crawl(db_conn, links, mode=MODE_STANDARD, workers=FETCH_WORKERS,
+          queue_size=QUEUE_SIZE, cr_range=None):
+    '''Creates rows in a CreatureDB object for every link produced by an
+    iterable, such as the generator returned by iter_crawl_links(...)
+    
+    Links are consumed by a producer thread and downloaded by a pool of
+    worker threads while the calling thread adds creatures to the 
+    database, so the first creatures are stored while later index pages
+    are still being read. The queues between these stages are bounded,
+    so a stage that falls behind blocks the stages before it.
     
     :param db_conn: an open Connection object to a CreatureDB
-    :param file_name: name of .csv file containing creature data
+    :param links: iterable of links to creature pages on d20pfsrd
+    :param mode: the content collection mode set by the user
+    :param workers: the number of threads that download pages
+    :param queue_size: the maximum number of buffered links and creatures
+    :param cr_range: optional (min, max) tuple; creatures whose CR is 
+                     outside of this range are not fully parsed
+    :returns: list of (link, error message) tuples for links that could
+              not be downloaded or parsed, which are skipped
     '''
-    # get creature data from .csv file
-    creature_keys = []
-    creature_file = open(file_name, 'r')
-    for next_line in creature_file:
-        creature_features = next_line.strip().split(',')
-        # skip first line
-        if next_line.startswith('CR,'):
-            creature_keys = creature_features
+    link_queue = Queue(queue_size)
+    result_queue = Queue(queue_size)
+    
+    def produce():
+        try:
+            for link in links:
+                link_queue.put(link)
+        except Exception:
+            result_queue.put((None, None, traceback.format_exc()))
+        finally:
+            for _ in range(workers):
+                link_queue.put(None)
+    
+    def consume():
+        while True:
+            link = link_queue.get()
+            if link is None:
+                break
+            # pages that fail are counted and skipped, so that one bad
+            #   page does not stop the crawl
+            try:
+                creature = get_creature(link, mode, cr_range)
+                result_queue.put((link, creature, None))
+            except DownloadError as error:
+                result_queue.put((link, None, str(error)))
+            except Exception:
+                result_queue.put((link, None, traceback.format_exc()))
+        result_queue.put(None)
+    
+    threads = [threading.Thread(target=produce)]
+    threads.extend(threading.Thread(target=consume) for _ in range(workers))
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    
+    # sqlite3 connections belong to the thread that created them, so 
+    #   creatures are added to the database by the calling thread
+    failures = []
+    running = workers
+    while running:
+        result = result_queue.get()
+        if result is None:
+            running = running - 1
             continue
-        # create Creature object
-        creature_dict = dict(zip(creature_keys, creature_features))
-        creature = dict_build(creature_dict)
-        # add Creature object to database
-        db_conn.add_creature(creature)
-        
-    # clean up
-    creature_file.close()
+        link, creature, error = result
+        if error is not None:
+            failures.append((link, error))
+        elif creature is not None:
+            with section('DB insert'):
+                db_conn.add_creature(creature)
+    for thread in threads:
+        thread.join()
+    return failures
 
 
 def create_db_entry_from_link(db_conn, link, mode=MODE_STANDARD):
@@ -69,23 +230,89 @@ def create_db_entry_from_link(db_conn, link, mode=MODE_STANDARD):
     :param link: link to non-3rd party creature on d20pfsrd
     :param mode: the content collection mode set by the user
     '''
-    for i in range(MAX_ATTEMPTS):
+    creature = get_creature(link, mode)
+    # if link is acceptable, create Creature entry in db
+    if creature is not None:
+        with section('DB insert'):
+            db_conn.add_creature(creature)
+
+
+def fetch(link):
+    '''Opens a web page or local file for reading
+    
+    Links to SITE_URL are downloaded from BASE_URL.
+    
+    :param link: URL or path of the page
+    :returns: open file-like object containing the page
+    '''
+    if '://' not in link:
+        return open(link, 'rb')
+    if BASE_URL != SITE_URL and link.startswith(SITE_URL):
+        link = BASE_URL + link[len(SITE_URL):]
+    return urlopen(link, timeout=TIMEOUT)
+
+
+def fetch_page(link, parser=None):
+    '''Downloads a web page or reads a local file, retrying up to 
+    MAX_ATTEMPTS times after any of the errors in RETRY_ERRORS
+    
+    The whole page is read before it is parsed, so a page that is cut 
+    off part way through is downloaded again rather than parsed. The 
+    wait between attempts is given by get_retry_delay(...).
+    
+    :param link: URL or path of the page
+    :param parser: optional function called with a file-like object 
+                   containing the page, such as parse_html; its errors
+                   are retried if they are in RETRY_ERRORS
+    :returns: the page as a string of bytes, or the value returned by
+              parser
+    :raises DownloadError: if every attempt fails
+    '''
+    error = None
+    for attempt in range(MAX_ATTEMPTS):
+        if attempt:
+            time.sleep(get_retry_delay(attempt, error))
         try:
-            html_tree = parse(link)
-            root = html_tree.getroot()
-            # if link is acceptable, create Creature entry in db
-            if not is_problem_page(root, mode):
-                creature = d20_build(root)
-                db_conn.add_creature(creature)
-        # if I/O exception raised, try again
-        except IOError:
-            continue
-        # if successful, break out of loop
-        else:
-            break
-    # if not successful, exit cleanly
-    else:
-        raise Exception('ERROR: failed to download', link)
+            with section('fetch'):
+                page = fetch(link)
+                try:
+                    body = read_page(page)
+                finally:
+                    page.close()
+                if parser is None:
+                    return body
+                return parser(BytesIO(body))
+        except RETRY_ERRORS as attempt_error:
+            error = attempt_error
+    raise DownloadError(link, error)
+
+
+def get_creature(link, mode=MODE_STANDARD, cr_range=None):
+    '''Downloads a creature page from d20pfsrd.com and builds a Creature 
+    object from it, retrying up to MAX_ATTEMPTS times (see fetch_page)
+    
+    :param link: link to a creature page on d20pfsrd
+    :param mode: the content collection mode set by the user
+    :param cr_range: optional (min, max) tuple of accepted CR values
+    :returns: Creature object tagged with its link and whether or not it
+              is 3rd party content, None if the page's content is not 
+              desired
+    :raises DownloadError: if the page cannot be downloaded
+    '''
+    root = fetch_page(link, parse_html)
+    # classify page once, whatever the content collection mode
+    with section('3PP check'):
+        is_3pp = is_3pp_link(link, False) or is_3pp_page(root)
+    if mode == MODE_STANDARD and is_3pp:
+        return None
+    if mode == MODE_3PP and not is_3pp:
+        return None
+    with section('parse'):
+        creature = d20_build(root, cr_range)
+    if creature is not None:
+        creature.source = link
+        creature.is_3pp = is_3pp
+    return creature
 
 
 def get_creature_links(page, mode=MODE_STANDARD):
@@ -95,16 +322,17 @@ def get_creature_links(page, mode=MODE_STANDARD):
     :param mode: the content collection mode set by the user
     :returns: list of links to all desired content on page
     '''
-    parsed_html = parse(page)
-    
-    root = parsed_html.getroot()
-    elements = root.cssselect('div a')
+    root = fetch_page(page, parse_html)
+    elements = LINK_SELECTOR(root)
     
     creature_links = []
     for element in elements:
         link = element.get('href')
-        if (link is not None and 'monster-listings/' in link and 
-              not is_problem_link(link, mode)):
+        if link is None or 'monster-listings/' not in link:
+            continue
+        with section('3PP check'):
+            is_problem = is_problem_link(link, mode)
+        if not is_problem:
             creature_links.append(link)
     return creature_links
 
@@ -120,19 +348,66 @@ def get_html_indeces():
     return creature_indeces
 
 
-def is_3pp_link(link):
+def get_index_cr_range(index):
+    '''Gets the range of Challenge Ratings (CR) of the creatures listed
+    on a Bestiary index page, based on the page's link
+    
+    Bands starting at CR 1 or below are assumed to include creatures
+    with fractional CR values, and bands given by a single CR (e.g. 
+    '-bestiary-cr-20') are assumed to include every higher CR.
+    
+    :param index: link to Bestiary index page on d20pfsrd
+    :returns: (min, max) tuple, (0.0, inf) if the link has no CR band
+    '''
+    match = INDEX_CR_PATTERN.search(index)
+    if match is None:
+        return 0.0, float('inf')
+    low = float(match.group(1))
+    high = float('inf')
+    if match.group(2) is not None and float(match.group(2)) >= low:
+        high = float(match.group(2))
+    if low <= 1:
+        low = 0.0
+    return low, high
+
+
+def get_retry_delay(attempt, error=None):
+    '''Gets the number of seconds to wait before retrying a download
+    
+    Responses asking the crawler to slow down (429 Too Many Requests or
+    503 Service Unavailable) are retried after the number of seconds in 
+    their Retry-After header, if it has one. Otherwise, the wait doubles
+    with each attempt, starting from RETRY_DELAY.
+    
+    :param attempt: number of attempts that have failed, at least 1
+    :param error: optional exception raised by the last attempt
+    :returns: number of seconds, at most MAX_RETRY_DELAY
+    '''
+    delay = RETRY_DELAY * 2 ** (attempt - 1)
+    if isinstance(error, HTTPError) and error.code in (429, 503):
+        retry_after = (error.info() or {}).get('Retry-After', '')
+        # Retry-After may also be an HTTP date, which is not supported
+        if retry_after.strip().isdigit():
+            delay = int(retry_after)
+    return min(delay, MAX_RETRY_DELAY)
+
+
+def is_3pp_link(link, check_page=True):
     '''Determines whether or not the provided link leads to 3rd party
     content
     
     :param link: string containing link to Bestiary page on d20pfsrd
+    :param check_page: if False, only the link itself is checked and the 
+                       page it leads to is not downloaded
     :returns: True if link leads to 3rd party content, False otherwise
     '''
     # check if link contains a suffix denoting its 3rd party status
     if link.endswith(tuple(THIRD_PARTY_SUFFIXES)):
         return True
+    if not check_page:
+        return False
     # check if page the link leads to contains 3rd party content
-    html_tree = parse(link)
-    root = html_tree.getroot()
+    root = fetch_page(link, parse_html)
     if is_3pp_page(root):
         return True
     return False
@@ -146,7 +421,7 @@ def is_3pp_page(root):
     :returns: True if page contains 3rd party content, False otherwise
     '''
     # check if publisher is a 3rd-party publisher
-    footers = root.cssselect('.sites-tile-name-footer')
+    footers = FOOTER_SELECTOR(root)
     if footers:
         for footer in footers:
             footer_text = footer.text_content()
@@ -156,14 +431,27 @@ def is_3pp_page(root):
                     if publisher in footer_text:
                         return True
     # check if title indicates that creature has 3rd-party affiliation
-    title_element = root.cssselect('title')
+    title_element = TITLE_SELECTOR(root)
     title = title_element[0].text
     if title and '3pp' in title:
         return True
     return False
 
 
-def is_problem_link(link, mode=MODE_STANDARD):
+def is_index_in_cr_range(index, min_cr=0.0, max_cr=float('inf')):
+    '''Determines whether or not a Bestiary index page may list 
+    creatures with a Challenge Rating (CR) in the given range
+    
+    :param index: link to Bestiary index page on d20pfsrd
+    :param min_cr: minimum accepted CR
+    :param max_cr: maximum accepted CR
+    :returns: True if the page's CR band overlaps the range
+    '''
+    low, high = get_index_cr_range(index)
+    return low <= max_cr and high >= min_cr
+
+
+def is_problem_link(link, mode=MODE_STANDARD, check_page=True):
     '''Determines whether or not the provided link is a "problem" 
     link
     
@@ -172,6 +460,10 @@ def is_problem_link(link, mode=MODE_STANDARD):
     
     :param link: string containing link to Bestiary page on d20pfsrd
     :param mode: the content collection mode set by the user
+    :param check_page: if False, the page the link leads to is not 
+                       downloaded, so 3rd party content that can only be
+                       detected from the page itself is not rejected and
+                       must be checked with is_problem_page(...) later
     :returns: True if the link is a "problem" link, False otherwise
     '''
     # check if link is on list of problematic links
@@ -181,10 +473,10 @@ def is_problem_link(link, mode=MODE_STANDARD):
     if link.endswith(tuple(PROBLEM_SUFFIXES)):
             return True
     # check if link contains 3rd party content
-    is_3pp_link_ = is_3pp_link(link)
+    is_3pp_link_ = is_3pp_link(link, check_page)
     if mode == MODE_STANDARD and is_3pp_link_:
         return True
-    if mode == MODE_3PP and not is_3pp_link_:
+    if mode == MODE_3PP and not is_3pp_link_ and check_page:
         return True
     return False
 
@@ -204,6 +496,98 @@ def is_problem_page(root, mode=MODE_STANDARD):
     return False
 
 
+def iter_crawl_links(indeces, special_links=(), mode=MODE_STANDARD,
+                     failures=None):
+    '''Gets the links to all desired content on every index page, 
+    followed by a list of links to special creature pages, skipping 
+    links that have already been found
+    
+    :param indeces: links to Bestiary index pages on d20pfsrd
+    :param special_links: links to creature pages on d20pfsrd
+    :param mode: the content collection mode set by the user
+    :param failures: optional list; if given, index pages that cannot be
+                     downloaded are skipped and added to it as (link, 
+                     error message) tuples, instead of raising an error
+    :returns: generator of links to creature pages
+    :raises DownloadError: if an index page cannot be downloaded and 
+                           failures is not given
+    '''
+    seen = set()
+    for index in indeces:
+        try:
+            for link in iter_creature_links(index, mode):
+                if link not in seen:
+                    seen.add(link)
+                    yield link
+        except DownloadError as error:
+            if failures is None:
+                raise
+            failures.append((index, str(error)))
+    for link in special_links:
+        link = link.strip()
+        if link and link not in seen:
+            seen.add(link)
+            yield link
+
+
+def iter_creature_links(page, mode=MODE_STANDARD):
+    '''Gets the links to all desired content on the given page, yielding
+    each link as soon as it is read
+    
+    Unlike get_creature_links(...), the page is parsed incrementally and
+    the parts of it that have been read are discarded. Pages of 3rd 
+    party content are not downloaded to check links; the content of 
+    each page is checked when it is downloaded by get_creature(...).
+    
+    :param page: link to Bestiary page on d20pfsrd
+    :param mode: the content collection mode set by the user
+    :returns: generator of links to desired content on page
+    :raises DownloadError: if the page cannot be downloaded
+    '''
+    # the page is downloaded in full first, so that a page cut off part
+    #   way through is downloaded again rather than partly read
+    page_file = BytesIO(fetch_page(page))
+    try:
+        for _, element in iterparse(page_file, html=True):
+            if element.tag == 'a':
+                link = element.get('href')
+                if (link is not None and 'monster-listings/' in link and
+                      next(element.iterancestors('div'), None) is not None
+                      and not is_problem_link(link, mode, False)):
+                    yield link
+            # discard elements that have been read
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    finally:
+        page_file.close()
+
+
+def load_filter_lists(directory='.'):
+    '''Loads the lists used to filter content by Content Collection 
+    Mode: 3PP.txt, LINKS_3PP_SUFFIXES.txt, LINKS_PROBLEM.txt and 
+    LINKS_PROBLEM_SUFFIXES.txt
+    
+    Lists whose files do not exist are left empty.
+    
+    :param directory: directory containing the files
+    '''
+    global PROBLEM_LINKS, PROBLEM_SUFFIXES
+    global THIRD_PARTY_PUBLISHERS, THIRD_PARTY_SUFFIXES
+    lists = {}
+    for file_name in ['3PP.txt', 'LINKS_3PP_SUFFIXES.txt', 
+                      'LINKS_PROBLEM.txt', 'LINKS_PROBLEM_SUFFIXES.txt']:
+        path = os.path.join(directory, file_name)
+        lists[file_name] = []
+        if os.path.exists(path):
+            # blank lines would match every link
+            lists[file_name] = [x for x in load_list(path) if x]
+    THIRD_PARTY_PUBLISHERS = lists['3PP.txt']
+    THIRD_PARTY_SUFFIXES = lists['LINKS_3PP_SUFFIXES.txt']
+    PROBLEM_LINKS = lists['LINKS_PROBLEM.txt']
+    PROBLEM_SUFFIXES = lists['LINKS_PROBLEM_SUFFIXES.txt']
+
+
 def load_list(file_name):
     '''Gets list of newline-separated strings from file
     
@@ -216,79 +600,60 @@ def load_list(file_name):
     return list_
 
 
-# --- Script --- 
-# By default, if this module is executed as a script, it will try to
-# build a database of non-3rd party Pathfinder creatures by scraping
-# creature data from d20pfsrd.com
-#
-# The resulting database will be exported in both .db (SQLite 3) and 
-# .csv formats.
-if __name__ == '__main__':
-    THIRD_PARTY_PUBLISHERS = load_list('3PP.txt')
-    THIRD_PARTY_SUFFIXES = load_list('LINKS_3PP_SUFFIXES.txt')
-    PROBLEM_LINKS = load_list('LINKS_PROBLEM.txt')
-    PROBLEM_SUFFIXES = load_list('LINKS_PROBLEM_SUFFIXES.txt')
-    
-    # default settings
-    db_name = 'creature.db'
-    cr_range = [0.0, float('inf')]
-    cr_flag = False
-    content_mode = MODE_STANDARD
-    
-    # create parser for command line arguments
-    parser = argparse.ArgumentParser(description='Builds a creature database')
-    # -argument- challenge rating storage mode
-    parser.add_argument('-C', action='store_true',
-                        help='store CR values as strings, not integers')
-    # -argument- range of accepted challenge rating values
-    parser.add_argument('--cr-range', 
-                        nargs=2, metavar=('MIN', 'MAX'), type=float,
-                        help='sets valid range of CR values')
-    # -argument- content collection mode
-    content_mode_choices = ['standard', '3pp', 'all']
-    parser.add_argument('--content',
-                        nargs=1, choices=content_mode_choices,
-                        help='sets type of creatures in db')
-    # parse command line arguments
-    args = vars(parser.parse_args())
-    
-    # handle command line arguments
-    for key in args:
-        if key == 'C':
-            cr_flag = args['C']
-        if key == 'cr_range' and args['cr_range']:
-            cr_range = args['cr_range']
-        if key == 'content' and args['content']:
-            content_mode = content_mode_choices.index(args['content'][0])
+def parse_html(page):
+    '''Parses an HTML page
     
-    # create sqlite3 database
-    db_connection = CreatureDB(db_name, cr_flag)
-    db_connection.min_cr = cr_range[0]
-    db_connection.max_cr = cr_range[1]
+    :param page: file-like object containing the page
+    :returns: root HtmlElement of the page
+    :raises ParserError: if the page has no content
+    '''
+    root = parse(page).getroot()
+    if root is None:
+        raise ParserError('page has no content')
+    return root
+
+
+def read_page(page):
+    '''Reads the whole of a page opened by fetch(...)
     
-    # add entries to creature db via links to pages on d20pfsrd.com
-    try:
-        # create creature db entry for each reachable link
-        indeces = get_html_indeces()
-        for index in indeces:
-            links = get_creature_links(index, content_mode)
-            # iterate over each link of the current index
-            for creature_link in links:
-                create_db_entry_from_link(db_connection, creature_link, 
-                                          content_mode)
-        # create creature db entry for each link in special index
-        special_index_file = open('INDEX_SPECIAL.txt', 'r')
-        for line in special_index_file:
-            create_db_entry_from_link(db_connection, line.strip(), content_mode)
-    except Exception as e:
-        traceback.print_exc()
+    Python 2 returns as much of a response as was sent when the
+    connection is closed early, so the length of the page is checked
+    against its Content-Length header.
     
-    # add entries to creature database via .csv file
-    if not content_mode == MODE_3PP:
-        create_db_entries_from_csv(db_connection, 'CREATURES_SPECIAL.csv')
-    if not content_mode == MODE_STANDARD:
-        create_db_entries_from_csv(db_connection, '3PP_CREATURES_SPECIAL.csv')
-                
-    # clean up
-    db_connection.export_as_csv()
-    db_connection.commit_and_close()
+    :param page: file-like object returned by fetch(...)
+    :returns: the page as a string of bytes
+    :raises IncompleteRead: if the page was cut off part way through
+    '''
+    body = page.read()
+    length = None
+    if hasattr(page, 'info'):
+        length = page.info().get('Content-Length')
+    if length is not None and length.isdigit() and len(body) < int(length):
+        raise IncompleteRead(body, int(length) - len(body))
+    return body
+
+
+# --- Classes ---
+class DownloadError(IOError):
+    '''Exception raised when a page cannot be downloaded after 
+    MAX_ATTEMPTS attempts'''
+    
+    def __init__(self, link, error=None):
+        '''Constructs DownloadError objects
+        
+        :param link: link to the page
+        :param error: optional exception raised by the last attempt
+        '''
+        IOError.__init__(self, 'failed to download %s after %d attempts: %r' 
+                         % (link, MAX_ATTEMPTS, error))
+        self.link = link
+        self.error = error
+
+
+# --- Script --- 
+# By default, if this module is executed as a script, it will try to
+# build a database of Pathfinder creatures by scraping creature data 
+# from d20pfsrd.com, taking the same arguments as 'bestiary.py crawl'
+if __name__ == '__main__':
+    from bestiary import main
+    main(['crawl'] + sys.argv[1:])
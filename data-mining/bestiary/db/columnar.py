@@ -0,0 +1,185 @@
+'''A module containing functions for exporting the contents of a
+CreatureDB in columnar formats that analytics tools can load without
+parsing text.
+
+Apache Arrow IPC (.arrow) and Parquet (.parquet) files are written when
+pyarrow is installed. Otherwise, the columns are written as NumPy arrays
+in an .npz file.
+'''
+
+
+import os
+
+from db.snapshot import STAT_COLUMNS
+from db.values import to_cr, to_int
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+__all__ = ['load_columnar', 'write_columnar']
+
+
+# --- Constants ---
+NPZ_EXTENSION = '.npz'
+PARQUET_EXTENSION = '.parquet'
+
+# Columns of the "creatures" table, in the order they are exported
+COLUMNS = ['id', 'name', 'CR'] + STAT_COLUMNS + ['is_3pp', 'source']
+
+
+# --- Functions ---
+def _arrow_schema():
+    '''Gets the Arrow schema of an exported "creatures" table
+
+    :returns: a pyarrow.Schema object
+    '''
+    fields = [
+        pyarrow.field('id', pyarrow.int64()),
+        pyarrow.field('name', pyarrow.string()),
+        pyarrow.field('CR', pyarrow.float64()),
+    ]
+    fields.extend(pyarrow.field(x, pyarrow.int32()) for x in STAT_COLUMNS)
+    fields.append(pyarrow.field('is_3pp', pyarrow.bool_()))
+    fields.append(pyarrow.field('source', pyarrow.string()))
+    return pyarrow.schema(fields)
+
+
+def _decode(value):
+    '''Converts a value from one of the text columns into a unicode
+    string
+
+    :param value: value of a text column, possibly None
+    :returns: the value as a unicode string
+    '''
+    if value is None:
+        return u''
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+
+def _iter_column_batches(connection, view, batch_size):
+    '''Reads a table or view of a CreatureDB in batches of columns
+
+    :param connection: an open sqlite3 Connection to a CreatureDB
+    :param view: name of the table or view to read
+    :param batch_size: number of rows fetched from the database at once
+    :returns: generator of lists of column values, ordered as in COLUMNS
+    '''
+    cursor = connection.cursor()
+    cursor.execute('select %s from %s order by id' %
+                   (', '.join(COLUMNS), view))
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        columns = list(zip(*rows))
+        batch = [
+            [int(x) for x in columns[0]],
+            [_decode(x) for x in columns[1]],
+            [to_cr(x) for x in columns[2]],
+        ]
+        for i in range(len(STAT_COLUMNS)):
+            batch.append([to_int(x) for x in columns[3 + i]])
+        batch.append([bool(x) for x in columns[-2]])
+        batch.append([_decode(x) for x in columns[-1]])
+        yield batch
+
+
+def _write_npz(connection, file_name, view, batch_size):
+    '''Writes a table or view of a CreatureDB to an .npz file with one
+    NumPy array per column
+
+    :param connection: an open sqlite3 Connection to a CreatureDB
+    :param file_name: path of the output file
+    :param view: name of the table or view to export
+    :param batch_size: number of rows fetched from the database at once
+    '''
+    if numpy is None:
+        raise ImportError('pyarrow or numpy is required for columnar export')
+    dtypes = ['<i8', 'U', '<f8'] + ['<i4'] * len(STAT_COLUMNS) + ['?', 'U']
+    chunks = [[] for _ in COLUMNS]
+    for batch in _iter_column_batches(connection, view, batch_size):
+        for i, values in enumerate(batch):
+            # text columns use a fixed-width unicode dtype, not objects,
+            #   so that the file can be loaded without pickle
+            chunks[i].append(numpy.array(values, dtype=dtypes[i]))
+    arrays = {}
+    for i, column in enumerate(COLUMNS):
+        if chunks[i]:
+            arrays[column] = numpy.concatenate(chunks[i])
+        else:
+            arrays[column] = numpy.array([], dtype=dtypes[i])
+    numpy.savez(file_name, **arrays)
+
+
+def load_columnar(file_name):
+    '''Loads a file written by write_columnar(...)
+
+    Arrow IPC files are memory-mapped, so their columns are not copied
+    into memory until they are used.
+
+    :param file_name: path of an .arrow, .parquet or .npz file
+    :returns: a pyarrow.Table, or a dictionary of NumPy arrays keyed by
+              column name for .npz files
+    '''
+    if file_name.endswith(NPZ_EXTENSION):
+        with numpy.load(file_name) as npz_file:
+            return dict((x, npz_file[x]) for x in npz_file.files)
+    if pyarrow is None:
+        raise ImportError('pyarrow is required to load %s' % file_name)
+    if file_name.endswith(PARQUET_EXTENSION):
+        return pyarrow.parquet.read_table(file_name, memory_map=True)
+    source = pyarrow.memory_map(file_name, 'r')
+    return pyarrow.ipc.open_file(source).read_all()
+
+
+def write_columnar(connection, file_name='creature.parquet', view='creatures',
+                   batch_size=5000):
+    '''Writes a table or view of a CreatureDB to a columnar file
+
+    CR values are stored as floats, including CR values stored as
+    strings of the form 'CR X', and stats that are not numbers are
+    stored as db.values.MISSING_VALUE.
+
+    If pyarrow is not installed, the columns are written to an .npz file
+    instead, replacing the extension of file_name.
+
+    :param connection: an open sqlite3 Connection to a CreatureDB
+    :param file_name: path of the output file, whose extension selects
+                      the format: .arrow, .parquet or .npz
+    :param view: name of the table or view to export
+    :param batch_size: number of rows fetched from the database at once
+    :returns: path of the file that was written
+    '''
+    if pyarrow is None or file_name.endswith(NPZ_EXTENSION):
+        file_name = os.path.splitext(file_name)[0] + NPZ_EXTENSION
+        _write_npz(connection, file_name, view, batch_size)
+        return file_name
+
+    schema = _arrow_schema()
+    if file_name.endswith(PARQUET_EXTENSION):
+        writer = pyarrow.parquet.ParquetWriter(file_name, schema)
+        write_batch = lambda x: writer.write_table(
+            pyarrow.Table.from_batches([x]))
+    else:
+        writer = pyarrow.ipc.new_file(file_name, schema)
+        write_batch = writer.write_batch
+    try:
+        for batch in _iter_column_batches(connection, view, batch_size):
+            arrays = [pyarrow.array(x, type=schema[i].type)
+                      for i, x in enumerate(batch)]
+            write_batch(pyarrow.RecordBatch.from_arrays(arrays, COLUMNS))
+    finally:
+        writer.close()
+    return file_name
+
@@ -3,23 +3,141 @@ SQLite database.'''
 
 
 import csv
+import os
 import sqlite3
 
+from collections import namedtuple
 
-__all__ = ['CreatureDB']
+try:
+    from urllib import pathname2url
+except ImportError:
+    from urllib.request import pathname2url
+
+from core.creature import Creature
+from db.snapshot import write_snapshot
+from db.values import register_functions
+
+
+__all__ = ['CONTENT_VIEWS', 'CreatureDB', 'CreatureRow', 'connect_read_only']
+
+
+# Tables or views holding the creatures of each type of content, keyed 
+#   by the names of the crawler's content collection modes
+CONTENT_VIEWS = {
+    'standard': 'creatures_standard',
+    '3pp': 'creatures_3pp',
+    'all': 'creatures',
+}
+
+# Columns describing where a creature came from, added to databases
+#   created before they existed
+SOURCE_COLUMNS = (
+    ('is_3pp', 'is_3pp integer not null default 0'),
+    ('source', 'source varchar(255)'),
+)
+
+# Columns of the "creatures" table, in the order they are read into 
+#   CreatureRow objects
+ROW_COLUMNS = [
+    'id', 'name', 'CR',
+    'hp', 'HD',
+    'ac', 'touch_ac', 'flatfooted_ac',
+    'Fort', 'Ref', 'Will',
+    'Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha',
+    'BAB', 'CMB', 'CMD',
+    'is_3pp', 'source'
+]
+
+
+def connect_read_only(name='creature.db', check_same_thread=True):
+    '''Opens a read-only connection to an existing CreatureDB, with the
+    SQL functions of db.values registered, e.g. cr_value(CR)
+    
+    Unlike a CreatureDB object, the connection does not create or alter
+    tables, so it can be used with databases that can not be written.
+    
+    :param name: path to the database file
+    :param check_same_thread: if False, the connection may be used by 
+                              threads other than the one that opened it
+    :returns: an open sqlite3 Connection
+    :raises IOError: if the database does not exist
+    '''
+    if not os.path.exists(name):
+        raise IOError('no such database: %s' % name)
+    uri = 'file:%s?mode=ro' % pathname2url(os.path.abspath(name))
+    try:
+        connection = sqlite3.connect(uri, uri=True, 
+                                     check_same_thread=check_same_thread)
+    # versions of sqlite3 without URI support can still refuse writes
+    except TypeError:
+        connection = sqlite3.connect(name, 
+                                     check_same_thread=check_same_thread)
+        connection.execute('pragma query_only = 1')
+    connection.text_factory = str
+    register_functions(connection)
+    return connection
+
+
+class CreatureRow(namedtuple('CreatureRow', ROW_COLUMNS)):
+    '''Class representing a single row of the "creatures" table, which
+    is a tuple and so is much cheaper to create than a Creature'''
+    
+    __slots__ = ()
+    
+    def to_creature(self):
+        '''Builds a Creature object from this row
+        
+        :returns: a Creature object
+        '''
+        creature = Creature()
+        creature.name = self.name
+        # CR values are stored as numbers or as strings of the form 'CR X'
+        if isinstance(self.CR, float) and self.CR.is_integer():
+            creature.cr = str(int(self.CR))
+        else:
+            creature.cr = str(self.CR).replace('CR ', '')
+        creature.hp = str(self.hp)
+        creature.hd = str(self.HD)
+        creature.ac['AC'] = str(self.ac)
+        creature.ac['touch'] = str(self.touch_ac)
+        creature.ac['flat-footed'] = str(self.flatfooted_ac)
+        for key in creature.saves.keys():
+            creature.saves[key] = str(getattr(self, key))
+        for key in creature.ability_scores.keys():
+            creature.ability_scores[key] = str(getattr(self, key))
+        creature.bab = str(self.BAB)
+        creature.cmb = str(self.CMB)
+        creature.cmd = str(self.CMD)
+        creature.is_3pp = bool(self.is_3pp)
+        creature.source = self.source or ''
+        return creature
 
 
 class CreatureDB(object):
     '''Class for storing Creature objects in a SQLite database.'''
     
-    def __init__(self, name='creature.db', use_nominal_cr=False):
+    def __init__(self, name='creature.db', use_nominal_cr=False, 
+                 read_only=False):
+        '''Constructs CreatureDB objects
+        
+        :param name: path to the database file
+        :param use_nominal_cr: if True, CR values are stored as strings of
+                               the form 'CR X'
+        :param read_only: if True, an existing database is opened with 
+                          connect_read_only(...), so creatures can be read
+                          and exported but not added
+        '''
         self.min_cr = 0.0
         self.max_cr = float('inf')
         # set flags
         self.using_nominal_cr = use_nominal_cr
         # initialize database
+        if read_only:
+            self.connection = connect_read_only(name)
+            return
         self.connection = sqlite3.connect(name)
         self.connection.text_factory = str
+        register_functions(self.connection)
         self._create_table()
     
     def _construct_table_columns(self):
@@ -45,6 +163,7 @@ class CreatureDB(object):
             'BAB integer', 'CMB integer', 'CMD integer'
         )
         columns = columns + main_entry_columns
+        columns = columns + tuple(x[1] for x in SOURCE_COLUMNS)
         return columns
     
     def _construct_tuple_insert_values(self, creature):
@@ -80,11 +199,13 @@ class CreatureDB(object):
             creature.cmd
         )
         values = values + main_entry_values
+        values = values + (int(bool(creature.is_3pp)), creature.source)
         return values
     
     def _create_table(self):
         '''Creates a SQLite table with the given name for storing 
-        Creature objects if it does not already exist
+        Creature objects if it does not already exist, along with views
+        of its standard and 3rd party creatures
     
         :param name: a string value for the name of the table
         '''
@@ -97,9 +218,22 @@ class CreatureDB(object):
                        %s,%s,%s,
                        %s,%s,%s,
                        %s,%s,%s,%s,%s,%s,%s,
-                       %s, %s, %s
+                       %s, %s, %s,
+                       %s, %s
                    )''' % columns
         self.connection.execute(query)
+        # add source columns to tables created without them
+        cursor = self.connection.execute('pragma table_info(creatures)')
+        existing = set(x[1] for x in cursor)
+        for name, definition in SOURCE_COLUMNS:
+            if name not in existing:
+                self.connection.execute(
+                    'alter table creatures add column ' + definition)
+        # create views
+        query = '''create view if not exists %s as 
+                   select * from creatures where is_3pp = %d'''
+        self.connection.execute(query % (CONTENT_VIEWS['standard'], 0))
+        self.connection.execute(query % (CONTENT_VIEWS['3pp'], 1))
     
     def add_creature(self, creature):
         '''Adds a Creature object as a row in the appropriate table 
@@ -123,7 +257,8 @@ class CreatureDB(object):
                        ac,touch_ac,flatfooted_ac,
                        Fort, Ref, Will,
                        Str,Dex,Con,Int,Wis,Cha,
-                       BAB,CMB,CMD
+                       BAB,CMB,CMD,
+                       is_3pp,source
                    ) 
                    values 
                    (
@@ -132,7 +267,8 @@ class CreatureDB(object):
                        ?,?,?,
                        ?,?,?,
                        ?,?,?,?,?,?,
-                       ?,?,?
+                       ?,?,?,
+                       ?,?
                    )'''
         self.connection.execute(query, values)
     
@@ -143,13 +279,32 @@ class CreatureDB(object):
         self.connection.commit()
         self.connection.close()
     
-    def export_as_csv(self, file_name='creature.csv'):
+    def export_as_columnar(self, file_name='creature.parquet', 
+                           content='all'):
+        '''Exports the data in this object as a columnar file with 
+        numeric CR and stat columns (see db.columnar)
+        
+        :param file_name: the name of the output file, whose extension 
+                          selects the format: .arrow, .parquet or .npz
+        :param content: type of creatures to export, one of the keys of
+                        CONTENT_VIEWS
+        :returns: the name of the file written, which ends in .npz if 
+                  pyarrow is not installed
+        '''
+        # imported here, since it loads pyarrow or NumPy
+        from db.columnar import write_columnar
+        return write_columnar(self.connection, file_name, 
+                              CONTENT_VIEWS[content])
+    
+    def export_as_csv(self, file_name='creature.csv', content='all'):
         '''Exports the data in this object as a .csv file.
         
         :param file_name: the name of the output csv file
+        :param content: type of creatures to export, one of the keys of
+                        CONTENT_VIEWS
         '''
         cursor = self.connection.cursor()
-        data = cursor.execute('select * from creatures')
+        data = cursor.execute('select * from ' + CONTENT_VIEWS[content])
         # write data to output file
         csv_file = open(file_name, 'w')
         writer = csv.writer(csv_file)
@@ -160,14 +315,25 @@ class CreatureDB(object):
             'ac', 'touch_ac', 'flatfooted_ac',
             'Fort', 'Ref', 'Will',
             'Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha',
-            'BAB', 'CMB', 'CMD'
+            'BAB', 'CMB', 'CMD',
+            'is_3pp', 'source'
         ])
         writer.writerows(data)
         csv_file.close()
+    
+    def export_as_snapshot(self, file_name='creature.snap'):
+        '''Exports the data in this object as a memory-mappable binary
+        snapshot (see db.snapshot.CreatureSnapshot)
+        
+        :param file_name: the name of the output snapshot file
+        '''
+        write_snapshot(self.connection, file_name)
         
     def is_creature_in_db(self, creature):
         ''' Determines whether or not a datbase entry exists for a
-        given creature
+        given creature, matching its name, CR and whether it is 3rd 
+        party content, so that a 3rd party creature is not mistaken for
+        a standard creature with the same name and CR
         
         :returns True if entry exists, False otherwise
         '''
@@ -176,9 +342,44 @@ class CreatureDB(object):
         if self.using_nominal_cr:
             creature_cr = 'CR ' + creature.cr
         # query database for creature
-        values = (creature.name, creature_cr)
-        query = '''select * from creatures where name=? and cr=?'''
+        values = (creature.name, creature_cr, int(bool(creature.is_3pp)))
+        query = '''select * from creatures 
+                   where name=? and cr=? and is_3pp=?'''
         cursor = self.connection.cursor()
         cursor.execute(query, values)
         
         return cursor.fetchone() is not None
+    
+    def iter_creatures(self, where=None, params=(), order_by='id', 
+                       batch=500, content='all'):
+        '''Iterates over the rows of the "creatures" table, fetching them
+        from the database in batches
+        
+        Rows are returned as CreatureRow tuples; use their to_creature()
+        method to build Creature objects only where they are needed.
+        
+        :param where: optional SQL condition, e.g. 'CR >= ? and hp > ?'
+        :param params: values of the parameters in the condition
+        :param order_by: SQL ordering of the rows, e.g. 'CR desc, name'
+        :param batch: number of rows fetched from the database at once
+        :param content: type of creatures to read, one of the keys of
+                        CONTENT_VIEWS
+        :returns: generator of CreatureRow objects
+        '''
+        query = 'select %s from %s' % (', '.join(ROW_COLUMNS), 
+                                       CONTENT_VIEWS[content])
+        if where:
+            query = query + ' where ' + where
+        if order_by:
+            query = query + ' order by ' + order_by
+        # use a separate cursor, so that other queries may be run while
+        #   rows are being read
+        cursor = self.connection.cursor()
+        cursor.execute(query, params)
+        make_row = CreatureRow._make
+        while True:
+            rows = cursor.fetchmany(batch)
+            if not rows:
+                break
+            for row in rows:
+                yield make_row(row)
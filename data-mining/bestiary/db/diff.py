@@ -0,0 +1,222 @@
+'''A module containing functions for comparing the creatures stored in
+two CreatureDB files or snapshots and writing the differences as a
+changelog.
+
+Creatures are matched on their (name, CR, is_3pp) key, so a standard
+creature and a 3rd party creature with the same name and CR are compared
+separately. Both inputs are read in key order and merged in a single
+pass, so only the rows being compared are held in memory at any time.
+'''
+
+
+import csv
+import hashlib
+import json
+import sqlite3
+
+from collections import namedtuple
+from itertools import groupby
+
+from db.snapshot import MAGIC, STAT_COLUMNS, CreatureSnapshot
+from db.values import to_cr, to_int
+
+
+__all__ = ['Change', 'diff_creatures', 'diff_files', 'iter_rows',
+           'write_changelog']
+
+
+# --- Constants ---
+ADDED = 'added'
+CHANGED = 'changed'
+REMOVED = 'removed'
+
+SQLITE_MAGIC = b'SQLite format 3\0'
+
+
+# Columns compared for each creature: its source, then its stats
+COMPARED_COLUMNS = ['source'] + STAT_COLUMNS
+
+
+# A single entry of a changelog. For changed creatures, "fields" maps
+#   the name of each changed column to an (old, new) tuple.
+Change = namedtuple('Change', ['kind', 'name', 'CR', 'is_3pp', 'fields'])
+
+# A creature read from a CreatureDB file or snapshot. "values" is ordered
+#   as in COMPARED_COLUMNS.
+_Row = namedtuple('_Row', ['key', 'digest', 'values'])
+
+
+# --- Functions ---
+def _make_row(name, cr, is_3pp, source, stats):
+    '''Creates a _Row from the values of a creature
+
+    :param name: name of the creature
+    :param cr: CR of the creature as a float
+    :param is_3pp: whether the creature is 3rd party content
+    :param source: source of the creature, None if it is not known
+    :param stats: tuple of values ordered as in STAT_COLUMNS
+    :returns: a _Row object
+    '''
+    is_3pp = int(bool(is_3pp))
+    values = (source or '',) + tuple(stats)
+    digest = hashlib.sha1(repr((is_3pp,) + values).encode('utf-8')).digest()
+    return _Row((name, cr, is_3pp), digest, values)
+
+
+def _iter_db_rows(file_name, batch_size=1000):
+    '''Reads every creature in a CreatureDB file in (name, CR, is_3pp)
+    order
+
+    :param file_name: path to a CreatureDB file
+    :param batch_size: number of rows fetched from the database at once
+    :returns: generator of _Row objects
+    '''
+    connection = sqlite3.connect(file_name)
+    connection.text_factory = str
+    # databases created before creatures were tagged by source do not
+    #   have source columns, and only hold standard creatures
+    cursor = connection.execute('pragma table_info(creatures)')
+    columns = set(x[1] for x in cursor)
+    source_columns = ['is_3pp', 'source']
+    if 'is_3pp' not in columns:
+        source_columns = ['0', 'null']
+    query = 'select name, CR, %s from creatures order by name' % \
+        ', '.join(source_columns + STAT_COLUMNS)
+    cursor = connection.cursor()
+    cursor.execute(query)
+
+    def fetch():
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield row
+
+    try:
+        # SQLite orders rows by name; CR values stored as strings do not
+        #   sort numerically, so each run of equal names is sorted by CR
+        #   and then is_3pp here
+        for _, rows in groupby(fetch(), key=lambda x: x[0]):
+            rows = [_make_row(x[0], to_cr(x[1]), x[2], x[3],
+                              [to_int(y) for y in x[4:]]) for x in rows]
+            rows.sort(key=lambda x: x.key)
+            for row in rows:
+                yield row
+    finally:
+        connection.close()
+
+
+def _iter_snapshot_rows(file_name):
+    '''Reads every creature in a snapshot file in (name, CR, is_3pp)
+    order
+
+    Snapshots are stored in id order, so their rows are sorted in memory.
+
+    :param file_name: path to a snapshot file
+    :returns: generator of _Row objects
+    '''
+    with CreatureSnapshot(file_name) as snapshot:
+        rows = [_make_row(x.name, x.CR, x.is_3pp, x.source,
+                          x[-len(STAT_COLUMNS):]) for x in snapshot]
+    rows.sort(key=lambda x: x.key)
+    for row in rows:
+        yield row
+
+
+def iter_rows(file_name):
+    '''Reads every creature in a CreatureDB file or snapshot file in
+    (name, CR, is_3pp) order
+
+    :param file_name: path to a CreatureDB or snapshot file
+    :returns: generator of rows suitable for use with diff_creatures
+    '''
+    with open(file_name, 'rb') as file_:
+        magic = file_.read(len(SQLITE_MAGIC))
+    if magic.startswith(MAGIC):
+        return _iter_snapshot_rows(file_name)
+    if magic == SQLITE_MAGIC:
+        return _iter_db_rows(file_name)
+    raise ValueError('not a CreatureDB or snapshot: %s' % file_name)
+
+
+def diff_creatures(old_rows, new_rows):
+    '''Compares two sequences of creatures sorted by (name, CR, is_3pp)
+
+    A creature that moves between standard and 3rd party content is
+    reported as removed from one and added to the other.
+
+    :param old_rows: rows from iter_rows(...) for the older database
+    :param new_rows: rows from iter_rows(...) for the newer database
+    :returns: generator of Change objects, in (name, CR, is_3pp) order
+    '''
+    old_rows = iter(old_rows)
+    new_rows = iter(new_rows)
+    old = next(old_rows, None)
+    new = next(new_rows, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old.key < new.key):
+            yield Change(REMOVED, old.key[0], old.key[1], old.key[2], {})
+            old = next(old_rows, None)
+        elif old is None or new.key < old.key:
+            yield Change(ADDED, new.key[0], new.key[1], new.key[2], {})
+            new = next(new_rows, None)
+        else:
+            if old.digest != new.digest:
+                fields = {}
+                for i, column in enumerate(COMPARED_COLUMNS):
+                    if old.values[i] != new.values[i]:
+                        fields[column] = (old.values[i], new.values[i])
+                yield Change(CHANGED, new.key[0], new.key[1], new.key[2],
+                             fields)
+            old = next(old_rows, None)
+            new = next(new_rows, None)
+
+
+def diff_files(old_file_name, new_file_name):
+    '''Compares the creatures stored in two CreatureDB or snapshot files
+
+    :param old_file_name: path to the older database
+    :param new_file_name: path to the newer database
+    :returns: generator of Change objects, in (name, CR, is_3pp) order
+    '''
+    return diff_creatures(iter_rows(old_file_name), iter_rows(new_file_name))
+
+
+def write_changelog(changes, file_name='changelog.json', format_='json'):
+    '''Writes a sequence of changes to a file as they are produced
+
+    In 'json' format, each line of the file is a JSON object describing
+    one creature. In 'csv' format, each row describes one changed field,
+    or one added or removed creature.
+
+    :param changes: sequence of Change objects
+    :param file_name: the name of the output file
+    :param format_: either 'json' or 'csv'
+    :returns: the number of changes written
+    '''
+    if format_ not in ('json', 'csv'):
+        raise ValueError('unknown changelog format: %s' % format_)
+    count = 0
+    out = open(file_name, 'w')
+    if format_ == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(['change', 'name', 'CR', 'is_3pp', 'field', 'old',
+                         'new'])
+    for change in changes:
+        if format_ == 'json':
+            entry = change._asdict()
+            entry['fields'] = dict((k, list(v))
+                                   for k, v in change.fields.items())
+            out.write(json.dumps(entry, sort_keys=True) + '\n')
+        elif change.fields:
+            for field in sorted(change.fields.keys()):
+                old, new = change.fields[field]
+                writer.writerow([change.kind, change.name, change.CR,
+                                 change.is_3pp, field, old, new])
+        else:
+            writer.writerow([change.kind, change.name, change.CR,
+                             change.is_3pp, '', '', ''])
+        count = count + 1
+    out.close()
+    return count
@@ -0,0 +1,46 @@
+'''A module containing a function for adding the creatures described in
+a .csv file, such as CREATURES_SPECIAL.csv, to a CreatureDB.
+
+Unlike the crawler, it does not depend on lxml, so .csv files can be
+loaded without importing the modules used to parse d20pfsrd.com.
+'''
+
+
+from core.builders.creature.dict import build as dict_build
+from core.profiling import section
+
+
+__all__ = ['create_db_entries_from_csv']
+
+
+def create_db_entries_from_csv(db_conn, file_name='CREATURES_SPECIAL.csv',
+                               is_3pp=False):
+    '''Creates a row in a CreatureDB object using a .csv file
+    containing creature attributes as described in the documentation
+    for this project
+    
+    :param db_conn: an open Connection object to a CreatureDB
+    :param file_name: name of .csv file containing creature data
+    :param is_3pp: whether or not the file contains 3rd party content
+    '''
+    # get creature data from .csv file
+    creature_keys = []
+    creature_file = open(file_name, 'r')
+    for next_line in creature_file:
+        creature_features = next_line.strip().split(',')
+        # skip first line
+        if next_line.startswith('CR,'):
+            creature_keys = creature_features
+            continue
+        # create Creature object
+        creature_dict = dict(zip(creature_keys, creature_features))
+        with section('parse'):
+            creature = dict_build(creature_dict)
+        creature.source = file_name
+        creature.is_3pp = is_3pp
+        # add Creature object to database
+        with section('DB insert'):
+            db_conn.add_creature(creature)
+        
+    # clean up
+    creature_file.close()
@@ -0,0 +1,346 @@
+'''A module containing a class for running read-only queries against a
+CreatureDB from many threads at once, along with a small HTTP
+server that exposes those queries for testing.'''
+
+
+import json
+import os
+import sqlite3
+import threading
+
+from collections import OrderedDict, namedtuple
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from Queue import Queue
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs, urlparse
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from queue import Queue
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlparse
+
+from db.creatureDB import CONTENT_VIEWS, connect_read_only
+
+
+__all__ = ['CreatureQueryService', 'QueryResult', 'get_query', 'serve']
+
+
+# --- Constants ---
+# Query templates for common lookups, formatted with the table or view
+#   of the type of content being queried. Each query is compiled once
+#   per pooled connection and then reused from sqlite3's statement cache.
+QUERIES = {
+    'by_name': 'select * from %(view)s where name = ?',
+    # '%' and '_' in names are escaped with a backslash
+    'by_name_like': '''select * from %(view)s where name like ? escape '\\'
+                       order by name''',
+    # CR values may be stored as strings of the form 'CR X', so they are
+    #   compared with the cr_value(...) function of db.values
+    'by_cr_range': '''select * from %(view)s 
+                      where cr_value(CR) >= ? and cr_value(CR) <= ?
+                      order by cr_value(CR), name''',
+}
+
+# Columns that may be used with CreatureQueryService.by_stat(...)
+STAT_COLUMNS = [
+    'hp', 'HD', 'ac', 'touch_ac', 'flatfooted_ac',
+    'Fort', 'Ref', 'Will',
+    'Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha',
+    'BAB', 'CMB', 'CMD'
+]
+
+
+# --- Functions ---
+def get_query(key, content='standard'):
+    '''Gets one of the QUERIES for a type of content
+
+    :param key: one of the keys of QUERIES
+    :param content: type of creatures queried, one of the keys of
+                    db.creatureDB.CONTENT_VIEWS
+    :returns: the query
+    :raises ValueError: if the type of content is not known
+    '''
+    if content not in CONTENT_VIEWS:
+        raise ValueError('unknown type of content: %s' % content)
+    return QUERIES[key] % {'view': CONTENT_VIEWS[content]}
+
+
+# --- Classes ---
+# The result of a query: a tuple of the names of its columns and a tuple
+#   of its rows
+QueryResult = namedtuple('QueryResult', ['columns', 'rows'])
+
+
+class _LRUCache(object):
+    '''Class implementing a thread-safe, least-recently-used cache'''
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        '''Removes every item from the cache'''
+        with self._lock:
+            self._items.clear()
+
+    def get(self, key):
+        '''Gets an item from the cache
+
+        :param key: key of the item
+        :returns: the item, or None if it is not in the cache
+        '''
+        with self._lock:
+            value = self._items.pop(key, None)
+            if value is not None:
+                self._items[key] = value
+            return value
+
+    def put(self, key, value):
+        '''Adds an item to the cache, evicting the least recently used
+        item if the cache is full
+
+        :param key: key of the item
+        :param value: the item
+        '''
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            if len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+class CreatureQueryService(object):
+    '''Class for running cached, read-only queries against a CreatureDB
+    using a pool of SQLite connections shared across threads'''
+
+    def __init__(self, name='creature.db', pool_size=4, cache_size=256):
+        '''Constructs CreatureQueryService objects
+
+        :param name: path to an existing CreatureDB file
+        :param pool_size: maximum number of open connections
+        :param cache_size: maximum number of cached query results
+        '''
+        if not os.path.exists(name):
+            raise IOError('database does not exist: %s' % name)
+        self.name = name
+        self._cache = _LRUCache(cache_size)
+        self._signature = self._get_signature()
+        self._signature_lock = threading.Lock()
+        # connections are opened lazily, up to pool_size of them
+        self._pool = Queue()
+        self._pool_lock = threading.Lock()
+        self._pool_size = pool_size
+        self._open_connections = 0
+
+    def _acquire(self):
+        '''Takes a connection from the pool, opening a new one if none
+        are free and the pool is not full
+
+        :returns: an open sqlite3 Connection
+        '''
+        with self._pool_lock:
+            if self._pool.empty() and self._open_connections < self._pool_size:
+                self._open_connections = self._open_connections + 1
+                return self._connect()
+        return self._pool.get()
+
+    def _connect(self):
+        '''Opens a read-only connection to the database that may be used
+        by any thread
+
+        :returns: an open sqlite3 Connection
+        '''
+        return connect_read_only(self.name, check_same_thread=False)
+
+    def _get_signature(self):
+        '''Gets a value that changes whenever the database file does
+
+        :returns: tuple of the file's modification time and size
+        '''
+        stat = os.stat(self.name)
+        return (stat.st_mtime, stat.st_size)
+
+    def _release(self, connection):
+        '''Returns a connection to the pool
+
+        :param connection: a connection obtained from _acquire()
+        '''
+        self._pool.put(connection)
+
+    def close(self):
+        '''Closes every connection in the pool'''
+        with self._pool_lock:
+            while not self._pool.empty():
+                self._pool.get().close()
+                self._open_connections = self._open_connections - 1
+
+    def execute(self, query, values=()):
+        '''Runs a query, using a cached result if the database has not
+        changed since the query was last run
+
+        :param query: SQL query string
+        :param values: tuple of values for the query's parameters
+        :returns: a QueryResult object
+        '''
+        # invalidate cached results if the database file has changed
+        signature = self._get_signature()
+        with self._signature_lock:
+            if signature != self._signature:
+                self._signature = signature
+                self._cache.clear()
+
+        key = (query, tuple(values))
+        result = self._cache.get(key)
+        if result is not None:
+            return result
+
+        connection = self._acquire()
+        try:
+            cursor = connection.execute(query, values)
+            rows = tuple(cursor.fetchall())
+            # each query may select different columns
+            columns = tuple(x[0] for x in cursor.description or ())
+        finally:
+            self._release(connection)
+        result = QueryResult(columns, rows)
+        self._cache.put(key, result)
+        return result
+
+    def by_cr_range(self, min_cr, max_cr, content='standard'):
+        '''Gets all creatures with a CR in the given range
+
+        :param min_cr: minimum CR value
+        :param max_cr: maximum CR value
+        :param content: type of creatures to get, one of the keys of
+                        db.creatureDB.CONTENT_VIEWS
+        :returns: a QueryResult object
+        '''
+        return self.execute(get_query('by_cr_range', content),
+                            (min_cr, max_cr))
+
+    def by_name(self, name, partial=False, content='standard'):
+        '''Gets all creatures with the given name
+
+        :param name: name of the creature
+        :param partial: if True, match names containing the given name
+        :param content: type of creatures to get, one of the keys of
+                        db.creatureDB.CONTENT_VIEWS
+        :returns: a QueryResult object
+        '''
+        if partial:
+            escaped = name.replace('\\', '\\\\').replace('%', '\\%')
+            pattern = '%' + escaped.replace('_', '\\_') + '%'
+            return self.execute(get_query('by_name_like', content),
+                                (pattern,))
+        return self.execute(get_query('by_name', content), (name,))
+
+    def by_stat(self, column, min_value=None, max_value=None,
+                content='standard'):
+        '''Gets all creatures with a stat in the given range
+
+        :param column: name of a column in STAT_COLUMNS
+        :param min_value: minimum value of the stat, or None
+        :param max_value: maximum value of the stat, or None
+        :param content: type of creatures to get, one of the keys of
+                        db.creatureDB.CONTENT_VIEWS
+        :returns: a QueryResult object
+        '''
+        if column not in STAT_COLUMNS:
+            raise ValueError('cannot query on column: %s' % column)
+        if content not in CONTENT_VIEWS:
+            raise ValueError('unknown type of content: %s' % content)
+        lower = min_value if min_value is not None else -2 ** 63
+        upper = max_value if max_value is not None else 2 ** 63 - 1
+        query = '''select * from %s where %s >= ? and %s <= ?
+                   order by %s, name''' % (CONTENT_VIEWS[content], column,
+                                           column, column)
+        return self.execute(query, (lower, upper))
+
+
+# --- HTTP Server ---
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    '''HTTPServer that handles each request in a new thread'''
+    daemon_threads = True
+
+
+class _QueryRequestHandler(BaseHTTPRequestHandler):
+    '''Class that answers GET requests of the forms:
+
+        /creatures?name=NAME[&partial=1]
+        /creatures?min_cr=MIN&max_cr=MAX
+        /creatures?stat=COLUMN[&min=MIN][&max=MAX]
+
+    Each form may also be given a type of content, e.g. &content=3pp;
+    standard creatures are queried by default.
+    '''
+
+    service = None
+
+    def _get_rows(self, params):
+        '''Runs the query described by a request's parameters
+
+        :param params: dictionary of query string parameters
+        :returns: a QueryResult object
+        '''
+        content = params.get('content', 'standard')
+        if 'name' in params:
+            return self.service.by_name(params['name'], 'partial' in params,
+                                        content)
+        if 'min_cr' in params or 'max_cr' in params:
+            return self.service.by_cr_range(
+                float(params.get('min_cr', 0)),
+                float(params.get('max_cr', float('inf'))), content)
+        if 'stat' in params:
+            min_value = params.get('min')
+            max_value = params.get('max')
+            return self.service.by_stat(
+                params['stat'],
+                int(min_value) if min_value is not None else None,
+                int(max_value) if max_value is not None else None,
+                content)
+        raise ValueError('no query given')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/creatures':
+            self.send_error(404)
+            return
+        params = dict((k, v[0]) for k, v in parse_qs(url.query).items())
+        try:
+            result = self._get_rows(params)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        # e.g. the database is missing, locked or corrupt
+        except (EnvironmentError, sqlite3.Error) as e:
+            self.send_error(500, str(e))
+            return
+        body = json.dumps([dict(zip(result.columns, x))
+                           for x in result.rows])
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(service, host='127.0.0.1', port=8000):
+    '''Creates an HTTP server that answers queries using the given
+    service. The caller is responsible for calling serve_forever().
+
+    :param service: a CreatureQueryService object
+    :param host: host name to listen on
+    :param port: port to listen on, 0 to choose any free port
+    :returns: the HTTP server
+    '''
+    class QueryRequestHandler(_QueryRequestHandler):
+        '''Request handler bound to a particular service'''
+    QueryRequestHandler.service = service
+    return _ThreadingHTTPServer((host, port), QueryRequestHandler)
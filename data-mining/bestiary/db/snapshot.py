@@ -0,0 +1,217 @@
+'''A module containing functions and classes for storing the contents
+of a CreatureDB in a compact, fixed-width binary file that can be
+memory-mapped for instant, read-only access.
+
+A snapshot file consists of a header, followed by one fixed-width
+record per creature, followed by a string table holding the UTF-8
+encoded names and sources of every creature. Each source is stored once,
+however many creatures share it.
+
+Version 2 snapshots store whether each creature is third party content
+and its source, so that snapshots of crawls of every kind of content can
+be told apart; version 1 snapshots must be exported again.
+'''
+
+
+import mmap
+import struct
+
+from collections import namedtuple
+
+from db.values import to_cr, to_int
+
+
+__all__ = ['CreatureSnapshot', 'SnapshotRow', 'write_snapshot']
+
+
+# --- Constants ---
+MAGIC = b'PFBESTRY'
+VERSION = 2
+
+# Integer columns of the "creatures" table, in the order they are
+#   stored in each record
+STAT_COLUMNS = [
+    'hp', 'HD',
+    'ac', 'touch_ac', 'flatfooted_ac',
+    'Fort', 'Ref', 'Will',
+    'Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha',
+    'BAB', 'CMB', 'CMD'
+]
+
+# magic, version, number of records, offset of string table
+HEADER = struct.Struct('<8sIIQ')
+# id, CR, is_3pp, offset and length of name in string table, offset
+#   and length of source in string table, stats
+RECORD = struct.Struct('<idiIIII%di' % len(STAT_COLUMNS))
+# position of the name's offset and length within a record
+NAME_POSITION = struct.calcsize('<idi')
+
+# Layout of a record as a NumPy dtype, used for zero-copy array views
+RECORD_DTYPE = [
+    ('id', '<i4'), ('CR', '<f8'), ('is_3pp', '<i4'),
+    ('name_offset', '<u4'), ('name_length', '<u4'),
+    ('source_offset', '<u4'), ('source_length', '<u4')
+] + [(x, '<i4') for x in STAT_COLUMNS]
+
+
+# A single creature read from a snapshot
+SnapshotRow = namedtuple('SnapshotRow',
+                         ['id', 'name', 'CR', 'is_3pp', 'source'] +
+                         STAT_COLUMNS)
+
+
+# --- Functions ---
+def _encode(text):
+    '''Encodes a string stored in the string table
+
+    :param text: a string read from the database
+    :returns: the string as UTF-8 encoded bytes
+    '''
+    if isinstance(text, bytes):
+        return text
+    return text.encode('utf-8')
+
+
+def write_snapshot(connection, file_name='creature.snap', batch_size=1000):
+    '''Writes the "creatures" table of a SQLite database to a snapshot
+    file
+
+    :param connection: an open sqlite3 Connection to a CreatureDB
+    :param file_name: the name of the output snapshot file
+    :param batch_size: number of rows fetched from the database at once
+    '''
+    query = 'select id, name, CR, is_3pp, source, %s from creatures ' \
+        'order by id' % ', '.join(STAT_COLUMNS)
+    cursor = connection.cursor()
+    cursor.execute(query)
+
+    strings = []
+    strings_size = 0
+    # offset of each source in the string table
+    sources = {}
+    count = 0
+    snapshot_file = open(file_name, 'wb')
+    # reserve space for the header, which is written last
+    snapshot_file.write(b'\0' * HEADER.size)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        records = []
+        for row in rows:
+            name = _encode(row[1])
+            name_offset = strings_size
+            strings.append(name)
+            strings_size = strings_size + len(name)
+            source = _encode(row[4] or '')
+            if source not in sources:
+                sources[source] = strings_size
+                strings.append(source)
+                strings_size = strings_size + len(source)
+            stats = [to_int(x) for x in row[5:]]
+            records.append(RECORD.pack(row[0], to_cr(row[2]),
+                                       int(bool(row[3])),
+                                       name_offset, len(name),
+                                       sources[source], len(source),
+                                       *stats))
+        snapshot_file.write(b''.join(records))
+        count = count + len(rows)
+    # write string table followed by the header
+    strings_offset = HEADER.size + count * RECORD.size
+    snapshot_file.write(b''.join(strings))
+    snapshot_file.seek(0)
+    snapshot_file.write(HEADER.pack(MAGIC, VERSION, count, strings_offset))
+    snapshot_file.close()
+
+
+# --- Classes ---
+class CreatureSnapshot(object):
+    '''Class providing read-only, random access to the creatures stored
+    in a memory-mapped snapshot file'''
+
+    def __init__(self, file_name='creature.snap'):
+        '''Constructs CreatureSnapshot objects
+
+        :param file_name: path to a file created by write_snapshot
+        '''
+        snapshot_file = open(file_name, 'rb')
+        try:
+            self._map = mmap.mmap(snapshot_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        finally:
+            snapshot_file.close()
+        magic, version, count, strings_offset = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError('not a creature snapshot: %s' % file_name)
+        if version != VERSION:
+            self._map.close()
+            raise ValueError('unsupported snapshot version %d, export the '
+                             'snapshot again: %s' % (version, file_name))
+        self.count = count
+        self._strings_offset = strings_offset
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getitem__(self, index):
+        if index < 0:
+            index = index + self.count
+        if index < 0 or index >= self.count:
+            raise IndexError('snapshot index out of range')
+        values = RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+        name = self._read_name(values[3], values[4])
+        source = self._read_name(values[5], values[6])
+        return SnapshotRow(values[0], name, values[1], values[2], source,
+                           *values[7:])
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def __len__(self):
+        return self.count
+
+    def _read_name(self, offset, length):
+        '''Reads a name or source from the string table
+
+        :param offset: offset of the string within the string table
+        :param length: length of the string in bytes
+        :returns: the string
+        '''
+        start = self._strings_offset + offset
+        name = self._map[start:start + length]
+        if not isinstance(name, str):
+            name = name.decode('utf-8')
+        return name
+
+    def as_array(self):
+        '''Gets a NumPy structured array that shares memory with the
+        snapshot file. Names and sources are not included; use
+        name(...) or indexing to look them up.
+
+        The snapshot can not be closed while the array is in use.
+
+        :returns: NumPy array with one record per creature
+        '''
+        import numpy
+        return numpy.frombuffer(self._map, dtype=numpy.dtype(RECORD_DTYPE),
+                                count=self.count, offset=HEADER.size)
+
+    def close(self):
+        '''Unmaps the snapshot file'''
+        self._map.close()
+
+    def name(self, index):
+        '''Gets the name of the creature with the given index
+
+        :param index: index of a record in the snapshot
+        :returns: the name of the creature
+        '''
+        offset = HEADER.size + index * RECORD.size
+        values = struct.unpack_from('<II', self._map, offset + NAME_POSITION)
+        return self._read_name(values[0], values[1])
@@ -0,0 +1,86 @@
+'''A module containing functions for converting the values stored in the
+columns of a CreatureDB into numbers.
+
+CR values are stored as numbers, or as strings of the form 'CR X' in
+databases created with nominal CR values, and stats scraped from
+d20pfsrd.com are not always numbers.
+'''
+
+
+import re
+
+
+__all__ = ['MISSING_VALUE', 'register_functions', 'to_cr', 'to_int']
+
+
+# --- Constants ---
+# Value used for stats that could not be parsed as integers
+MISSING_VALUE = -1
+
+# Matches the integer at the start of a value, e.g. '12 (touch 10)'
+INTEGER_PATTERN = re.compile(r'\s*([-+]?\d+)')
+
+
+# --- Functions ---
+def _sql_cr(value):
+    '''Implements the cr_value(...) SQL function
+
+    :param value: value of the CR column
+    :returns: CR as a float, None if it can not be parsed
+    '''
+    try:
+        return to_cr(value)
+    except (AttributeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def register_functions(connection):
+    '''Registers SQL functions with a connection to a CreatureDB:
+    cr_value(CR) gets a CR as a number, however it is stored, or NULL if
+    it can not be parsed, so that CR values can be compared and sorted
+    numerically in queries
+
+    :param connection: an open sqlite3 Connection
+    '''
+    connection.create_function('cr_value', 1, _sql_cr)
+
+
+def to_cr(value):
+    '''Converts a value from the CR column into a float, handling CR
+    values stored as strings of the form 'CR X'
+
+    :param value: value of the CR column
+    :returns: CR as a float
+    :raises ValueError: if the value is not a CR
+    '''
+    if isinstance(value, (int, float)):
+        return float(value)
+    cr_text = value.replace('CR', '').strip()
+    if '/' in cr_text:
+        numerator, denominator = cr_text.split('/')
+        return float(numerator) / float(denominator)
+    return float(cr_text)
+
+
+def to_int(value, default=MISSING_VALUE):
+    '''Converts a value from one of the stat columns into an integer,
+    using the integer at the start of strings such as '12 (touch 10)'
+
+    :param value: value of a stat column
+    :param default: value returned if the value does not start with a
+                    number, e.g. for a dash or None
+    :returns: value as an integer
+    '''
+    try:
+        return int(float(value))
+    except (OverflowError, TypeError, ValueError):
+        pass
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'replace')
+    try:
+        match = INTEGER_PATTERN.match(value)
+    except TypeError:
+        return default
+    if match is None:
+        return default
+    return int(match.group(1))
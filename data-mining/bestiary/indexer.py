@@ -15,7 +15,7 @@ __all__ = ['create_index_file', 'create_special_index_file']
 
 # --- Constants ---
 BASE_HREF = "http://www.d20pfsrd.com/"
-CREATURE_BY_CR_URL = 
+CREATURE_BY_CR_URL = \
     "http://www.d20pfsrd.com/bestiary/-bestiary-by-challenge-rating"
 
 
@@ -54,7 +54,7 @@ def create_special_index_file(file_name='INDEX_SPECIAL.txt'):
     for line in hub_file:
         html_tree = parse(line.strip())
         doc = html_tree.getroot()
-        link_table = 
+        link_table = \
             doc.cssselect('.sites-tile-name-content-1 td:nth-child(1) a')
         # write links to output file
         for link in link_table:
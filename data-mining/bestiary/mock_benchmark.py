@@ -0,0 +1,184 @@
+'''This module contains a script for measuring the throughput and retry
+behavior of the crawler against a MockServer, which serves a synthetic
+Bestiary or a saved copy of d20pfsrd.com with injected latency and
+faults'''
+
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import crawler
+import synthetic
+from db.creatureDB import CreatureDB
+from mock_server import MockServer
+
+
+__all__ = []
+
+
+# --- Constants ---
+# Faults are only injected into creature pages by default, since index
+#   pages that fail every attempt are skipped along with their creatures
+CREATURE_PAGE_PATTERN = 'monster-listings/'
+
+
+# --- Functions ---
+def _read_links(file_name):
+    '''Gets the links listed in a file, if it exists
+
+    :param file_name: path of a file such as INDEX.txt
+    :returns: list of links
+    '''
+    if not os.path.exists(file_name):
+        return []
+    with open(file_name, 'r') as list_file:
+        return [x.strip() for x in list_file if x.strip()]
+
+
+def crawl_server(server, indeces, special_links, workers):
+    '''Crawls the pages served by a MockServer into an in-memory
+    CreatureDB
+
+    :param server: a started MockServer object
+    :param indeces: links to index pages, starting with crawler.SITE_URL
+    :param special_links: links to creature pages, starting with
+                          crawler.SITE_URL
+    :param workers: number of threads that download pages
+    :returns: dictionary describing the crawl
+    '''
+    server.reset_stats()
+    db_conn = CreatureDB(':memory:')
+    crawler.BASE_URL = server.url
+    start = time.time()
+    try:
+        failures = []
+        links = crawler.iter_crawl_links(indeces, special_links,
+                                         crawler.MODE_ALL, failures)
+        failures.extend(crawler.crawl(db_conn, links, crawler.MODE_ALL,
+                                      workers))
+    finally:
+        crawler.BASE_URL = crawler.SITE_URL
+    seconds = time.time() - start
+    stored = db_conn.connection.execute(
+        'select count(*) from creatures').fetchone()[0]
+    db_conn.connection.close()
+
+    stats = server.stats
+    pages = len(stats['paths'])
+    return {
+        'workers': workers,
+        'stored': stored,
+        'failed': len(failures),
+        'seconds': seconds,
+        'pages/s': pages / seconds,
+        'MB/s': stats['bytes'] / seconds / 1e6,
+        'requests': stats['requests'],
+        # requests beyond the first for each page
+        'retries': stats['requests'] - pages,
+        '429': stats['status'].get(429, 0),
+        '500': stats['status'].get(500, 0),
+        'truncated': stats['truncated'],
+    }
+
+
+def parse_cmd_args():
+    '''Parses command line arguments
+
+    :returns map data structure containing each argument and associated value
+    '''
+    # create parser for command line arguments
+    help_desc = 'Benchmarks the crawler against a local mock d20pfsrd.com'
+    parser = argparse.ArgumentParser(description=help_desc)
+    # -argument- pages to serve
+    parser.add_argument('--root',
+                        help='saved copy of d20pfsrd.com to serve, with '
+                             'INDEX.txt and INDEX_SPECIAL.txt listing its '
+                             'links; a synthetic Bestiary by default')
+    parser.add_argument('--count', metavar='N', type=int, default=2000,
+                        help='number of synthetic creature pages')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the random number generators')
+    # -argument- crawler threads
+    parser.add_argument('--workers', metavar='N', type=int, nargs='+',
+                        default=[crawler.FETCH_WORKERS],
+                        help='numbers of download threads to compare')
+    # -argument- network conditions
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='seconds to wait before each response')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='maximum seconds of random extra latency')
+    parser.add_argument('--bandwidth', type=int,
+                        help='maximum bytes per second of each response')
+    # -argument- faults
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of requests answered with 500')
+    parser.add_argument('--429-rate', dest='throttle_rate', type=float,
+                        default=0.0,
+                        help='fraction of requests answered with 429')
+    parser.add_argument('--truncate-rate', type=float, default=0.0,
+                        help='fraction of pages cut off part way through')
+    parser.add_argument('--fault-indexes', action='store_true',
+                        help='also injects faults into index pages')
+    # parse command line arguments
+    args = vars(parser.parse_args())
+
+    return args
+
+
+def write_results(results, out_file=sys.stdout):
+    '''Writes a table of crawl results
+
+    :param results: list of dictionaries returned by crawl_server(...)
+    :param out_file: file-like object to write the table to
+    '''
+    columns = ['workers', 'stored', 'failed', 'seconds', 'pages/s', 'MB/s',
+               'requests', 'retries', '429', '500', 'truncated']
+    out_file.write(' '.join('%9s' % x for x in columns) + '\n')
+    for result in results:
+        values = []
+        for column in columns:
+            if isinstance(result[column], float):
+                values.append('%9.2f' % result[column])
+            else:
+                values.append('%9d' % result[column])
+        out_file.write(' '.join(values) + '\n')
+
+
+# --- Script ---
+if __name__ == '__main__':
+    args = parse_cmd_args()
+
+    # write a synthetic Bestiary whose links have the shape of the links
+    #   to d20pfsrd.com, unless a saved copy is given
+    root = args['root']
+    if root is None:
+        root = tempfile.mkdtemp()
+        creatures = synthetic.iter_creatures(args['count'], args['seed'])
+        synthetic.write_site(root, creatures, crawler.SITE_URL,
+                             special_rate=0.01, seed=args['seed'])
+    indeces = _read_links(os.path.join(root, 'INDEX.txt'))
+    special_links = _read_links(os.path.join(root, 'INDEX_SPECIAL.txt'))
+    crawler.THIRD_PARTY_PUBLISHERS = synthetic.THIRD_PARTY_PUBLISHERS
+
+    fault_pattern = CREATURE_PAGE_PATTERN
+    if args['fault_indexes']:
+        fault_pattern = None
+    server = MockServer(root, latency=args['latency'],
+                        jitter=args['jitter'], bandwidth=args['bandwidth'],
+                        error_rate=args['error_rate'],
+                        throttle_rate=args['throttle_rate'],
+                        truncate_rate=args['truncate_rate'],
+                        fault_pattern=fault_pattern, seed=args['seed'])
+    server.start()
+    try:
+        results = [crawl_server(server, indeces, special_links, x)
+                   for x in args['workers']]
+    finally:
+        server.stop()
+        if args['root'] is None:
+            shutil.rmtree(root)
+    write_results(results)
@@ -0,0 +1,343 @@
+'''A module containing an HTTP server that stands in for d20pfsrd.com,
+serving a saved or synthetic tree of Bestiary pages with configurable
+latency, bandwidth and faults, so that the crawler can be tested and
+benchmarked without accessing the live site.
+
+Pages are served from a root directory using the paths of their URLs,
+e.g. the page linked as http://www.d20pfsrd.com//bestiary/-bestiary-by-
+challenge-rating/-bestiary-cr-1-2 is read from
+<root>/bestiary/-bestiary-by-challenge-rating/-bestiary-cr-1-2. Trees
+written by synthetic.write_site(...) can be served as they are.
+'''
+
+
+import argparse
+import os
+import random
+import re
+import threading
+import time
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import unquote
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import unquote
+
+
+__all__ = ['MockServer']
+
+
+# --- Constants ---
+# Number of bytes written at once when bandwidth is limited
+CHUNK_SIZE = 4096
+
+# Faults injected into responses
+FAULT_ERROR = 'error'         # 500 Internal Server Error
+FAULT_THROTTLE = 'throttle'   # 429 Too Many Requests
+FAULT_TRUNCATE = 'truncate'   # connection closed part way through a page
+
+# Reasons sent with the status codes of responses without a page
+STATUS_MESSAGES = {
+    404: 'Not Found',
+    429: 'Too Many Requests',
+    500: 'Internal Server Error',
+}
+
+
+# --- Functions ---
+def parse_cmd_args():
+    '''Parses command line arguments
+
+    :returns map data structure containing each argument and associated value
+    '''
+    # create parser for command line arguments
+    help_desc = 'Serves a tree of Bestiary pages in place of d20pfsrd.com'
+    parser = argparse.ArgumentParser(description=help_desc)
+    # -argument- directory of pages
+    parser.add_argument('root', help='directory containing the pages')
+    # -argument- address of the server
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000,
+                        help='port to listen on (default: 8000)')
+    # -argument- network conditions
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds to wait before each response')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='maximum seconds of random extra latency')
+    parser.add_argument('--bandwidth', type=int,
+                        help='maximum bytes per second of each response')
+    # -argument- faults
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of requests answered with 500')
+    parser.add_argument('--429-rate', dest='throttle_rate', type=float,
+                        default=0.0,
+                        help='fraction of requests answered with 429')
+    parser.add_argument('--truncate-rate', type=float, default=0.0,
+                        help='fraction of pages cut off part way through')
+    parser.add_argument('--retry-after', type=int, default=1,
+                        help='Retry-After seconds of 429 responses')
+    parser.add_argument('--fault-pattern',
+                        help='only inject faults into paths matching this '
+                             'regular expression')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the random number generator')
+    # parse command line arguments
+    args = vars(parser.parse_args())
+
+    return args
+
+
+# --- Classes ---
+class _MockHandler(BaseHTTPRequestHandler):
+    '''Class handling the requests made to a MockServer'''
+
+    def _send_body(self, body):
+        '''Writes the body of a response, limited to the server's
+        bandwidth
+
+        :param body: the body as a string of bytes
+        '''
+        bandwidth = self.server.bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        for i in range(0, len(body), CHUNK_SIZE):
+            chunk = body[i:i + CHUNK_SIZE]
+            self.wfile.write(chunk)
+            self.wfile.flush()
+            time.sleep(float(len(chunk)) / bandwidth)
+
+    def _send_status(self, status, headers=()):
+        '''Sends a response without a page
+
+        :param status: HTTP status code
+        :param headers: list of (name, value) tuples of extra headers
+        '''
+        message = STATUS_MESSAGES[status]
+        body = ('%d %s\n' % (status, message)).encode('ascii')
+        self.server.record(self.path, status, len(body))
+        self.send_response(status, message)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        delay = server.latency
+        if server.jitter:
+            delay = delay + server.random() * server.jitter
+        if delay:
+            time.sleep(delay)
+
+        file_name = server.get_file_name(self.path)
+        if file_name is None:
+            self._send_status(404)
+            return
+        fault = server.choose_fault(self.path)
+        if fault == FAULT_ERROR:
+            self._send_status(500)
+            return
+        if fault == FAULT_THROTTLE:
+            self._send_status(429, [('Retry-After', str(server.retry_after))])
+            return
+
+        with open(file_name, 'rb') as page_file:
+            body = page_file.read()
+        length = len(body)
+        if fault == FAULT_TRUNCATE:
+            # the full length is promised, but only part of it is sent
+            #   before the connection is closed
+            body = body[:length // 2]
+            self.close_connection = True
+        server.record(self.path, 200, len(body), fault == FAULT_TRUNCATE)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+        self._send_body(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class MockServer(ThreadingMixIn, HTTPServer):
+    '''Class representing a local HTTP server that serves a tree of
+    Bestiary pages, each request being handled by its own thread'''
+
+    daemon_threads = True
+
+    def __init__(self, root, address=('127.0.0.1', 0), latency=0.0,
+                 jitter=0.0, bandwidth=None, error_rate=0.0,
+                 throttle_rate=0.0, truncate_rate=0.0, retry_after=1,
+                 fault_pattern=None, seed=0, verbose=False):
+        '''Constructs MockServer objects
+
+        Faults are chosen at random for each request, so the same
+        request may fail and then succeed when it is retried.
+
+        :param root: directory containing the pages to serve
+        :param address: (host, port) tuple; port 0 chooses a free port
+        :param latency: seconds to wait before responding to a request
+        :param jitter: maximum number of seconds of random extra latency
+        :param bandwidth: maximum bytes per second sent in each response,
+                          None for no limit
+        :param error_rate: probability of responding with a 500 error
+        :param throttle_rate: probability of responding with a 429 error
+        :param truncate_rate: probability of closing the connection after
+                              sending half of a page
+        :param retry_after: seconds given in the Retry-After header of
+                            429 responses
+        :param fault_pattern: optional regular expression; if given,
+                              faults are only injected into requests
+                              whose paths match it
+        :param seed: seed of the random number generator
+        :param verbose: if True, each request is logged to stderr
+        '''
+        HTTPServer.__init__(self, address, _MockHandler)
+        self.root = os.path.abspath(root)
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.truncate_rate = truncate_rate
+        self.retry_after = retry_after
+        self.fault_pattern = None
+        if fault_pattern is not None:
+            self.fault_pattern = re.compile(fault_pattern)
+        self.verbose = verbose
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reset_stats()
+
+    def choose_fault(self, path):
+        '''Chooses the fault injected into the response to a request
+
+        :param path: path of the request
+        :returns: one of FAULT_ERROR, FAULT_THROTTLE or FAULT_TRUNCATE,
+                  None if the request succeeds
+        '''
+        if self.fault_pattern is not None and \
+                not self.fault_pattern.search(path):
+            return None
+        value = self.random()
+        for fault, rate in [(FAULT_ERROR, self.error_rate),
+                            (FAULT_THROTTLE, self.throttle_rate),
+                            (FAULT_TRUNCATE, self.truncate_rate)]:
+            if value < rate:
+                return fault
+            value = value - rate
+        return None
+
+    def get_file_name(self, path):
+        '''Gets the file served for the path of a request
+
+        Repeated slashes are ignored, as in the links of INDEX.txt, and
+        paths of directories are served from their index.html files.
+
+        :param path: path of the request
+        :returns: path of the file, None if there is no such file
+        '''
+        path = unquote(path.split('?', 1)[0])
+        path = re.sub('/+', '/', path).strip('/')
+        file_name = os.path.normpath(os.path.join(self.root, path))
+        # the root itself, or a path under it, but not a sibling whose
+        #   name starts with the root's name
+        if file_name != self.root and \
+                not file_name.startswith(os.path.join(self.root, '')):
+            return None
+        if os.path.isdir(file_name):
+            file_name = os.path.join(file_name, 'index.html')
+        if not os.path.isfile(file_name):
+            return None
+        return file_name
+
+    def random(self):
+        '''Gets the next number from the server's random number generator,
+        which is shared by every request thread
+
+        :returns: a float in the range [0.0, 1.0)
+        '''
+        with self._lock:
+            return self._random.random()
+
+    def record(self, path, status, size, truncated=False):
+        '''Records a response in the server's statistics, before it is
+        sent
+
+        :param path: path of the request
+        :param status: HTTP status code of the response
+        :param size: number of bytes in the body of the response
+        :param truncated: whether or not the body was truncated
+        '''
+        with self._lock:
+            stats = self.stats
+            stats['requests'] = stats['requests'] + 1
+            stats['bytes'] = stats['bytes'] + size
+            stats['status'][status] = stats['status'].get(status, 0) + 1
+            stats['paths'][path] = stats['paths'].get(path, 0) + 1
+            if truncated:
+                stats['truncated'] = stats['truncated'] + 1
+
+    def reset_stats(self):
+        '''Clears the server's statistics
+
+        The statistics are a dictionary with the number of 'requests',
+        the number of body 'bytes' sent, the number of responses with
+        each 'status', the number of requests for each path in 'paths'
+        and the number of 'truncated' responses.
+        '''
+        with self._lock:
+            self.stats = {
+                'requests': 0, 'bytes': 0, 'truncated': 0,
+                'status': {}, 'paths': {},
+            }
+
+    def start(self):
+        '''Starts serving requests in a background thread
+
+        :returns: the URL of the server, e.g. 'http://127.0.0.1:8000'
+        '''
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        '''Stops a server started with start() and closes its socket'''
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    @property
+    def url(self):
+        '''URL of the server, e.g. 'http://127.0.0.1:8000' '''
+        return 'http://%s:%d' % self.server_address[:2]
+
+
+# --- Script ---
+if __name__ == '__main__':
+    args = parse_cmd_args()
+    server = MockServer(args['root'], (args['host'], args['port']),
+                        args['latency'], args['jitter'], args['bandwidth'],
+                        args['error_rate'], args['throttle_rate'],
+                        args['truncate_rate'], args['retry_after'],
+                        args['fault_pattern'], args['seed'], verbose=True)
+    print('serving %s at %s' % (server.root, server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
@@ -0,0 +1,474 @@
+'''A module containing functions for generating a synthetic Bestiary of
+random creatures, both as d20pfsrd.com Bestiary pages with the index
+pages that link to them and as .csv files in the format of
+CREATURES_SPECIAL.csv
+
+The same seed always produces the same creatures, so that the crawler,
+the d20pfsrd builder, CreatureDB and its exports can be benchmarked
+offline with production-like volumes of data.
+'''
+
+
+import argparse
+import csv
+import os
+import random
+
+
+__all__ = ['iter_creatures', 'render_page', 'write_csv', 'write_site']
+
+
+# --- Constants ---
+# Columns of CREATURES_SPECIAL.csv
+CSV_COLUMNS = [
+    'CR', 'name', 'hp', 'HD',
+    'AC', 'touch', 'flat-footed',
+    'Fort', 'Ref', 'Will',
+    'Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha',
+    'BAB', 'CMB', 'CMD'
+]
+
+# Challenge Ratings of generated creatures
+FRACTIONAL_CRS = ['1/8', '1/6', '1/4', '1/3', '1/2']
+MAX_CR = 25
+
+# CR bands of the generated index pages as (low, high) tuples. The last
+#   band includes every higher CR; it is given an explicit high bound,
+#   since page numbers are appended to the links of index pages and a
+#   link such as '-bestiary-cr-21-22' would be read as the band 21-22
+CR_BANDS = [(x, x + 1) for x in range(1, 20, 2)] + [(21, MAX_CR)]
+
+# Paths of generated pages, relative to the root of the site
+INDEX_PATH = 'bestiary/-bestiary-by-challenge-rating/-bestiary-cr-'
+LISTING_PATH = 'bestiary/monster-listings/'
+
+# The maximum number of creatures linked from a single index page, and
+#   the number of creature pages written to each directory
+LINKS_PER_INDEX = 500
+PAGES_PER_DIR = 1000
+
+# Creature types, their Hit Die sizes, and types without Con or Int
+HIT_DICE = {
+    'aberrations': 8, 'animals': 8, 'constructs': 10, 'dragons': 12,
+    'fey': 6, 'humanoids': 8, 'magical-beasts': 10,
+    'monstrous-humanoids': 10, 'oozes': 8, 'outsiders': 10,
+    'plants': 8, 'undead': 8, 'vermin': 8
+}
+CREATURE_TYPES = sorted(HIT_DICE.keys())
+NO_CON_TYPES = ['constructs', 'undead']
+NO_INT_TYPES = ['oozes', 'vermin']
+
+# Parts of generated names; every syllable has the same length, so that
+#   names built from different numbers are different
+NAME_SYLLABLES = [x + y for x in 'bdgklmnrstvz' for y in 'aeiou']
+NAME_NOUNS = [
+    'Beast', 'Behemoth', 'Drake', 'Fiend', 'Golem', 'Hag', 'Hound',
+    'Lurker', 'Serpent', 'Shade', 'Spawn', 'Stalker', 'Troll', 'Wight'
+]
+
+# Publishers named in the footers of generated pages; the 3rd party
+#   publishers are listed in 3PP.txt
+PUBLISHER = 'Paizo Publishing'
+THIRD_PARTY_PUBLISHERS = [
+    '4 Winds Fantasy Gaming', 'Frog God Games', 'Necromancer Games'
+]
+
+# Templates of generated pages
+PAGE = '''<html><head><title>%(name)s - d20PFSRD</title></head><body>
+<div id="sites-nav"><ul>%(nav)s</ul></div>
+<table><tr><td class="sites-layout-tile"><table><tr>
+<td>%(name)s CR %(cr_text)s</td></tr></table></td></tr></table>
+<div class="sites-canvas-main"><p><b>%(name)s</b></p>
+<p>XP %(xp)d<br/>N Medium %(type)s<br/>Init %(Dex_mod)s; Senses Perception +%(HD)s</p>
+<p><b>DEFENSE</b></p>
+<p>AC %(AC)s, touch %(touch)s, flat-footed %(flat-footed)s (%(Dex_mod)s Dex, +%(natural)d natural)<br/>
+hp %(hp)s (%(HD)sd%(hit_die)d%(hp_mod)s)<br/>
+Fort %(Fort_text)s, Ref %(Ref_text)s, Will %(Will_text)s<br/>
+Defensive Abilities ferocity; DR %(dr)d/magic; Immune fire; Resist cold %(resist)d<br/>
+Vulnerabilities sonic; Weakness light</p>
+<p><b>OFFENSE</b></p>
+<p>Speed 30 ft.<br/>Melee bite %(attack)s (1d6%(Str_mod)s)</p>
+<p><b>STATISTICS</b></p>
+<p>Str %(Str_text)s, Dex %(Dex_text)s, Con %(Con_text)s, Int %(Int_text)s, Wis %(Wis_text)s, Cha %(Cha_text)s<br/>
+Base Atk +%(BAB)s; CMB %(CMB_text)s; CMD %(CMD)s<br/>
+Feats Toughness, Weapon Focus (bite)<br/>
+Skills Perception +%(HD)s, Stealth %(Dex_mod)s</p>
+<p><b>ECOLOGY</b></p>
+<p>Environment any<br/>Organization solitary<br/>Treasure standard</p>
+<p>%(description)s</p></div>
+<div class="sites-tile-name-footer">Copyright %(publisher)s</div>
+</body></html>
+'''
+INDEX_HEADER = '''<html><head><title>%s - d20PFSRD</title></head><body>
+<div class="sites-canvas-main"><ul>
+'''
+INDEX_LINK = '<li><div><a href="%s">%s</a></div></li>\n'
+INDEX_FOOTER = '''</ul></div>
+</body></html>
+'''
+
+# Words of the descriptions and navigation links of generated pages
+DESCRIPTION_WORDS = [
+    'ancient', 'cave', 'claws', 'dark', 'hunts', 'lair', 'prey', 'ruins',
+    'scales', 'swamp', 'teeth', 'the', 'this', 'travelers', 'wanders'
+]
+NAV_LINKS = 30
+
+
+# --- Functions ---
+def _format_cr(cr_text):
+    '''Formats a Challenge Rating as it is read from a Bestiary page by
+    core.builders.creature.d20pfsrd
+
+    :param cr_text: CR as written on a Bestiary page, e.g. '1/3'
+    :returns: CR as a string, e.g. '0.33'
+    '''
+    if '/' in cr_text:
+        numerator, denominator = cr_text.split('/')
+        return str(float(numerator) / float(denominator))[:4]
+    return cr_text
+
+
+def _format_bonus(value):
+    '''Formats a bonus as it is written on a Bestiary page
+
+    :param value: an integer
+    :returns: value as a string with a sign, e.g. '+3' or '-1'
+    '''
+    if value < 0:
+        return str(value)
+    return '+' + str(value)
+
+
+def _get_band(cr_value):
+    '''Gets the CR band of the index page that lists a creature
+
+    :param cr_value: CR of the creature as a float
+    :returns: one of CR_BANDS
+    '''
+    for band in CR_BANDS:
+        if cr_value <= band[1]:
+            return band
+    return CR_BANDS[-1]
+
+
+def _get_band_link(band, page):
+    '''Gets the path of an index page of a CR band, relative to the root
+    of the site
+
+    :param band: one of CR_BANDS
+    :param page: number of the page within the band, starting at 0
+    :returns: path of the index page
+    '''
+    path = INDEX_PATH + '%d-%d' % band
+    if page:
+        path = '%s-%d' % (path, page)
+    return path
+
+
+def _get_name(number, rng):
+    '''Generates the name of a creature, which is unique for each number
+
+    :param number: a non-negative integer
+    :param rng: a random.Random object
+    :returns: the name of the creature
+    '''
+    syllables = []
+    while number or len(syllables) < 2:
+        number, digit = divmod(number, len(NAME_SYLLABLES))
+        syllables.append(NAME_SYLLABLES[digit])
+    return '%s %s' % (''.join(syllables).capitalize(), rng.choice(NAME_NOUNS))
+
+
+def _make_creature(number, rng, third_party_rate):
+    '''Generates the features of a random creature
+
+    :param number: number of the creature, which determines its name
+    :param rng: a random.Random object
+    :param third_party_rate: probability that the creature is 3rd party
+                             content
+    :returns: dictionary of features, keyed by CSV_COLUMNS and by the
+              other values used to render the creature's page
+    '''
+    cr_text = rng.choice(FRACTIONAL_CRS + [str(x) for x in
+                                           range(1, MAX_CR + 1)])
+    cr_value = float(_format_cr(cr_text))
+    type_ = rng.choice(CREATURE_TYPES)
+    creature = {
+        'CR': _format_cr(cr_text),
+        'cr_text': cr_text,
+        'name': _get_name(number, rng),
+        'type': type_,
+        'hit_die': HIT_DICE[type_],
+        'is_3pp': rng.random() < third_party_rate,
+    }
+    if creature['is_3pp']:
+        creature['publisher'] = rng.choice(THIRD_PARTY_PUBLISHERS)
+    else:
+        creature['publisher'] = PUBLISHER
+
+    # ability scores, where a missing score is stored as -1
+    mods = {}
+    for key in CSV_COLUMNS[10:16]:
+        if (key == 'Con' and type_ in NO_CON_TYPES or
+                key == 'Int' and type_ in NO_INT_TYPES):
+            creature[key] = '-1'
+            creature[key + '_text'] = '-'
+            mods[key] = 0
+            continue
+        score = rng.randint(3, 18) + int(cr_value) // 2
+        creature[key] = str(score)
+        creature[key + '_text'] = str(score)
+        mods[key] = (score - 10) // 2
+    creature['Dex_mod'] = _format_bonus(mods['Dex'])
+    creature['Str_mod'] = _format_bonus(mods['Str'])
+
+    # defense
+    hd = max(1, int(round(cr_value * rng.uniform(0.8, 1.4))))
+    hp = max(1, hd * (creature['hit_die'] + 1) // 2 + hd * mods['Con'])
+    natural = int(cr_value) + rng.randint(0, 4)
+    creature['HD'] = str(hd)
+    creature['hp'] = str(hp)
+    creature['hp_mod'] = ''
+    if hd * mods['Con']:
+        creature['hp_mod'] = _format_bonus(hd * mods['Con'])
+    creature['natural'] = natural
+    creature['AC'] = str(10 + mods['Dex'] + natural)
+    creature['touch'] = str(10 + mods['Dex'])
+    creature['flat-footed'] = str(10 + min(mods['Dex'], 0) + natural)
+    for key, ability in [('Fort', 'Con'), ('Ref', 'Dex'), ('Will', 'Wis')]:
+        base = hd // 3
+        if rng.random() < 0.5:
+            base = hd // 2 + 2
+        creature[key] = str(base + mods[ability])
+        creature[key + '_text'] = _format_bonus(base + mods[ability])
+    creature['dr'] = 5 * (1 + int(cr_value) // 8)
+    creature['resist'] = 5 * (1 + int(cr_value) // 5)
+
+    # offense and statistics
+    bab = hd * 3 // 4
+    creature['BAB'] = str(bab)
+    creature['CMB'] = str(bab + mods['Str'])
+    creature['CMB_text'] = _format_bonus(bab + mods['Str'])
+    creature['CMD'] = str(10 + bab + mods['Str'] + mods['Dex'])
+    creature['attack'] = _format_bonus(bab + mods['Str'])
+    creature['xp'] = int(400 * max(cr_value, 0.125) ** 2)
+    creature['description'] = ' '.join(
+        rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(40, 120)))
+    return creature
+
+
+def iter_creatures(count, seed=0, start=0, third_party_rate=0.1,
+                   duplicate_rate=0.0):
+    '''Generates random creatures, always generating the same creatures
+    for the same arguments
+
+    Each creature is a dictionary keyed by CSV_COLUMNS, whose values are
+    strings formatted as core.builders.creature.d20pfsrd reads them from
+    the creature's page, along with the other values used by
+    render_page(...).
+
+    :param count: number of creatures to generate
+    :param seed: seed of the random number generator
+    :param start: number of the first creature; creatures with different
+                  numbers have different names
+    :param third_party_rate: probability that a creature is 3rd party
+                             content
+    :param duplicate_rate: probability that a creature is a copy of one
+                           generated before it, with the same name and CR
+    :returns: generator of dictionaries of creature features
+    '''
+    rng = random.Random(seed)
+    recent = []
+    for i in range(start, start + count):
+        if recent and rng.random() < duplicate_rate:
+            creature = dict(rng.choice(recent))
+        else:
+            creature = _make_creature(i, rng, third_party_rate)
+            # remember a bounded number of creatures to copy
+            if len(recent) < 1000:
+                recent.append(creature)
+            else:
+                recent[rng.randrange(len(recent))] = creature
+        creature['number'] = i
+        yield creature
+
+
+def render_page(creature):
+    '''Renders the d20pfsrd.com Bestiary page of a creature
+
+    :param creature: dictionary of creature features generated by
+                     iter_creatures(...)
+    :returns: the page's HTML as a string
+    '''
+    values = dict(creature)
+    values['nav'] = ''.join('<li><a href="/nav-%d">Page %d</a></li>' % (x, x)
+                            for x in range(NAV_LINKS))
+    return PAGE % values
+
+
+def write_csv(file_name, creatures):
+    '''Writes creatures to a .csv file in the format of
+    CREATURES_SPECIAL.csv
+
+    :param file_name: path of the output file
+    :param creatures: iterable of dictionaries of creature features
+    :returns: number of creatures written
+    '''
+    count = 0
+    csv_file = open(file_name, 'w')
+    writer = csv.writer(csv_file, lineterminator='\n')
+    writer.writerow(CSV_COLUMNS)
+    for creature in creatures:
+        writer.writerow([creature[x] for x in CSV_COLUMNS])
+        count = count + 1
+    csv_file.close()
+    return count
+
+
+def write_site(directory, creatures, base_url=None,
+               links_per_index=LINKS_PER_INDEX, special_rate=0.0, seed=0):
+    '''Writes a Bestiary page for each creature, along with index pages
+    that link to them, grouped into CR bands as on d20pfsrd.com
+
+    Links to the index pages are written to INDEX.txt in the directory
+    and links to creature pages that are not listed on any index page
+    are written to INDEX_SPECIAL.txt. Pages are written as they are
+    generated, so creatures are not kept in memory.
+
+    :param directory: root directory of the site
+    :param creatures: iterable of dictionaries of creature features
+    :param base_url: URL at which the site is served, e.g.
+                     'http://localhost:8000'; links are paths on the
+                     local file system by default
+    :param links_per_index: maximum number of links on an index page
+    :param special_rate: probability that a creature is only linked from
+                         INDEX_SPECIAL.txt
+    :param seed: seed of the random number generator used to choose
+                 special creatures
+    :returns: number of creature pages written
+    '''
+    if base_url is None:
+        base_url = os.path.abspath(directory)
+    base_url = base_url.rstrip('/') + '/'
+    rng = random.Random(seed)
+    index_dir = os.path.join(directory, os.path.dirname(INDEX_PATH))
+    if not os.path.isdir(index_dir):
+        os.makedirs(index_dir)
+    # open index page, page number and number of links of each CR band
+    index_files = {}
+    index_links = []
+    special_links = []
+    count = 0
+    for creature in creatures:
+        # write creature page
+        page_dir = '%s%s/%d' % (LISTING_PATH, creature['type'],
+                                creature['number'] // PAGES_PER_DIR)
+        if not os.path.isdir(os.path.join(directory, page_dir)):
+            os.makedirs(os.path.join(directory, page_dir))
+        page_path = '%s/%s-%d' % (page_dir,
+                                  creature['name'].lower().replace(' ', '-'),
+                                  creature['number'])
+        with open(os.path.join(directory, page_path), 'w') as page_file:
+            page_file.write(render_page(creature))
+        count = count + 1
+        if rng.random() < special_rate:
+            special_links.append(base_url + page_path)
+            continue
+
+        # add link to the index page of the creature's CR band, starting
+        #   a new page when the current one is full
+        band = _get_band(float(creature['CR']))
+        index_file, page, links = index_files.get(band, (None, -1, 0))
+        if index_file is None or links >= links_per_index:
+            if index_file is not None:
+                index_file.write(INDEX_FOOTER)
+                index_file.close()
+            page = page + 1
+            links = 0
+            index_path = _get_band_link(band, page)
+            index_file = open(os.path.join(directory, index_path), 'w')
+            index_file.write(INDEX_HEADER % os.path.basename(index_path))
+            index_links.append(base_url + index_path)
+        index_file.write(INDEX_LINK % (base_url + page_path,
+                                       creature['name']))
+        index_files[band] = (index_file, page, links + 1)
+    for index_file, _, _ in index_files.values():
+        index_file.write(INDEX_FOOTER)
+        index_file.close()
+
+    with open(os.path.join(directory, 'INDEX.txt'), 'w') as list_file:
+        list_file.write('\n'.join(sorted(index_links)))
+    with open(os.path.join(directory, 'INDEX_SPECIAL.txt'), 'w') as list_file:
+        list_file.write('\n'.join(special_links))
+    return count
+
+
+def parse_cmd_args():
+    '''Parses command line arguments
+
+    :returns map data structure containing each argument and associated value
+    '''
+    # create parser for command line arguments
+    help_desc = 'Generates a synthetic Bestiary for benchmarks'
+    parser = argparse.ArgumentParser(description=help_desc)
+    # -argument- destination directory for output
+    parser.add_argument('dest', help='destination directory for output')
+    # -argument- number of creature pages
+    parser.add_argument('--count', metavar='N', type=int, default=10000,
+                        help='number of creature pages (default: 10000)')
+    # -argument- number of creatures in .csv files
+    parser.add_argument('--csv-count', metavar='N', type=int,
+                        help='number of creatures written to the .csv '
+                             'files (default: same as --count)')
+    # -argument- seed of the random number generator
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the random number generator')
+    # -argument- rates of special kinds of creatures
+    parser.add_argument('--3pp-rate', dest='third_party_rate', type=float,
+                        default=0.1, help='fraction of 3rd party creatures')
+    parser.add_argument('--duplicate-rate', type=float, default=0.0,
+                        help='fraction of creatures that copy another')
+    parser.add_argument('--special-rate', type=float, default=0.01,
+                        help='fraction of creature pages listed only in '
+                             'INDEX_SPECIAL.txt')
+    # -argument- URL at which the site will be served
+    parser.add_argument('--base-url',
+                        help='URL prefix of links, e.g. http://localhost:8000'
+                             '; links are local paths by default')
+    # parse command line arguments
+    args = vars(parser.parse_args())
+
+    return args
+
+
+# --- Script ---
+# If this module is executed as a script, it writes a synthetic site to
+# the destination directory, along with INDEX.txt, INDEX_SPECIAL.txt,
+# CREATURES_SPECIAL.csv and 3PP_CREATURES_SPECIAL.csv files describing
+# other creatures.
+if __name__ == '__main__':
+    args = parse_cmd_args()
+    if not os.path.isdir(args['dest']):
+        os.makedirs(args['dest'])
+
+    # write creature pages and index pages
+    creatures = iter_creatures(args['count'], args['seed'], 0,
+                               args['third_party_rate'],
+                               args['duplicate_rate'])
+    write_site(args['dest'], creatures, args['base_url'],
+               special_rate=args['special_rate'], seed=args['seed'])
+
+    # write .csv files of creatures without pages
+    csv_count = args['csv_count']
+    if csv_count is None:
+        csv_count = args['count']
+    # the same creatures are generated for each file, rather than being
+    #   kept in memory
+    for file_name, is_3pp in [('CREATURES_SPECIAL.csv', False),
+                              ('3PP_CREATURES_SPECIAL.csv', True)]:
+        creatures = iter_creatures(csv_count, args['seed'] + 1,
+                                   args['count'], args['third_party_rate'],
+                                   args['duplicate_rate'])
+        write_csv(os.path.join(args['dest'], file_name),
+                  (x for x in creatures if x['is_3pp'] == is_3pp))
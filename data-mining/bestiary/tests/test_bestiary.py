@@ -0,0 +1,105 @@
+'''A module that tests the subcommands of the bestiary command line
+interface that do not access d20pfsrd.com.'''
+
+
+import sys
+sys.path.append('..')
+
+import csv
+import os
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import unittest
+
+import bestiary
+
+
+class TestBestiary(unittest.TestCase):
+    '''This class tests the validity of bestiary.main(...)'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = os.path.join(self.directory, 'creature.db')
+        self.stdout = sys.stdout
+        sys.stdout = open(os.path.join(self.directory, 'out.txt'), 'w')
+
+    def tearDown(self):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+        shutil.rmtree(self.directory)
+
+    def _main(self, *argv):
+        self.assertEqual(bestiary.main(list(argv) + ['--db', self.db]), 0)
+
+    def test_lazy_imports(self):
+        '''Checks that commands that do not crawl do not import lxml'''
+        self._main('ingest-csv', '../CREATURES_SPECIAL.csv')
+        script = ('import sys; import bestiary; '
+                  'bestiary.main(["stats", "--db", sys.argv[1]]); '
+                  'sys.stderr.write(" ".join(sorted(x for x in sys.modules '
+                  'if x in ("crawler", "lxml", "numpy"))))')
+        process = subprocess.Popen([sys.executable, '-c', script, self.db],
+                                   cwd='..', stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        error = process.communicate()[1]
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(error.strip(), b'')
+
+    def test_ingest_and_export(self):
+        '''Checks that .csv files are ingested and exported by content'''
+        self._main('ingest-csv', '../CREATURES_SPECIAL.csv')
+        self._main('ingest-csv', '--3pp', '../3PP_CREATURES_SPECIAL.csv')
+        # creatures already in the database are not added again
+        self._main('ingest-csv', '../CREATURES_SPECIAL.csv')
+        for content in bestiary.CONTENT_TYPES:
+            out_file = os.path.join(self.directory, content + '.csv')
+            self._main('export', '--content', content, '-o', out_file)
+            with open(out_file, 'r') as csv_file:
+                rows = list(csv.DictReader(csv_file))
+            if content == 'standard':
+                self.assertEqual(set(x['is_3pp'] for x in rows), set(['0']))
+                standard = len(rows)
+            elif content == '3pp':
+                self.assertEqual(set(x['is_3pp'] for x in rows), set(['1']))
+                third_party = len(rows)
+            else:
+                self.assertEqual(len(rows), standard + third_party)
+
+    def test_read_only(self):
+        '''Checks that stats and export do not write to the database'''
+        self._main('ingest-csv', '../CREATURES_SPECIAL.csv')
+        with open(self.db, 'rb') as db_file:
+            contents = db_file.read()
+        self._main('stats')
+        for export_format in ['csv', 'snapshot']:
+            out_file = os.path.join(self.directory, 'out.' + export_format)
+            self._main('export', '--format', export_format, '-o', out_file)
+        with open(self.db, 'rb') as db_file:
+            self.assertEqual(db_file.read(), contents)
+        db_conn = bestiary._open_db({'db': self.db})
+        with self.assertRaises(sqlite3.OperationalError):
+            db_conn.connection.execute('delete from creatures')
+        db_conn.connection.close()
+
+    def test_stats(self):
+        '''Checks that creatures are counted by content and CR'''
+        self._main('ingest-csv', '../CREATURES_SPECIAL.csv')
+        stats_name = os.path.join(self.directory, 'stats.txt')
+        sys.stdout.close()
+        sys.stdout = open(stats_name, 'w')
+        self._main('stats')
+        sys.stdout.flush()
+        with open(stats_name, 'r') as stats_file:
+            lines = stats_file.read().split('\n')
+        with open('../CREATURES_SPECIAL.csv', 'r') as csv_file:
+            count = len(list(csv.DictReader(csv_file)))
+        self.assertEqual(lines[0].split(), ['standard', str(count)])
+        self.assertEqual(lines[1].split(), ['3pp', '0'])
+        cr_counts = [int(x.split()[1]) for x in lines[5:] if x]
+        self.assertEqual(sum(cr_counts), count)
+
+
+if __name__ == '__main__':
+    unittest.main()
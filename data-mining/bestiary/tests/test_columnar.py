@@ -0,0 +1,77 @@
+'''A module that tests the basic functionality of functions in the
+db.columnar module.'''
+
+
+import sys
+sys.path.append('..')
+
+import os
+import shutil
+import tempfile
+import unittest
+from core.builders.creature.dict import build as dict_build
+from db.columnar import load_columnar, pyarrow
+from db.creatureDB import CreatureDB
+
+
+CREATURE_KEYS = [
+    'CR', 'name', 'hp', 'HD', 'AC', 'touch', 'flat-footed',
+    'Fort', 'Ref', 'Will', 'Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha',
+    'BAB', 'CMB', 'CMD'
+]
+CREATURES = [
+    '0.25,Kobold Zombie,12,2,15,12,14,0,0,3,11,10,-1,-1,10,10,1,0,10',
+    '1,Akata,19,3,16,12,14,4,2,4,13,12,13,3,12,10,2,3,14',
+    '3,Dretch,18,2,14,10,14,3,0,3,12,10,14,5,11,11,2,3,13',
+]
+
+
+class TestColumnar(unittest.TestCase):
+    '''This class tests the validity of db.columnar'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = CreatureDB(os.path.join(self.directory, 'creature.db'),
+                             True)
+        for i, line in enumerate(CREATURES):
+            creature = dict_build(dict(zip(CREATURE_KEYS, line.split(','))))
+            creature.is_3pp = i == 2
+            self.db.add_creature(creature)
+
+    def tearDown(self):
+        self.db.connection.close()
+        shutil.rmtree(self.directory)
+
+    def _export(self, extension, content='all'):
+        file_name = os.path.join(self.directory, 'creature' + extension)
+        file_name = self.db.export_as_columnar(file_name, content)
+        columns = load_columnar(file_name)
+        if not isinstance(columns, dict):
+            columns = columns.to_pydict()
+        return dict((x, list(columns[x])) for x in columns)
+
+    def test_export_npz(self):
+        '''Checks that columns are exported with numeric types'''
+        columns = self._export('.npz')
+        self.assertEqual(columns['name'],
+                         ['Kobold Zombie', 'Akata', 'Dretch'])
+        # nominal CR values are stored as numbers
+        self.assertEqual(columns['CR'], [0.25, 1.0, 3.0])
+        self.assertEqual(columns['Int'], [-1, 3, 5])
+        self.assertEqual(columns['is_3pp'], [False, False, True])
+
+    def test_export_content(self):
+        '''Checks that only the requested type of content is exported'''
+        columns = self._export('.npz', 'standard')
+        self.assertEqual(columns['name'], ['Kobold Zombie', 'Akata'])
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_export_arrow(self):
+        '''Checks that Arrow and Parquet files hold the same columns'''
+        expected = self._export('.npz')
+        self.assertEqual(self._export('.arrow'), expected)
+        self.assertEqual(self._export('.parquet'), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+'''A module that tests the streaming crawl pipeline of the crawler module
+using creature pages stored on the local file system.'''
+
+
+import sys
+sys.path.append('..')
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import crawler
+from db.creatureDB import CONTENT_VIEWS, CreatureDB
+
+
+PAGE = '''<html><head><title>%(name)s</title></head><body>
+<table><tr><td class="sites-layout-tile"><table><tr>
+<td>%(name)s CR %(cr)s</td></tr></table></td></tr></table>
+<div class="sites-canvas-main"><p>%(name)s</p>
+<p>DEFENSE</p><p>AC 15, touch 12, flat-footed 13 (+2 Dex, +3 natural)</p>
+<p>hp %(hp)s (4d8+4)</p><p>Fort +5, Ref +3, Will +2</p>
+<p>Defensive Abilities ferocity; DR 5/magic; Immune fire; Resist cold 10</p>
+<p>Vulnerabilities sonic; Weakness light</p>
+<p>STATISTICS</p><p>Str 14, Dex 15, Con 12, Int 10, Wis 11, Cha 8</p>
+<p>Base Atk +3; CMB +5; CMD 17</p><p>Feats Toughness</p>
+<p>Skills Stealth +5</p></div>
+<div class="sites-tile-name-footer">%(footer)s</div></body></html>'''
+CREATURES = [
+    ('Akata', '1', '19', 'Copyright Paizo Publishing'),
+    ('Dretch', '2', '18', 'Copyright Paizo Publishing'),
+    ('Lemure', '1', '13', 'Copyright Other Press'),
+]
+
+
+class TestCrawlPipeline(unittest.TestCase):
+    '''This class tests the validity of crawler.crawl(...) and
+    crawler.iter_crawl_links(...)'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        listing_dir = os.path.join(self.directory, 'monster-listings')
+        os.mkdir(listing_dir)
+        anchors = []
+        for name, cr, hp, footer in CREATURES:
+            path = os.path.join(listing_dir, name.lower() + '.html')
+            with open(path, 'w') as page_file:
+                page_file.write(PAGE % {'name': name, 'cr': cr, 'hp': hp,
+                                        'footer': footer})
+            anchors.append('<div><a href="%s">%s</a></div>' % (path, name))
+        # links outside of a div are not creature links
+        anchors.append('<a href="%s/x.html">x</a>' % listing_dir)
+        self.index = os.path.join(self.directory, 'index.html')
+        with open(self.index, 'w') as index_file:
+            index_file.write('<html><body>%s</body></html>' %
+                             '\n'.join(anchors))
+        self.db = CreatureDB(os.path.join(self.directory, 'creature.db'))
+        self.publishers = crawler.THIRD_PARTY_PUBLISHERS
+        crawler.THIRD_PARTY_PUBLISHERS = ['Other Press']
+
+    def tearDown(self):
+        crawler.THIRD_PARTY_PUBLISHERS = self.publishers
+        self.db.connection.close()
+        shutil.rmtree(self.directory)
+
+    def _crawl(self, mode):
+        links = crawler.iter_crawl_links([self.index], mode=mode)
+        failures = crawler.crawl(self.db, links, mode, workers=2,
+                                 queue_size=1)
+        self.assertEqual(failures, [])
+        query = 'select hp from creatures order by hp'
+        return [x[0] for x in self.db.connection.execute(query)]
+
+    def test_iter_creature_links(self):
+        '''Checks that links are found in the order they appear'''
+        links = list(crawler.iter_creature_links(self.index,
+                                                 crawler.MODE_ALL))
+        self.assertEqual(links, crawler.get_creature_links(
+            self.index, crawler.MODE_ALL))
+        self.assertEqual([os.path.basename(x) for x in links],
+                         ['akata.html', 'dretch.html', 'lemure.html'])
+
+    def test_crawl_standard(self):
+        '''Checks that 3rd party creatures are skipped'''
+        self.assertEqual(self._crawl(crawler.MODE_STANDARD), [18, 19])
+
+    def test_crawl_3pp(self):
+        '''Checks that only 3rd party creatures are stored'''
+        self.assertEqual(self._crawl(crawler.MODE_3PP), [13])
+
+    def test_crawl_all(self):
+        '''Checks that every creature is stored and tagged by content'''
+        self.assertEqual(self._crawl(crawler.MODE_ALL), [13, 18, 19])
+        query = 'select hp from %s order by hp'
+        for content, expected in [('standard', [18, 19]), ('3pp', [13])]:
+            view = CONTENT_VIEWS[content]
+            rows = self.db.connection.execute(query % view).fetchall()
+            self.assertEqual([x[0] for x in rows], expected)
+        query = 'select source from creatures where is_3pp = 1'
+        source = self.db.connection.execute(query).fetchone()[0]
+        self.assertEqual(os.path.basename(source), 'lemure.html')
+
+    def test_crawl_cr_range(self):
+        '''Checks that creatures outside of a CR range are skipped'''
+        links = crawler.iter_crawl_links([self.index])
+        failures = crawler.crawl(self.db, links, workers=1,
+                                 cr_range=(2.0, 5.0))
+        self.assertEqual(failures, [])
+        query = 'select name from creatures'
+        names = [x[0] for x in self.db.connection.execute(query)]
+        self.assertEqual(names, ['Dretch'])
+
+    def test_index_cr_range(self):
+        '''Checks that CR bands are read from links to index pages'''
+        prefix = 'http://www.d20pfsrd.com//bestiary/' \
+                 '-bestiary-by-challenge-rating/-bestiary-cr-'
+        inf = float('inf')
+        self.assertEqual(crawler.get_index_cr_range(prefix + '11-12'),
+                         (11.0, 12.0))
+        self.assertEqual(crawler.get_index_cr_range(prefix + '17-18-1'),
+                         (17.0, 18.0))
+        self.assertEqual(crawler.get_index_cr_range(prefix + '1-2-1'),
+                         (0.0, 2.0))
+        self.assertEqual(crawler.get_index_cr_range(prefix + '20'),
+                         (20.0, inf))
+        self.assertEqual(crawler.get_index_cr_range(self.index), (0.0, inf))
+        self.assertFalse(crawler.is_index_in_cr_range(prefix + '5-6', 7, 9))
+        self.assertTrue(crawler.is_index_in_cr_range(prefix + '20', 25, 30))
+
+    def test_crawl_failure(self):
+        '''Checks that links that can not be read are reported'''
+        missing = os.path.join(self.directory, 'missing.html')
+        failures = crawler.crawl(self.db, iter([missing]), workers=1)
+        self.assertEqual([x[0] for x in failures], [missing])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+'''A module that tests the basic functionality of the CreatureDB class
+in the db.creatureDB module.'''
+
+
+import sys
+sys.path.append('..')
+
+import os
+import shutil
+import tempfile
+import unittest
+from core.builders.creature.dict import build as dict_build
+from db.creatureDB import CreatureDB, CreatureRow
+
+
+CREATURE_KEYS = [
+    'CR', 'name', 'hp', 'HD', 'AC', 'touch', 'flat-footed',
+    'Fort', 'Ref', 'Will', 'Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha',
+    'BAB', 'CMB', 'CMD'
+]
+CREATURES = [
+    '0.25,Kobold Zombie,12,2,15,12,14,0,0,3,11,10,-1,-1,10,10,1,0,10',
+    '1,Akata,19,3,16,12,14,4,2,4,13,12,13,3,12,10,2,3,14',
+    '3,Dretch,18,2,14,10,14,3,0,3,12,10,14,5,11,11,2,3,13',
+]
+
+
+class TestCreatureDB(unittest.TestCase):
+    '''This class tests the validity of db.creatureDB.CreatureDB'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = CreatureDB(os.path.join(self.directory, 'creature.db'))
+        self.creatures = []
+        for line in CREATURES:
+            creature = dict_build(dict(zip(CREATURE_KEYS, line.split(','))))
+            self.creatures.append(creature)
+            self.db.add_creature(creature)
+
+    def tearDown(self):
+        self.db.connection.close()
+        shutil.rmtree(self.directory)
+
+    def test_iter_creatures(self):
+        '''Checks that rows are filtered, ordered and read in batches'''
+        rows = list(self.db.iter_creatures('CR >= ?', (1,), 'hp', batch=1))
+        self.assertTrue(all(isinstance(x, CreatureRow) for x in rows))
+        self.assertEqual([x.name for x in rows], ['Dretch', 'Akata'])
+        self.assertEqual(rows[1].Int, 3)
+        self.assertEqual(len(list(self.db.iter_creatures())), 3)
+
+    def test_duplicates(self):
+        '''Checks that duplicate creatures are ignored, but that a 3rd
+        party creature with the same name and CR as a standard creature
+        is kept'''
+        self.db.add_creature(self.creatures[1])
+        self.assertEqual(len(list(self.db.iter_creatures())), 3)
+        creature = dict_build(dict(zip(CREATURE_KEYS,
+                                       CREATURES[1].split(','))))
+        creature.is_3pp = True
+        creature.source = 'Tome of Horrors'
+        self.assertFalse(self.db.is_creature_in_db(creature))
+        self.db.add_creature(creature)
+        self.db.add_creature(creature)
+        rows = list(self.db.iter_creatures('name = ?', ('Akata',)))
+        self.assertEqual([(x.is_3pp, x.source) for x in rows],
+                         [(0, ''), (1, 'Tome of Horrors')])
+
+    def test_to_creature(self):
+        '''Checks that rows are converted back into Creature objects'''
+        for row, expected in zip(self.db.iter_creatures(), self.creatures):
+            self.assertEqual(repr(row.to_creature()), repr(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+'''A module that tests the parsing of d20pfsrd.com Bestiary pages by the
+core.builders.creature.d20pfsrd module, using generated pages rather
+than pages downloaded from the site.'''
+
+
+import sys
+sys.path.append('..')
+
+import unittest
+
+from lxml.html import fromstring
+
+import synthetic
+from core.builders.creature import d20pfsrd
+
+
+ECOLOGY = '<p><b>ECOLOGY</b></p>'
+SPECIAL_ABILITIES = '''<p><b>SPECIAL ABILITIES</b></p>
+<p>Ferocity (Ex) This creature fights on with hp 0 or fewer.</p>
+'''
+
+
+def _get_values(creature):
+    '''Gets the values of a built Creature in the order of
+    synthetic.CSV_COLUMNS'''
+    values = [creature.cr, creature.name, creature.hp, creature.hd]
+    values.extend(creature.ac[x] for x in ['AC', 'touch', 'flat-footed'])
+    values.extend(creature.saves[x] for x in ['Fort', 'Ref', 'Will'])
+    values.extend(creature.ability_scores[x] for x in
+                  ['Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha'])
+    values.extend([creature.bab, creature.cmb, creature.cmd])
+    return values
+
+
+class TestD20pfsrd(unittest.TestCase):
+    '''This class tests the validity of
+    core.builders.creature.d20pfsrd.build(...)'''
+
+    def setUp(self):
+        self.creatures = list(synthetic.iter_creatures(20, seed=6))
+        self.creature = self.creatures[0]
+        self.page = synthetic.render_page(self.creature)
+
+    def _get_stat_block_text(self, page):
+        content = d20pfsrd.CONTENT_SELECTOR(fromstring(page))[0]
+        return d20pfsrd._get_stat_block_text(content)
+
+    def test_stat_block(self):
+        '''Checks that the stat block runs from DEFENSE to the end of
+        STATISTICS, stopping at ECOLOGY'''
+        text = self._get_stat_block_text(self.page)
+        self.assertTrue(text.startswith('DEFENSE'))
+        self.assertTrue('STATISTICS' in text)
+        self.assertTrue('Skills Perception' in text)
+        self.assertFalse('ECOLOGY' in text)
+        self.assertFalse('XP' in text)
+        self.assertFalse(self.creature['description'] in text)
+
+    def test_special_abilities(self):
+        '''Checks that the stat block stops at SPECIAL ABILITIES when it
+        comes before ECOLOGY'''
+        page = self.page.replace(ECOLOGY, SPECIAL_ABILITIES + ECOLOGY)
+        text = self._get_stat_block_text(page)
+        self.assertTrue('Skills Perception' in text)
+        self.assertFalse('SPECIAL ABILITIES' in text)
+        self.assertFalse('Ferocity (Ex)' in text)
+        self.assertEqual(_get_values(d20pfsrd.build(fromstring(page))),
+                         [self.creature[x] for x in synthetic.CSV_COLUMNS])
+
+    def test_no_end_heading(self):
+        '''Checks that the stat block runs to the end of the entry when no
+        heading follows STATISTICS'''
+        page = self.page.replace(ECOLOGY, '')
+        text = self._get_stat_block_text(page)
+        self.assertTrue(text.startswith('DEFENSE'))
+        self.assertTrue(text.rstrip().endswith(self.creature['description']))
+        self.assertEqual(_get_values(d20pfsrd.build(fromstring(page))),
+                         [self.creature[x] for x in synthetic.CSV_COLUMNS])
+
+    def test_no_headings(self):
+        '''Checks that the whole entry is used when it has no DEFENSE or
+        STATISTICS headings'''
+        page = self.page.replace('<b>DEFENSE</b>', '') \
+                        .replace('<b>STATISTICS</b>', '')
+        text = self._get_stat_block_text(page)
+        self.assertTrue(text.lstrip().startswith(self.creature['name']))
+        self.assertTrue('ECOLOGY' in text)
+
+    def test_cr_range(self):
+        '''Checks that the stat block of a creature outside of the CR
+        range is not parsed'''
+        for creature in self.creatures:
+            page = synthetic.render_page(creature)
+            cr = float(creature['CR'])
+            built = d20pfsrd.build(fromstring(page), (cr, cr))
+            self.assertEqual(_get_values(built),
+                             [creature[x] for x in synthetic.CSV_COLUMNS])
+            self.assertEqual(d20pfsrd.build(fromstring(page), (cr + 1, 30)),
+                             None)
+            self.assertEqual(d20pfsrd.build(fromstring(page), (0, cr / 2)),
+                             None)
+        # a stat block that can not be parsed is only read when in range
+        page = self.page.replace('<b>DEFENSE</b>', '')
+        cr = float(self.creature['CR'])
+        self.assertEqual(d20pfsrd.build(fromstring(page), (cr + 1, 30)), None)
+        with self.assertRaises(ValueError):
+            d20pfsrd.build(fromstring(page), (0, 30))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+'''A module that tests the basic functionality of functions in the
+db.diff module.'''
+
+
+import sys
+sys.path.append('..')
+
+import os
+import shutil
+import tempfile
+import unittest
+from core.builders.creature.dict import build as dict_build
+from db.creatureDB import CreatureDB
+from db.diff import diff_files, write_changelog
+
+
+CREATURE_KEYS = [
+    'CR', 'name', 'hp', 'HD', 'AC', 'touch', 'flat-footed',
+    'Fort', 'Ref', 'Will', 'Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha',
+    'BAB', 'CMB', 'CMD'
+]
+OLD_CREATURES = [
+    '0.25,Kobold Zombie,12,2,15,12,14,0,0,3,11,10,-1,-1,10,10,1,0,10',
+    '1,Akata,19,3,16,12,14,4,2,4,13,12,13,3,12,10,2,3,14',
+    '3,Dretch,18,2,14,10,14,3,0,3,12,10,14,5,11,11,2,3,13',
+]
+NEW_CREATURES = [
+    '1,Akata,22,3,16,12,14,4,2,4,13,12,13,3,12,10,2,3,14',
+    '3,Dretch,18,2,14,10,14,3,0,3,12,10,14,5,11,11,2,3,13',
+    '2,Lemure,13,2,14,10,14,3,0,0,11,10,10,-1,11,5,2,2,12',
+]
+
+
+class TestDiff(unittest.TestCase):
+    '''This class tests the validity of db.diff'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.old = self._create_db('old.db', OLD_CREATURES)
+        self.new = self._create_db('new.db', NEW_CREATURES)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _create_db(self, name, creatures, sources=None):
+        '''Creates a CreatureDB file containing the given creatures
+
+        :param name: name of the database file
+        :param creatures: list of comma-separated creature features
+        :param sources: optional list of (is_3pp, source) tuples, one for
+                        each creature
+        :returns: path to the database file
+        '''
+        file_name = os.path.join(self.directory, name)
+        db = CreatureDB(file_name)
+        for i, line in enumerate(creatures):
+            features = dict(zip(CREATURE_KEYS, line.split(',')))
+            creature = dict_build(features)
+            if sources is not None:
+                creature.is_3pp, creature.source = sources[i]
+            db.add_creature(creature)
+        db.commit_and_close()
+        return file_name
+
+    def test_diff_files(self):
+        '''Checks that added, removed and changed creatures are found'''
+        changes = list(diff_files(self.old, self.new))
+        self.assertEqual([(x.kind, x.name) for x in changes], [
+            ('changed', 'Akata'),
+            ('removed', 'Kobold Zombie'),
+            ('added', 'Lemure'),
+        ])
+        self.assertEqual(changes[0].fields, {'hp': (19, 22)})
+
+    def test_diff_3pp(self):
+        '''Checks that standard and 3rd party creatures with the same name
+        and CR are compared separately, whatever order they are stored in'''
+        standard = OLD_CREATURES[1]
+        third_party = NEW_CREATURES[0]
+        sources = [(False, 'Bestiary 3'), (True, 'Tome of Horrors')]
+        first = self._create_db('first.db', [standard, third_party], sources)
+        second = self._create_db('second.db', [third_party, standard],
+                                 sources[::-1])
+        self.assertEqual(list(diff_files(first, second)), [])
+        # a change of source is reported
+        third = self._create_db('third.db', [standard, third_party],
+                                [sources[0], (True, 'Tome of Horrors 2')])
+        changes = list(diff_files(first, third))
+        self.assertEqual([(x.kind, x.name, x.is_3pp) for x in changes],
+                         [('changed', 'Akata', 1)])
+        self.assertEqual(changes[0].fields,
+                         {'source': ('Tome of Horrors', 'Tome of Horrors 2')})
+        # a creature that moves to 3rd party content is removed and added
+        fourth = self._create_db('fourth.db', [standard],
+                                 [(True, 'Bestiary 3')])
+        changes = list(diff_files(self.old, fourth))
+        self.assertEqual([(x.kind, x.name, x.is_3pp) for x in changes], [
+            ('removed', 'Akata', 0),
+            ('added', 'Akata', 1),
+            ('removed', 'Dretch', 0),
+            ('removed', 'Kobold Zombie', 0),
+        ])
+        # snapshots store the same keys
+        snapshot = os.path.join(self.directory, 'second.snap')
+        db = CreatureDB(second)
+        db.export_as_snapshot(snapshot)
+        db.commit_and_close()
+        self.assertEqual(list(diff_files(first, snapshot)), [])
+
+    def test_diff_snapshot(self):
+        '''Checks that a database and its own snapshot are identical'''
+        snapshot = os.path.join(self.directory, 'old.snap')
+        db = CreatureDB(self.old)
+        db.export_as_snapshot(snapshot)
+        db.commit_and_close()
+        self.assertEqual(list(diff_files(self.old, snapshot)), [])
+
+    def test_write_changelog(self):
+        '''Checks that changelogs contain one entry per change'''
+        for format_ in ('json', 'csv'):
+            file_name = os.path.join(self.directory, 'changelog')
+            count = write_changelog(diff_files(self.old, self.new),
+                                    file_name, format_)
+            self.assertEqual(count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
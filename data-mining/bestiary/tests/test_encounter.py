@@ -0,0 +1,88 @@
+'''A module that tests the basic functionality of functions and classes
+in the core.encounter module.'''
+
+
+import sys
+sys.path.append('..')
+
+import unittest
+from core.builders.creature.dict import build as dict_build
+from core.encounter import EncounterGenerator, EncounterIndex
+from core.encounter import cr_to_xp, party_xp_budget
+from db.creatureDB import CreatureDB
+
+
+CREATURE_KEYS = [
+    'CR', 'name', 'hp', 'HD', 'AC', 'touch', 'flat-footed',
+    'Fort', 'Ref', 'Will', 'Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha',
+    'BAB', 'CMB', 'CMD'
+]
+CREATURES = [
+    '0.25,Kobold Zombie,12,2,15,12,14,0,0,3,11,10,-1,-1,10,10,1,0,10',
+    '0.5,Goblin,6,1,16,13,14,3,2,-1,11,15,12,10,9,6,1,0,12',
+    '1,Akata,19,3,16,12,14,4,2,4,13,12,13,3,12,10,2,3,14',
+    '2,Lemure,13,2,14,10,14,3,0,0,11,10,10,-1,11,5,2,2,12',
+    '3,Dretch,18,2,14,10,14,3,0,3,12,10,14,5,11,11,2,3,13',
+]
+
+
+class TestEncounter(unittest.TestCase):
+    '''This class tests the validity of core.encounter'''
+
+    def setUp(self):
+        self.db = CreatureDB(':memory:')
+        for line in CREATURES:
+            features = dict(zip(CREATURE_KEYS, line.split(',')))
+            self.db.add_creature(dict_build(features))
+
+    def tearDown(self):
+        self.db.commit_and_close()
+
+    def test_cr_to_xp(self):
+        '''Checks XP values for fractional, integral and nominal CRs'''
+        self.assertEqual(cr_to_xp('0.16'), 65)
+        self.assertEqual(cr_to_xp('1/2'), 200)
+        self.assertEqual(cr_to_xp(1), 400)
+        self.assertEqual(cr_to_xp('CR 4'), 1200)
+        self.assertEqual(cr_to_xp(20.0), 307200)
+
+    def test_party_xp_budget(self):
+        '''Checks XP budgets for parties of different sizes'''
+        self.assertEqual(party_xp_budget(4, 1), 400)
+        self.assertEqual(party_xp_budget(3, 1), 200)
+        self.assertEqual(party_xp_budget(6, 2, 'hard'), 1600)
+
+    def test_generate(self):
+        '''Checks that generated encounters fill the XP budget'''
+        generator = EncounterGenerator(EncounterIndex(self.db), seed=1)
+        encounters = list(generator.generate(800, count=50, tolerance=0.2,
+                                             max_creatures=4))
+        self.assertEqual(len(encounters), 50)
+        for encounter in encounters:
+            self.assertTrue(640 <= encounter.xp <= 800)
+            self.assertTrue(1 <= len(encounter.creatures) <= 4)
+            self.assertEqual(encounter.xp, sum(cr_to_xp(x[2])
+                                               for x in encounter.creatures))
+
+    def test_filters(self):
+        '''Checks that filtered indices only contain matching creatures'''
+        index = EncounterIndex(self.db, {'ac': (15, None), 'hp': (None, 12)})
+        names = sorted(x[1] for x in index.creatures.values())
+        self.assertEqual(names, ['Goblin', 'Kobold Zombie'])
+
+    def test_content(self):
+        '''Checks that indices only contain standard creatures unless
+        3rd party content is requested'''
+        creature = dict_build(dict(zip(CREATURE_KEYS,
+                                       CREATURES[2].split(','))))
+        creature.is_3pp = True
+        self.db.add_creature(creature)
+        self.assertEqual(len(EncounterIndex(self.db)), 5)
+        index = EncounterIndex(self.db, content='3pp')
+        self.assertEqual([x[1] for x in index.creatures.values()],
+                         ['Akata'])
+        self.assertEqual(len(EncounterIndex(self.db, content='all')), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
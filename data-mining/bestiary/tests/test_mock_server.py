@@ -0,0 +1,165 @@
+'''A module that tests the mock d20pfsrd.com server of the mock_server
+module and the crawler's use of it.'''
+
+
+import sys
+sys.path.append('..')
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+try:
+    from urllib2 import HTTPError, urlopen
+except ImportError:
+    from urllib.error import HTTPError
+    from urllib.request import urlopen
+
+import crawler
+import synthetic
+from db.creatureDB import CreatureDB
+from mock_server import MockServer
+
+
+class TestMockServer(unittest.TestCase):
+    '''This class tests the validity of mock_server.MockServer and of
+    crawling it with crawler.BASE_URL'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.creatures = list(synthetic.iter_creatures(20, seed=5))
+        synthetic.write_site(self.directory, self.creatures,
+                             crawler.SITE_URL)
+        with open(self.directory + '/INDEX.txt', 'r') as index_file:
+            self.indeces = index_file.read().split('\n')
+        self.servers = []
+        self.publishers = crawler.THIRD_PARTY_PUBLISHERS
+        crawler.THIRD_PARTY_PUBLISHERS = synthetic.THIRD_PARTY_PUBLISHERS
+        self.retries = crawler.MAX_ATTEMPTS, crawler.RETRY_DELAY
+        crawler.RETRY_DELAY = 0.01
+
+    def tearDown(self):
+        crawler.BASE_URL = crawler.SITE_URL
+        crawler.THIRD_PARTY_PUBLISHERS = self.publishers
+        crawler.MAX_ATTEMPTS, crawler.RETRY_DELAY = self.retries
+        for server in self.servers:
+            server.stop()
+        shutil.rmtree(self.directory)
+
+    def _start(self, **kwargs):
+        server = MockServer(self.directory, **kwargs)
+        self.servers.append(server)
+        crawler.BASE_URL = server.start()
+        return server
+
+    def _crawl(self):
+        db = CreatureDB(':memory:')
+        failures = []
+        links = crawler.iter_crawl_links(self.indeces, (), crawler.MODE_ALL,
+                                         failures)
+        failures.extend(crawler.crawl(db, links, crawler.MODE_ALL,
+                                      workers=2))
+        query = 'select name from creatures order by name'
+        names = [x[0] for x in db.connection.execute(query)]
+        db.connection.close()
+        return names, failures
+
+    def test_serve(self):
+        '''Checks that pages are served at the paths of their links'''
+        server = self._start()
+        link = self.indeces[0].replace(crawler.SITE_URL,
+                                       server.url + '/')
+        page = urlopen(link).read()
+        self.assertTrue(b'monster-listings/' in page)
+        with self.assertRaises(HTTPError) as context:
+            urlopen(server.url + '/bestiary/missing')
+        self.assertEqual(context.exception.code, 404)
+
+    def test_file_names(self):
+        '''Checks that only files under the root directory are served'''
+        server = self._start()
+        sibling = self.directory + '-other'
+        os.mkdir(sibling)
+        try:
+            with open(os.path.join(sibling, 'secret.txt'), 'w') as secret:
+                secret.write('secret')
+            name = os.path.basename(self.directory)
+            for path in ['/../%s-other/secret.txt' % name,
+                         '/bestiary/../../%s-other/secret.txt' % name,
+                         '/../../etc/passwd']:
+                self.assertEqual(server.get_file_name(path), None, path)
+            self.assertEqual(server.get_file_name('//INDEX.txt'),
+                             os.path.join(server.root, 'INDEX.txt'))
+        finally:
+            shutil.rmtree(sibling)
+
+    def test_throttle(self):
+        '''Checks that 429 responses are sent with Retry-After'''
+        server = self._start(throttle_rate=1.0, retry_after=7)
+        with self.assertRaises(HTTPError) as context:
+            urlopen(self.indeces[0].replace(crawler.SITE_URL, server.url))
+        self.assertEqual(context.exception.code, 429)
+        self.assertEqual(context.exception.info()['Retry-After'], '7')
+        self.assertEqual(server.stats['status'], {429: 1})
+
+    def test_crawl(self):
+        '''Checks that links to d20pfsrd.com are crawled from BASE_URL'''
+        server = self._start()
+        names, failures = self._crawl()
+        self.assertEqual(failures, [])
+        self.assertEqual(names, sorted(x['name'] for x in self.creatures))
+        self.assertEqual(server.stats['requests'],
+                         len(self.indeces) + len(self.creatures))
+
+    def test_crawl_errors(self):
+        '''Checks that creature pages are retried MAX_ATTEMPTS times'''
+        server = self._start(error_rate=1.0,
+                             fault_pattern='monster-listings/')
+        names, failures = self._crawl()
+        self.assertEqual(names, [])
+        self.assertEqual(len(failures), len(self.creatures))
+        self.assertEqual(server.stats['status'][500],
+                         len(self.creatures) * crawler.MAX_ATTEMPTS)
+        for link, error in failures:
+            self.assertTrue(error.startswith('failed to download'))
+
+    def test_crawl_index_errors(self):
+        '''Checks that index pages that cannot be downloaded are skipped
+        without stopping the crawl'''
+        server = self._start(error_rate=1.0, fault_pattern='-cr-')
+        names, failures = self._crawl()
+        self.assertEqual(names, [])
+        self.assertEqual(sorted(x[0] for x in failures),
+                         sorted(self.indeces))
+
+    def test_crawl_faults(self):
+        '''Checks that truncated pages and pages answered with 429 are
+        downloaded again until they are fetched'''
+        crawler.MAX_ATTEMPTS = 20
+        server = self._start(throttle_rate=0.3, truncate_rate=0.3,
+                             retry_after=0, fault_pattern='monster-listings/')
+        names, failures = self._crawl()
+        self.assertEqual(failures, [])
+        self.assertEqual(names, sorted(x['name'] for x in self.creatures))
+        self.assertTrue(server.stats['status'][429] > 0)
+        self.assertTrue(server.stats['truncated'] > 0)
+
+    def test_retry_after(self):
+        '''Checks that the Retry-After header of 429 responses is
+        honored'''
+        crawler.MAX_ATTEMPTS = 2
+        server = self._start(throttle_rate=1.0, retry_after=1)
+        link = self.indeces[0]
+        start = time.time()
+        with self.assertRaises(crawler.DownloadError) as context:
+            crawler.fetch_page(link)
+        self.assertTrue(time.time() - start >= 1)
+        self.assertEqual(context.exception.link, link)
+        self.assertEqual(context.exception.error.code, 429)
+        self.assertEqual(server.stats['status'], {429: 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+'''A module that tests the profiling of threads by the core.profiling
+module.'''
+
+
+import sys
+sys.path.append('..')
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from core import profiling
+
+
+def _work():
+    with profiling.section('work'):
+        sorted(range(1000), reverse=True)
+
+
+class TestProfiling(unittest.TestCase):
+    '''This class tests the validity of core.profiling.Profiler'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        profiling._PROFILER = None
+        shutil.rmtree(self.directory)
+
+    def test_threads(self):
+        '''Checks that threads started while profiling are profiled'''
+        profiler = profiling.enable(trace_memory=False)
+        threads = [threading.Thread(target=_work) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        profiler.stop()
+        if not profiling.PROFILES_ALL_THREADS:
+            self.assertEqual(len(profiler.thread_profiles), 3)
+        self.assertEqual(profiler.sections['work'][0], 3)
+        # calls made by every thread are merged
+        stats = profiler.get_stats().stats
+        calls = [stats[x][0] for x in stats.keys() if x[2] == '_work']
+        self.assertEqual(calls, [3])
+        prefix = os.path.join(self.directory, 'profile')
+        for path in profiler.write_report(prefix):
+            self.assertTrue(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
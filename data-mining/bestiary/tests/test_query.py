@@ -0,0 +1,195 @@
+'''A module that tests the read-only, pooled query service of the
+db.query module and its HTTP server.'''
+
+
+import sys
+sys.path.append('..')
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+try:
+    from urllib2 import HTTPError, urlopen
+except ImportError:
+    from urllib.error import HTTPError
+    from urllib.request import urlopen
+
+from core.creature import Creature
+from db.creatureDB import CreatureDB
+from db.query import CreatureQueryService, QueryResult, get_query, serve
+
+
+CREATURES = [('Akata', '1'), ('Dretch', '2'), ('Lemure', '0.5'),
+             ('Ogre', '3'), ('Troll', '10')]
+
+
+def _make_db(name, use_nominal_cr=False, creatures=CREATURES,
+             is_3pp=False):
+    '''Creates a CreatureDB file containing the given creatures'''
+    db = CreatureDB(name, use_nominal_cr)
+    for creature_name, cr in creatures:
+        creature = Creature()
+        creature.name = creature_name
+        creature.cr = cr
+        creature.is_3pp = is_3pp
+        db.add_creature(creature)
+    db.commit_and_close()
+
+
+class TestCreatureQueryService(unittest.TestCase):
+    '''This class tests the validity of db.query.CreatureQueryService'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = os.path.join(self.directory, 'creature.db')
+        _make_db(self.db)
+        self.service = CreatureQueryService(self.db, pool_size=2,
+                                            cache_size=2)
+
+    def tearDown(self):
+        self.service.close()
+        shutil.rmtree(self.directory)
+
+    def test_by_cr_range(self):
+        '''Checks that CR ranges are compared numerically, whether CR
+        values are stored as numbers or as strings'''
+        result = self.service.by_cr_range(0.5, 2)
+        self.assertEqual([x[1] for x in result.rows],
+                         ['Lemure', 'Akata', 'Dretch'])
+        nominal_db = os.path.join(self.directory, 'nominal.db')
+        _make_db(nominal_db, True)
+        service = CreatureQueryService(nominal_db)
+        result = service.by_cr_range(0.5, 2)
+        self.assertEqual([x[1] for x in result.rows],
+                         ['Lemure', 'Akata', 'Dretch'])
+        self.assertEqual(result.rows[0][2], 'CR 0.5')
+        # 'CR 10' comes before 'CR 3' when compared as text
+        result = service.by_cr_range(3, 10)
+        self.assertEqual([x[1] for x in result.rows], ['Ogre', 'Troll'])
+        service.close()
+
+    def test_content(self):
+        '''Checks that standard creatures are queried by default'''
+        _make_db(self.db, creatures=[('Akata', '1'), ('Biba Lurker', '1')],
+                 is_3pp=True)
+        result = self.service.by_cr_range(1, 1)
+        self.assertEqual([x[1] for x in result.rows], ['Akata'])
+        result = self.service.by_cr_range(1, 1, '3pp')
+        self.assertEqual([x[1] for x in result.rows],
+                         ['Akata', 'Biba Lurker'])
+        result = self.service.by_name('Akata', content='all')
+        self.assertEqual(len(result.rows), 2)
+        result = self.service.by_stat('hp', content='3pp')
+        self.assertEqual(len(result.rows), 2)
+        with self.assertRaises(ValueError):
+            self.service.by_name('Akata', content='homebrew')
+
+    def test_partial_name(self):
+        '''Checks that '%' and '_' in partial names match themselves'''
+        _make_db(self.db, creatures=[('50% Troll', '5'), ('Ogre_Mage', '8')])
+        self.assertEqual([x[1] for x in self.service.by_name('r', True).rows],
+                         ['50% Troll', 'Dretch', 'Lemure', 'Ogre', 'Ogre_Mage',
+                          'Troll'])
+        self.assertEqual([x[1] for x in self.service.by_name('%', True).rows],
+                         ['50% Troll'])
+        self.assertEqual([x[1] for x in self.service.by_name('e_', True).rows],
+                         ['Ogre_Mage'])
+
+    def test_columns(self):
+        '''Checks that each result is labelled with its own columns'''
+        result = self.service.execute('select name, CR from creatures '
+                                      'where name = ?', ('Ogre',))
+        self.assertEqual(result, QueryResult(('name', 'CR'),
+                                             (('Ogre', 3.0),)))
+        result = self.service.by_name('Ogre')
+        self.assertEqual(result.columns[:3], ('id', 'name', 'CR'))
+
+    def test_cache(self):
+        '''Checks that results are cached, evicting the least recently
+        used result, and invalidated when the database changes'''
+        first = self.service.by_name('Akata')
+        self.assertTrue(self.service.by_name('Akata') is first)
+        self.service.by_name('Dretch')
+        self.service.by_name('Akata')
+        # the cache holds 2 results, so Dretch's result is evicted
+        self.service.by_name('Ogre')
+        self.assertTrue(self.service.by_name('Akata') is first)
+        key = (get_query('by_name'), ('Dretch',))
+        self.assertEqual(self.service._cache.get(key), None)
+        # adding a creature changes the database file
+        _make_db(self.db, creatures=[('Akata', '5')])
+        stat = os.stat(self.db)
+        os.utime(self.db, (stat.st_atime, stat.st_mtime + 10))
+        result = self.service.by_name('Akata')
+        self.assertFalse(result is first)
+        self.assertEqual(len(result.rows), 2)
+
+    def test_pool(self):
+        '''Checks that threads share at most pool_size connections'''
+        errors = []
+
+        def query(cr):
+            try:
+                for _ in range(20):
+                    self.service.execute('select count(*) from creatures '
+                                         'where CR <= ?', (cr,))
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=query, args=(x,))
+                   for x in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertTrue(1 <= self.service._open_connections <= 2)
+        self.service.close()
+        self.assertEqual(self.service._open_connections, 0)
+
+    def test_serve(self):
+        '''Checks that the HTTP server labels rows with their columns'''
+        self.service.execute('select name from creatures')
+        server = serve(self.service, port=0)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            url = 'http://%s:%d/creatures' % server.server_address[:2]
+            rows = json.loads(urlopen(url + '?min_cr=2&max_cr=3').read()
+                              .decode('utf-8'))
+            self.assertEqual([(x['name'], x['CR']) for x in rows],
+                             [('Dretch', 2.0), ('Ogre', 3.0)])
+            rows = json.loads(urlopen(url + '?name=ak&partial=1').read()
+                              .decode('utf-8'))
+            self.assertEqual([x['name'] for x in rows], ['Akata'])
+            rows = json.loads(urlopen(url + '?name=ak&partial=1&content=3pp')
+                              .read().decode('utf-8'))
+            self.assertEqual(rows, [])
+            with self.assertRaises(HTTPError) as context:
+                urlopen(url + '?name=ak&content=homebrew')
+            self.assertEqual(context.exception.code, 400)
+            # database errors are reported, rather than dropping the
+            #   connection
+            self.service.close()
+            with open(self.db, 'wb') as db_file:
+                db_file.write(b'not a database' * 100)
+            for query in ['?name=Troll', '?name=Ogre']:
+                with self.assertRaises(HTTPError) as context:
+                    urlopen(url + query)
+                self.assertEqual(context.exception.code, 500)
+            os.remove(self.db)
+            with self.assertRaises(HTTPError) as context:
+                urlopen(url + '?name=Akata')
+            self.assertEqual(context.exception.code, 500)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+'''A module that tests the basic functionality of functions and classes
+in the core.simulator module.'''
+
+
+import sys
+sys.path.append('..')
+
+import unittest
+
+from core.creature import Creature
+from core import simulator as simulator_module
+from core.simulator import CombatSimulator, PartyProfile, benchmark
+from db.creatureDB import CreatureDB
+from db.values import MISSING_VALUE, to_int
+
+
+# name, AC, hp, Fort, Ref, Will, BAB, Str
+CREATURES = [
+    ('Goblin', '16', '6', '3', '2', '-1', '1', '11'),
+    ('Dragon', '38', '362', '+21', '+12', '+19', '26', '37'),
+    # values scraped from d20pfsrd.com are not always numbers
+    ('Zombie', '12 (touch 10)', '12', '0', '0', '3', '1', u'—'),
+]
+
+
+def _make_creature(values):
+    '''Creates a Creature object from a tuple ordered as in CREATURES'''
+    creature = Creature()
+    creature.name = values[0]
+    creature.ac['AC'] = values[1]
+    creature.hp = values[2]
+    creature.saves['Fort'], creature.saves['Ref'], creature.saves['Will'] = \
+        values[3:6]
+    creature.bab = values[6]
+    creature.ability_scores['Str'] = values[7]
+    return creature
+
+
+class TestSimulator(unittest.TestCase):
+    '''This class tests the validity of core.simulator.CombatSimulator'''
+
+    def setUp(self):
+        self.creatures = [_make_creature(x) for x in CREATURES]
+        self.party = PartyProfile(ac=18, attack_bonus=8, damage=(1, 8, 4))
+
+    def test_to_int(self):
+        '''Checks that the integer at the start of a value is used'''
+        self.assertEqual(to_int('12 (touch 10)'), 12)
+        self.assertEqual(to_int('+21'), 21)
+        self.assertEqual(to_int(' -1'), -1)
+        self.assertEqual(to_int(7.0), 7)
+        self.assertEqual(to_int(u'—'), MISSING_VALUE)
+        self.assertEqual(to_int(u'—'.encode('utf-8'), 5), 5)
+        self.assertEqual(to_int('', 3), 3)
+        self.assertEqual(to_int(None, 4), 4)
+
+    def test_load(self):
+        '''Checks that stats are loaded, with defaults for non-numbers'''
+        simulator = CombatSimulator(self.creatures, self.party, seed=1,
+                                    trials=10)
+        self.assertEqual(simulator.names, ['Goblin', 'Dragon', 'Zombie'])
+        self.assertEqual(list(simulator.ac), [16, 38, 12])
+        self.assertEqual(list(simulator.saves['Fort']), [3, 21, 0])
+        # a creature without Strength has no Strength modifier
+        self.assertEqual(list(simulator.attack_bonus), [1, 39, 1])
+
+    def test_report(self):
+        '''Checks that simulations give plausible, repeatable results'''
+        simulator = CombatSimulator(self.creatures, self.party, seed=1,
+                                    trials=2000, max_rounds=10)
+        results = simulator.report()
+        self.assertEqual([x['name'] for x in results],
+                         ['Goblin', 'Dragon', 'Zombie'])
+        for result in results:
+            for key in result:
+                if key.endswith('rate'):
+                    self.assertTrue(0.0 <= result[key] <= 1.0)
+            self.assertTrue(1.0 <= result['rounds_to_kill'] <= 11.0)
+        goblin, dragon, zombie = results
+        # the party hits AC 16 on 8 or more, and only hits AC 38 on a 20
+        self.assertAlmostEqual(goblin['party_hit_rate'], 0.65, delta=0.05)
+        self.assertAlmostEqual(dragon['party_hit_rate'], 0.05, delta=0.02)
+        self.assertAlmostEqual(dragon['creature_hit_rate'], 0.95,
+                               delta=0.02)
+        # a creature that can not be killed in max_rounds lasts longer
+        self.assertEqual(dragon['rounds_to_kill'], 11.0)
+        self.assertTrue(goblin['rounds_to_kill'] < zombie['rounds_to_kill'])
+        repeated = CombatSimulator(self.creatures, self.party, seed=1,
+                                   trials=2000, max_rounds=10).report()
+        self.assertEqual(repeated, results)
+
+    def test_from_db(self):
+        '''Checks that simulators can be built from a CreatureDB'''
+        db = CreatureDB(':memory:')
+        for creature in self.creatures:
+            creature.cr = '1'
+            db.add_creature(creature)
+        creature = _make_creature(CREATURES[0])
+        creature.cr = '1'
+        creature.is_3pp = True
+        db.add_creature(creature)
+        simulator = CombatSimulator.from_db(db, self.party, trials=10)
+        self.assertEqual(sorted(simulator.names),
+                         ['Dragon', 'Goblin', 'Zombie'])
+        self.assertEqual(sorted(simulator.ac), [12, 16, 38])
+        # 3rd party creatures are only simulated when requested
+        simulator = CombatSimulator.from_db(db, self.party, '3pp',
+                                            trials=10)
+        self.assertEqual(simulator.names, ['Goblin'])
+        db.connection.close()
+
+    def test_batches(self):
+        '''Checks that results do not depend on how creatures are split
+        into batches'''
+        party = PartyProfile(ac=18, attack_bonus=8, damage=(1, 8, 4),
+                             save_dc=14)
+        creatures = self.creatures * 5
+        results = CombatSimulator(creatures, party, seed=2,
+                                  trials=400).report()
+        batch_elements = simulator_module.MAX_BATCH_ELEMENTS
+        simulator_module.MAX_BATCH_ELEMENTS = 1000
+        try:
+            batched = CombatSimulator(creatures, party, seed=2,
+                                      trials=400).report()
+        finally:
+            simulator_module.MAX_BATCH_ELEMENTS = batch_elements
+        for result, expected in zip(batched, results):
+            for key in result:
+                if key.endswith('rate'):
+                    self.assertAlmostEqual(result[key], expected[key],
+                                           delta=0.1)
+        self.assertEqual(len(batched), 15)
+
+    def test_benchmark(self):
+        '''Checks that benchmark(...) counts the dice rolled per second'''
+        simulator = CombatSimulator(self.creatures, self.party, seed=1,
+                                    trials=100, max_rounds=5)
+        rolls_per_second = benchmark(simulator, repeat=2)
+        self.assertTrue(rolls_per_second > 0)
+        self.assertTrue(simulator.rolls > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
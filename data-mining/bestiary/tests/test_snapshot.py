@@ -0,0 +1,123 @@
+'''A module that tests the basic functionality of functions and classes
+in the db.snapshot module.'''
+
+
+import sys
+sys.path.append('..')
+
+import os
+import tempfile
+import unittest
+from core.builders.creature.dict import build as dict_build
+from db.creatureDB import CreatureDB
+from db.snapshot import HEADER, MAGIC, STAT_COLUMNS, CreatureSnapshot
+from db.values import MISSING_VALUE
+
+
+CREATURE_KEYS = [
+    'CR', 'name', 'hp', 'HD', 'AC', 'touch', 'flat-footed',
+    'Fort', 'Ref', 'Will', 'Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha',
+    'BAB', 'CMB', 'CMD'
+]
+CREATURES = [
+    '0.25,Kobold Zombie,12,2,15,12,14,0,0,3,11,10,-1,-1,10,10,1,0,10',
+    '1,Akata,19,3,16,12,14,4,2,4,13,12,13,3,12,10,2,3,14',
+    '3,Dretch,18,2,14,10,14,3,0,3,12,10,14,5,11,11,2,3,13',
+    # third party creature whose CMB is not a number
+    '2,Biba Lurker,22,3,15,11,14,4,2,3,14,12,13,2,12,9,2,-,14',
+]
+# source of each creature, the last being third party content
+SOURCES = ['Bestiary 1', 'Bestiary 2', 'Bestiary 1', 'Tome of Lurkers']
+
+
+class TestSnapshot(unittest.TestCase):
+    '''This class tests the validity of db.snapshot'''
+
+    def setUp(self):
+        handle, self.file_name = tempfile.mkstemp(suffix='.snap')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.file_name)
+
+    def _export(self, use_nominal_cr=False):
+        '''Exports the test creatures to a snapshot file
+
+        :param use_nominal_cr: whether CR values are stored as strings
+        '''
+        db = CreatureDB(':memory:', use_nominal_cr)
+        for line, source in zip(CREATURES, SOURCES):
+            features = dict(zip(CREATURE_KEYS, line.split(',')))
+            creature = dict_build(features)
+            creature.source = source
+            creature.is_3pp = source == SOURCES[-1]
+            db.add_creature(creature)
+        db.export_as_snapshot(self.file_name)
+        db.commit_and_close()
+
+    def test_rows(self):
+        '''Checks that rows read from a snapshot match the database'''
+        self._export()
+        with CreatureSnapshot(self.file_name) as snapshot:
+            self.assertEqual(len(snapshot), 4)
+            self.assertEqual(snapshot.name(1), 'Akata')
+            row = snapshot[0]
+            self.assertEqual(row.name, 'Kobold Zombie')
+            self.assertEqual(row.CR, 0.25)
+            self.assertEqual(row.Con, -1)
+            self.assertEqual(row.CMD, 10)
+            self.assertEqual((row.is_3pp, row.source), (0, 'Bestiary 1'))
+            row = snapshot[-1]
+            self.assertEqual((row.is_3pp, row.source), (1, 'Tome of Lurkers'))
+            self.assertEqual(row.CMB, MISSING_VALUE)
+            self.assertEqual([x.id for x in snapshot], [1, 2, 3, 4])
+            self.assertEqual([x.source for x in snapshot], SOURCES)
+
+    def test_as_array(self):
+        '''Checks that the NumPy view of a snapshot matches its rows'''
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('NumPy is not installed')
+        self._export()
+        with CreatureSnapshot(self.file_name) as snapshot:
+            array = snapshot.as_array()
+            self.assertEqual(array.shape, (4,))
+            self.assertEqual(list(array['id']), [1, 2, 3, 4])
+            self.assertEqual(list(array['CR']), [0.25, 1.0, 3.0, 2.0])
+            self.assertEqual(list(array['is_3pp']), [0, 0, 0, 1])
+            for i, row in enumerate(snapshot):
+                stats = [int(array[x][i]) for x in STAT_COLUMNS]
+                self.assertEqual(tuple(stats), row[-len(STAT_COLUMNS):])
+            self.assertEqual(array['CMB'][3], MISSING_VALUE)
+            self.assertEqual(list(numpy.flatnonzero(
+                array['CMB'] == MISSING_VALUE)), [3])
+            # the string table stores each source once
+            self.assertEqual(array['source_offset'][0],
+                             array['source_offset'][2])
+            del array
+
+    def test_nominal_cr(self):
+        '''Checks that CR values stored as strings are converted'''
+        self._export(use_nominal_cr=True)
+        with CreatureSnapshot(self.file_name) as snapshot:
+            self.assertEqual([x.CR for x in snapshot],
+                             [0.25, 1.0, 3.0, 2.0])
+
+    def test_bad_file(self):
+        '''Checks that files that are not snapshots are rejected'''
+        with open(self.file_name, 'wb') as bad_file:
+            bad_file.write(b'\0' * 64)
+        self.assertRaises(ValueError, CreatureSnapshot, self.file_name)
+
+    def test_old_version(self):
+        '''Checks that snapshots written in an older format are rejected'''
+        with open(self.file_name, 'wb') as old_file:
+            old_file.write(HEADER.pack(MAGIC, 1, 0, HEADER.size))
+        with self.assertRaises(ValueError) as context:
+            CreatureSnapshot(self.file_name)
+        self.assertTrue('version 1' in str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
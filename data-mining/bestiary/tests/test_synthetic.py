@@ -0,0 +1,112 @@
+'''A module that tests the synthetic Bestiary generator of the synthetic
+module.'''
+
+
+import sys
+sys.path.append('..')
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from fractions import Fraction
+from lxml.html import fromstring
+
+import crawler
+import synthetic
+from core.builders.creature.d20pfsrd import build as d20_build
+from db.creatureDB import CreatureDB
+
+
+# Matches the name of a creature linked from an index page
+LINK_NAME_PATTERN = re.compile(r'<a href="[^"]*">([^<]*)</a>')
+
+
+class TestSynthetic(unittest.TestCase):
+    '''This class tests the validity of synthetic.iter_creatures(...),
+    synthetic.render_page(...) and synthetic.write_site(...)'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_seed(self):
+        '''Checks that the same seed generates the same creatures'''
+        first = list(synthetic.iter_creatures(50, seed=1))
+        self.assertEqual(first, list(synthetic.iter_creatures(50, seed=1)))
+        self.assertNotEqual(first, list(synthetic.iter_creatures(50, seed=2)))
+        names = set(x['name'].split(' ')[0] for x in first)
+        self.assertEqual(len(names), 50)
+
+    def test_render_page(self):
+        '''Checks that the d20pfsrd builder reads back generated values'''
+        for creature in synthetic.iter_creatures(200, seed=3):
+            built = d20_build(fromstring(synthetic.render_page(creature)))
+            values = [built.cr, built.name, built.hp, built.hd]
+            values.extend(built.ac[x] for x in ['AC', 'touch', 'flat-footed'])
+            values.extend(built.saves[x] for x in ['Fort', 'Ref', 'Will'])
+            values.extend(built.ability_scores[x] for x in
+                          ['Str', 'Dex', 'Con', 'Int', 'Wis', 'Cha'])
+            values.extend([built.bab, built.cmb, built.cmd])
+            self.assertEqual(values,
+                             [creature[x] for x in synthetic.CSV_COLUMNS])
+
+    def test_index_cr_range(self):
+        '''Checks that the CR band read from the link of every generated
+        index page includes every creature listed on the page'''
+        creatures = list(synthetic.iter_creatures(600, seed=5))
+        synthetic.write_site(self.directory, creatures, links_per_index=1)
+        crs = dict((x['name'], float(Fraction(x['CR']))) for x in creatures)
+        with open(os.path.join(self.directory, 'INDEX.txt')) as index_file:
+            indeces = index_file.read().split('\n')
+        # pages are numbered past the high bound of the last band
+        self.assertTrue(len([x for x in indeces if '-cr-21-' in x]) > 30)
+        for index in indeces:
+            with open(index, 'r') as page_file:
+                names = LINK_NAME_PATTERN.findall(page_file.read())
+            self.assertTrue(names)
+            low, high = crawler.get_index_cr_range(index)
+            for name in names:
+                self.assertTrue(low <= crs[name] <= high, index)
+        for band in synthetic.CR_BANDS:
+            for page in range(40):
+                low, high = crawler.get_index_cr_range(
+                    synthetic._get_band_link(band, page))
+                self.assertEqual(high, band[1])
+
+    def test_crawl_site(self):
+        '''Checks that every creature of a generated site is crawled'''
+        creatures = list(synthetic.iter_creatures(60, seed=4,
+                                                  third_party_rate=0.5))
+        synthetic.write_site(self.directory, creatures, links_per_index=5,
+                             special_rate=0.1)
+        with open(os.path.join(self.directory, 'INDEX.txt')) as index_file:
+            indeces = index_file.read().split('\n')
+        with open(os.path.join(self.directory,
+                               'INDEX_SPECIAL.txt')) as special_file:
+            special_links = special_file.read().split('\n')
+        self.assertTrue(len(indeces) > len(synthetic.CR_BANDS))
+
+        db = CreatureDB(os.path.join(self.directory, 'creature.db'))
+        publishers = crawler.THIRD_PARTY_PUBLISHERS
+        crawler.THIRD_PARTY_PUBLISHERS = synthetic.THIRD_PARTY_PUBLISHERS
+        try:
+            links = crawler.iter_crawl_links(indeces, special_links,
+                                             crawler.MODE_ALL)
+            failures = crawler.crawl(db, links, crawler.MODE_ALL, workers=2)
+        finally:
+            crawler.THIRD_PARTY_PUBLISHERS = publishers
+        self.assertEqual(failures, [])
+        query = 'select name, is_3pp from creatures order by name'
+        rows = db.connection.execute(query).fetchall()
+        db.connection.close()
+        self.assertEqual(rows, sorted((x['name'], int(x['is_3pp']))
+                                      for x in creatures))
+
+
+if __name__ == '__main__':
+    unittest.main()